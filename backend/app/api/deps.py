@@ -1,27 +1,42 @@
+import asyncio
+import logging
+import math
+import jwt
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from supabase import create_client, Client
 from app.core.config import settings
-from supabase_auth.errors import AuthApiError
+from app.core.metrics import instrument
+from app.core.security import SigningKeyUnavailable, VerifiedTokenCache, build_jwt_verifier
+from app.services.rate_limiter import RateLimiter, get_rate_limiter
 
-# Supabase client setup
-supabase_client: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+logger = logging.getLogger(__name__)
+
+# Supabase client, created on first use (or by the start-up warmup) since the SDK is slow to import
+supabase_client = None
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token") # Not used directly, just for docs
 
-async def get_current_user(request: Request):
-    """Dependency to get and validate the current user from Supabase JWT."""
-    token = request.headers.get("Authorization")
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header is missing",
-        )
+# Local JWT verification and a short-lived cache of tokens that already passed verification
+jwt_verifier = build_jwt_verifier()
+token_cache = VerifiedTokenCache(
+    ttl_seconds=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+)
 
-    token = token.replace("Bearer ", "")
+def _unverified_expiry(token: str) -> float | None:
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.InvalidTokenError:
+        return None
+    return float(exp) if exp is not None else None
 
+async def _get_remote_user(token: str):
+    """Validates the token with Supabase Auth without blocking the event loop."""
+    from supabase_auth.errors import AuthApiError
+
+    client = get_supabase_client()
     try:
-        user_response = supabase_client.auth.get_user(token)
+        user_response = await asyncio.to_thread(client.auth.get_user, token)
         return user_response.user
     except AuthApiError as e:
         raise HTTPException(
@@ -34,5 +49,61 @@ async def get_current_user(request: Request):
             detail="Could not validate credentials",
         )
 
-def get_supabase_client() -> Client:
+@instrument("auth")
+async def get_current_user(request: Request):
+    """Dependency to get and validate the current user from Supabase JWT."""
+    token = request.headers.get("Authorization")
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization header is missing",
+        )
+
+    token = token.replace("Bearer ", "")
+
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
+    if settings.AUTH_MODE == "local":
+        try:
+            user, expires_at = await jwt_verifier.verify(token)
+            token_cache.put(token, user, expires_at)
+            return user
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid authentication credentials: {e}",
+            )
+        except SigningKeyUnavailable as e:
+            # Fall back to the remote check when no local key can verify the token
+            logger.warning("Local JWT verification unavailable, using Supabase Auth", extra={"error": str(e)})
+
+    user = await _get_remote_user(token)
+    token_cache.put(token, user, _unverified_expiry(token))
+    return user
+
+def rate_limit(scope: str = "default"):
+    """Dependency factory that spends one token of the `scope` budget for the current user."""
+    async def check_rate_limit(
+        current_user = Depends(get_current_user),
+        limiter: RateLimiter | None = Depends(get_rate_limiter),
+    ):
+        if limiter is None:
+            return
+        retry_after = await limiter.acquire(scope, str(current_user.id))
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded. Try again later.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+    return check_rate_limit
+
+def get_supabase_client():
+    global supabase_client
+    if supabase_client is None:
+        from supabase import create_client
+
+        supabase_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
     return supabase_client
@@ -1,23 +1,56 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
-from app.models.note import NoteCreate, NoteUpdate, NoteSchema
-from app.services.note_service import NoteService
-from app.api.deps import get_current_user, get_supabase_client
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from typing import List, Union
+from app.models.note import NoteCreate, NoteUpdate, NoteSchema, NoteSummarySchema, NoteSearchBatch, SearchBatchResult, BulkImportResult, NOTE_FIELDS
+from app.services.note_service import NoteService, resolve_fields
+from app.api.deps import get_current_user, get_supabase_client, rate_limit
+from app.core.config import settings
+from app.core.pagination import InvalidCursorError
+from app.core.responses import note_response, search_batch_response
 from app.services.ai_services import get_ai_service, AIService
-from app.services.vector_db import get_vector_db_service, VectorDBService
-from supabase import Client
+from app.services.vector_db import get_vector_db_service, SearchFilters, VectorDBService
+from app.services.indexing import get_indexing_pipeline, IndexingPipeline
+from app.services.bulk_import import iter_ndjson
+from app.services.db_executor import get_db_executor, DBExecutor
+from app.services.search_cache import get_search_cache, SearchCache
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
+def get_projection(
+    view: str = Query("full", description="'summary' returns id, title, snippet, tags and dates"),
+    fields: str | None = Query(None, description=f"Comma-separated subset of: {', '.join(NOTE_FIELDS)}")
+) -> tuple[str, ...] | None:
+    """Resolves the `view`/`fields` query parameters shared by list, get and search."""
+    try:
+        return resolve_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def get_search_filters(
+    tags: List[str] = Query([], description="Only notes carrying every one of these tags"),
+    since: datetime | None = Query(None, description="Only notes created at or after this time (UTC if no offset)"),
+    until: datetime | None = Query(None, description="Only notes created at or before this time (UTC if no offset)"),
+    score_threshold: float | None = Query(None, description="Drop matches scoring below this similarity"),
+) -> SearchFilters | None:
+    """Resolves the search filter query parameters; they are applied inside the vector index, not after it."""
+    since, until = (value.replace(tzinfo=timezone.utc) if value and value.tzinfo is None else value for value in (since, until))
+    if since and until and since > until:
+        raise HTTPException(status_code=400, detail="since must not be later than until.")
+    filters = SearchFilters(tuple(dict.fromkeys(tags)), since, until, score_threshold)
+    return filters if filters != SearchFilters() else None
+
 def get_note_service(
-    db: Client = Depends(get_supabase_client),
+    db = Depends(get_supabase_client),
     ai: AIService = Depends(get_ai_service),
-    vector_db: VectorDBService = Depends(get_vector_db_service)
+    vector_db: VectorDBService = Depends(get_vector_db_service),
+    indexer: IndexingPipeline | None = Depends(get_indexing_pipeline),
+    executor: DBExecutor = Depends(get_db_executor),
+    search_cache: SearchCache | None = Depends(get_search_cache)
 ) -> NoteService:
-    return NoteService(db, ai, vector_db)
+    return NoteService(db, ai, vector_db, indexer, executor, search_cache)
 
-@router.post("/", response_model=NoteSchema, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=NoteSchema, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("write"))])
 async def create_new_note(
     note_in: NoteCreate,
     service: NoteService = Depends(get_note_service),
@@ -25,42 +58,128 @@ async def create_new_note(
 ):
     """Create a new note. The title is auto-generated."""
     note = await service.create_note(note_in, user_id=current_user.id)
-    return note
+    return note_response(note, status_code=status.HTTP_201_CREATED)
 
-@router.get("/search", response_model=List[NoteSchema])
+@router.post(
+    "/bulk",
+    response_model=BulkImportResult,
+    dependencies=[Depends(rate_limit("write"))],
+    openapi_extra={"requestBody": {"content": {"application/x-ndjson": {"schema": {"type": "string"}}}}},
+)
+async def bulk_import_notes(
+    request: Request,
+    service: NoteService = Depends(get_note_service),
+    current_user = Depends(get_current_user)
+):
+    """Import many notes from an NDJSON body, one {"content": ..., "tags": [...]} object per line."""
+    return await service.bulk_import(iter_ndjson(request.stream()), user_id=current_user.id)
+
+@router.get("/search", response_model=Union[List[NoteSchema], List[NoteSummarySchema]], response_model_exclude_unset=True, dependencies=[Depends(rate_limit("search"))])
 async def search_notes_by_query(
     q: str = Query(..., min_length=3, description="Natural language search query"),
+    limit: int = Query(5, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    filters: SearchFilters | None = Depends(get_search_filters),
+    fields: tuple[str, ...] | None = Depends(get_projection),
+    service: NoteService = Depends(get_note_service),
+    current_user = Depends(get_current_user)
+):
+    """Retrieve notes based on semantic similarity to a natural language query.
+
+    `tags`, `since`/`until` and `score_threshold` narrow the candidates inside the vector
+    index, so a filtered search still returns up to `limit` matches.
+    """
+    results = await service.search_user_notes(query=q, user_id=current_user.id, fields=fields, limit=limit, filters=filters)
+    return note_response(results)
+
+@router.post("/search/batch", response_model=List[SearchBatchResult], response_model_exclude_unset=True, dependencies=[Depends(rate_limit("search"))])
+async def search_notes_batch(
+    batch: NoteSearchBatch,
+    limit: int = Query(5, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    filters: SearchFilters | None = Depends(get_search_filters),
+    fields: tuple[str, ...] | None = Depends(get_projection),
     service: NoteService = Depends(get_note_service),
     current_user = Depends(get_current_user)
 ):
-    """Retrieve notes based on semantic similarity to a natural language query."""
-    return await service.search_user_notes(query=q, user_id=current_user.id)
+    """Run several semantic searches at once; results come back in query order.
 
-@router.get("/", response_model=List[NoteSchema])
-def get_all_user_notes(
+    All queries are embedded, searched and hydrated together, so this costs about one
+    search however many queries it carries (up to SEARCH_BATCH_MAX_QUERIES). The search
+    filters and `limit` apply to every query.
+    """
+    if len(batch.queries) > settings.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SEARCH_BATCH_MAX_QUERIES} queries per batch.")
+    if any(len(query.strip()) < 3 for query in batch.queries):
+        raise HTTPException(status_code=400, detail="Each query must be at least 3 characters long.")
+    results = await service.search_user_notes_batch(
+        batch.queries, user_id=current_user.id, fields=fields, limit=limit, filters=filters
+    )
+    return search_batch_response(batch.queries, results)
+
+@router.get("/", response_model=Union[List[NoteSchema], List[NoteSummarySchema]], response_model_exclude_unset=True, dependencies=[Depends(rate_limit())])
+async def get_all_user_notes(
+    response: Response,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    fields: tuple[str, ...] | None = Depends(get_projection),
     service: NoteService = Depends(get_note_service),
     current_user = Depends(get_current_user)
 ):
-    """Retrieve all notes for the authenticated user with pagination."""
+    """Retrieve all notes for the authenticated user, newest first.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page;
+    the header is absent on the last page. `page` is kept for offset-based clients.
+    """
     if page < 1 or page_size < 1:
         raise HTTPException(status_code=400, detail="Page and page_size must be positive.")
-    return service.get_all_notes(user_id=current_user.id, page=page, page_size=page_size)
+    if page_size > settings.NOTES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page_size must be at most {settings.NOTES_MAX_PAGE_SIZE}.")
+
+    if cursor or page == 1:
+        try:
+            notes, next_cursor = await service.get_notes_page(user_id=current_user.id, page_size=page_size, cursor=cursor, fields=fields)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        notes, next_cursor = await service.get_all_notes(user_id=current_user.id, page=page, page_size=page_size, fields=fields)
 
-@router.get("/{note_id}", response_model=NoteSchema)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    if headers:
+        response.headers.update(headers)  # FastAPI only applies these when we don't return our own Response
+    return note_response(notes, headers=headers)
+
+@router.get("/{note_id}", response_model=Union[NoteSchema, NoteSummarySchema], response_model_exclude_unset=True, dependencies=[Depends(rate_limit())])
 async def get_note(
     note_id: uuid.UUID,
+    fields: tuple[str, ...] | None = Depends(get_projection),
     service: NoteService = Depends(get_note_service),
     current_user = Depends(get_current_user)
 ):
     """Retrieve a specific note by its ID."""
-    note = await service.get_note_by_id(note_id, current_user.id)
+    note = await service.get_note_by_id(note_id, current_user.id, fields=fields)
     if not note:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
-    return note
+    return note_response(note)
 
-@router.put("/{note_id}", response_model=NoteSchema)
+@router.get("/{note_id}/related", response_model=Union[List[NoteSchema], List[NoteSummarySchema]], response_model_exclude_unset=True, dependencies=[Depends(rate_limit())])
+async def get_related_notes(
+    note_id: uuid.UUID,
+    positive: List[uuid.UUID] = Query([], description="More notes the results should resemble"),
+    negative: List[uuid.UUID] = Query([], description="Notes the results should be unlike"),
+    limit: int = Query(5, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    fields: tuple[str, ...] | None = Depends(get_projection),
+    service: NoteService = Depends(get_note_service),
+    current_user = Depends(get_current_user)
+):
+    """Notes similar to this one, found from its stored vector without re-embedding it."""
+    notes = await service.related_notes(
+        note_id, current_user.id, positive=positive, negative=negative, limit=limit, fields=fields
+    )
+    if notes is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found or not indexed yet")
+    return note_response(notes)
+
+@router.put("/{note_id}", response_model=NoteSchema, dependencies=[Depends(rate_limit("write"))])
 async def update_existing_note(
     note_id: uuid.UUID,
     note_in: NoteUpdate,
@@ -71,9 +190,21 @@ async def update_existing_note(
     updated_note = await service.update_note(note_id, note_in, current_user.id)
     if not updated_note:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
-    return updated_note
+    return note_response(updated_note)
+
+@router.post("/{note_id}/reindex", response_model=NoteSchema, dependencies=[Depends(rate_limit("write"))])
+async def reindex_existing_note(
+    note_id: uuid.UUID,
+    service: NoteService = Depends(get_note_service),
+    current_user = Depends(get_current_user)
+):
+    """Re-run embedding and vector indexing for a note, e.g. after indexing failed."""
+    note = await service.reindex_note(note_id, current_user.id)
+    if not note:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+    return note_response(note)
 
-@router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(rate_limit())])
 async def delete_existing_note(
     note_id: uuid.UUID,
     service: NoteService = Depends(get_note_service),
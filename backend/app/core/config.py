@@ -6,18 +6,98 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings(BaseSettings):
-    # Rate Limiting
-    RATE_LIMIT: str = "10/minute"
+    # Start-up: clients are created and warmed concurrently in the background by default;
+    # set this to hold start-up until they're ready (e.g. where nothing checks /health/ready)
+    STARTUP_WAIT_FOR_WARMUP: bool = False
+
+    # Observability: per-stage latency histograms at /metrics, a Server-Timing header and JSON logs
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+
+    # Rate Limiting, per authenticated user. Search and writes (which call the embedding API)
+    # get their own budgets. Buckets live in Redis when RATE_LIMIT_REDIS_URL is set so all
+    # workers share them; otherwise each process keeps its own.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT: str = "120/minute"
+    RATE_LIMIT_SEARCH: str = "30/minute"
+    RATE_LIMIT_WRITE: str = "30/minute"
+    RATE_LIMIT_REDIS_URL: str = ""
+    RATE_LIMIT_LEASE_SIZE: int = 5  # Tokens a worker takes from the shared bucket at a time
+    RATE_LIMIT_LEASE_TTL_SECONDS: float = 2.0  # Unused leased tokens are handed back after this
+
+    # Response encoding: orjson without re-validating DB rows, and compression of large bodies
+    FAST_SERIALIZATION: bool = True
+    RESPONSE_COMPRESSION: str = "gzip"  # "none", "gzip" or "brotli" (needs the brotli-asgi package)
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+
+    # Time budget per request, inherited by remote calls made for it; clients may ask for less
+    # with an X-Request-Timeout header. 0 disables deadlines
+    REQUEST_DEADLINE_SECONDS: float = 15.0
+
+    # Largest `limit` accepted by search and related-notes requests
+    SEARCH_MAX_LIMIT: int = 50
+    # POST /notes/search/batch: most queries per call (the call spends one search rate-limit token)
+    SEARCH_BATCH_MAX_QUERIES: int = 20
+
+    # Pagination
+    NOTES_MAX_PAGE_SIZE: int = 100
+    NOTE_SNIPPET_LENGTH: int = 300  # Characters of content in summaries and search payloads
 
     # Supabase
     SUPABASE_URL: str
     SUPABASE_ANON_KEY: str
+    DB_THREADPOOL_SIZE: int = 32  # Threads running blocking supabase-py queries off the event loop
+
+    # Auth: "remote" asks Supabase Auth to validate every new token, "local" verifies JWTs in-process
+    AUTH_MODE: str = "remote"
+    SUPABASE_JWT_SECRET: str = ""  # Needed for legacy HS256 tokens in local mode
+    SUPABASE_JWKS_URL: str = ""  # Defaults to {SUPABASE_URL}/auth/v1/.well-known/jwks.json
+    JWT_AUDIENCE: str = "authenticated"
+    JWT_ISSUER: str = ""  # e.g. https://<project>.supabase.co/auth/v1; empty skips the issuer check
+    JWKS_CACHE_TTL_SECONDS: float = 600.0
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
 
     # Qdrant Vector DB
     QDRANT_URL: str
     QDRANT_API_KEY: str = ""
     QDRANT_COLLECTION_NAME: str = "vectornotes"
 
+    # Vector storage: "none" (float32), "scalar" (int8, ~4x smaller) or "binary" (~32x smaller)
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_ON_DISK_VECTORS: bool = False  # Keep full-precision originals on disk, quantized copies in RAM
+    QDRANT_SEARCH_OVERSAMPLING: float = 2.0
+    QDRANT_SEARCH_RESCORE: bool = True
+    # Multi-tenant layout: user_id becomes a tenant index and HNSW graphs are built per user
+    # (payload_m) instead of one global graph (m=0), so a user's search only walks their own points
+    QDRANT_TENANT_MODE: bool = False
+    QDRANT_TENANT_PAYLOAD_M: int = 16
+    QDRANT_HNSW_M: int = 16  # Global graph degree when tenant mode is off
+
+    # "qdrant", or "memory" for a Qdrant-free in-process backend (local development/benchmarks)
+    VECTOR_BACKEND: str = "qdrant"
+
+    # In-process vector tier answering searches for small tenants without a Qdrant round trip
+    LOCAL_INDEX_ENABLED: bool = False
+    LOCAL_INDEX_MEMORY_BUDGET_MB: int = 256
+    LOCAL_INDEX_MAX_TENANT_POINTS: int = 5000
+    LOCAL_INDEX_TTL_SECONDS: float = 60.0  # Bounds staleness when other workers write to a tenant
+
+    # Serve summary/field-projected search results from the Qdrant payload (title, tags,
+    # dates, snippet) instead of hydrating them from Supabase; views with content still hydrate
+    SEARCH_FROM_PAYLOAD: bool = False
+
+    # Per-user search result cache, invalidated whenever the user's notes change
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000
+    SEARCH_CACHE_TTL_SECONDS: float = 300.0
+    # Shares the per-user write generations between workers; without it, run a single worker
+    # or accept that writes on one worker reach the others' caches only after the TTL
+    SEARCH_CACHE_REDIS_URL: str = ""
+
     # Google Gemini API
     #GOOGLE_API_KEY: str
 
@@ -28,6 +108,62 @@ class Settings(BaseSettings):
     # Embedding model configuration
     # EMBEDDING_MODEL: str = "models/text-embedding-004"
     EMBEDDING_DIMENSION: int = 1024
+    # Ask the API for EMBEDDING_DIMENSION-sized (Matryoshka-truncated) vectors, e.g. 256 with jina-embeddings-v3
+    EMBEDDING_REQUEST_DIMENSIONS: bool = False
+    EMBEDDING_API_URL: str = "https://api.jina.ai/v1/embeddings"
+
+    # Shared HTTP client pool for embedding calls
+    EMBEDDING_HTTP_MAX_CONNECTIONS: int = 100
+    EMBEDDING_HTTP_MAX_KEEPALIVE: int = 20
+    EMBEDDING_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    EMBEDDING_HTTP2: bool = False  # Requires the `h2` package
+    EMBEDDING_TIMEOUT: float = 20.0
+    EMBEDDING_CONNECT_TIMEOUT: float = 5.0
+
+    # Embedding call resilience: calls inherit the request deadline, a hedge request is sent
+    # once a call outlasts the recent p95, in-flight calls are capped by an adaptive (AIMD)
+    # limit, and after EMBEDDING_BREAKER_FAILURES consecutive failures calls fail fast with 503
+    EMBEDDING_HEDGE_ENABLED: bool = True
+    EMBEDDING_HEDGE_MIN_DELAY_MS: float = 50.0
+    EMBEDDING_CONCURRENCY_INITIAL: int = 32
+    EMBEDDING_CONCURRENCY_MIN: int = 2
+    EMBEDDING_CONCURRENCY_MAX: int = 100
+    EMBEDDING_BREAKER_FAILURES: int = 5
+    EMBEDDING_BREAKER_RESET_SECONDS: float = 10.0
+
+    # Micro-batching of concurrent embedding requests
+    EMBEDDING_BATCH_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_TOKENS: int = 8000
+
+    # Content-addressed embedding cache
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 5000
+    EMBEDDING_CACHE_TTL_SECONDS: float = 3600.0
+    EMBEDDING_CACHE_DISK_PATH: str = ""  # e.g. "embeddings.sqlite3"; empty disables the disk tier
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 100000
+
+    # Note indexing: "sync" embeds and upserts inside the request, "async" uses the write-behind pipeline
+    INDEXING_MODE: str = "sync"
+    INDEXING_WORKERS: int = 4
+    INDEXING_QUEUE_SIZE: int = 1000
+    INDEXING_BATCH_SIZE: int = 32
+    INDEXING_MAX_RETRIES: int = 5
+    INDEXING_RETRY_BACKOFF_SECONDS: float = 0.5
+    INDEXING_DEAD_LETTER_PATH: str = ""  # Optional JSON-lines file recording notes whose indexing failed
+
+    # Long notes are split into chunks of at most this many characters, each stored as its own
+    # point, so edits only re-embed the chunks they touch; 0 stores every note as a single point
+    CHUNK_MAX_CHARS: int = 2000
+    # Searches fetch this many chunk hits per requested note before collapsing them into notes
+    CHUNK_SEARCH_OVERFETCH: int = 3
+
+    # Bulk NDJSON import
+    BULK_IMPORT_BATCH_SIZE: int = 100
+    BULK_IMPORT_CONCURRENCY: int = 4
+    BULK_IMPORT_MAX_ITEMS: int = 50000
+    BULK_IMPORT_MAX_LINE_BYTES: int = 1_000_000
 
     class Config:
         case_sensitive = True
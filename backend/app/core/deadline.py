@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Monotonic time by which the current request should be answered, set by DeadlineMiddleware
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def time_remaining() -> float | None:
+    """Seconds left before the current request's deadline, or None outside a request (or with no deadline)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Sets a deadline for the enclosed block; an outer, earlier deadline still wins."""
+    current = _deadline.get()
+    at = time.monotonic() + seconds
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def no_deadline():
+    """Lifts the deadline for work shared by several requests, which each enforce their own while waiting."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """Gives every HTTP request a time budget that remote calls made on its behalf inherit.
+
+    Clients can ask for a shorter budget with an `X-Request-Timeout` header in seconds.
+    """
+
+    def __init__(self, app, seconds: float):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        seconds = self.seconds
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-timeout":
+                try:
+                    seconds = min(seconds, max(0.0, float(value)))
+                except ValueError:
+                    pass
+                break
+        with deadline(seconds):
+            await self.app(scope, receive, send)
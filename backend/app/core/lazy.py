@@ -0,0 +1,18 @@
+import importlib
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Lets a module refer to a heavy SDK at the top level without paying its import
+    cost until a code path actually uses it, which keeps app start-up fast.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
@@ -0,0 +1,169 @@
+import functools
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds in seconds; remote calls here range from sub-millisecond cache hits to multi-second embeddings
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request list of (stage, seconds), set by MetricsMiddleware and read for the Server-Timing header
+_request_timings: ContextVar[list | None] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """A Prometheus-style cumulative histogram with one series per label value tuple."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()  # DB executor threads observe too
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict[tuple, list]:
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self.snapshot().items()):
+            labels = ",".join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-1]}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "notes_stage_duration_seconds", "Time spent in each backend stage (auth, embedding, vector search, database).", ("stage",)
+)
+REQUEST_SECONDS = Histogram(
+    "notes_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+SEARCH_SECONDS = Histogram(
+    "notes_search_duration_seconds", "Note search latency by search cache outcome (hit, miss, bypass).", ("cache",)
+)
+
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    """Times the enclosed block as `stage` in the histogram and the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def instrument(stage: str):
+    """Decorator form of `timed` for coroutine functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record_stage(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(timings: list[tuple[str, float]], total: float) -> str:
+    """Formats stage timings as a Server-Timing value, summing repeated stages."""
+    totals: dict[str, float] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _metric_name(*parts: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(parts))
+
+
+def _flatten(prefix: str, value, lines: list[str]):
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)):
+        lines.append(f"{_metric_name(prefix)} {value}")
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}_{key}", item, lines)
+
+
+def render_prometheus(gauges: dict | None = None) -> str:
+    """Prometheus text exposition of the latency histograms plus numeric runtime stats as gauges."""
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render() + SEARCH_SECONDS.render()
+    for component, stats in (gauges or {}).items():
+        _flatten(f"notes_{component}", stats, lines)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and adds a Server-Timing header with its per-stage breakdown.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware so the per-request overhead
+    is a context variable, a list and one histogram observation.
+    """
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings: list[tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(timings, time.perf_counter() - started)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            )
@@ -0,0 +1,29 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: str, note_id: str) -> str:
+    """Opaque keyset cursor for the position just after the note (created_at, id)."""
+    raw = json.dumps([created_at, note_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, note_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+    # Both values end up in a PostgREST filter, so only accept well-formed ones
+    try:
+        datetime.fromisoformat(created_at)
+        uuid.UUID(note_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+    return created_at, note_id
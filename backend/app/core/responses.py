@@ -0,0 +1,61 @@
+import json
+from datetime import date, datetime
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.core.config import settings
+from app.models.note import NoteSchema
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+# Keys a note may carry in a response; anything else on a DB row (e.g. user_id) is dropped
+NOTE_RESPONSE_KEYS = frozenset(NoteSchema.model_fields)
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_unset=True)
+    if orjson is None:
+        # UUIDs and datetimes for the stdlib encoder
+        return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it's installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+        return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def _trim(note):
+    if isinstance(note, dict):
+        return {key: value for key, value in note.items() if key in NOTE_RESPONSE_KEYS}
+    return note
+
+
+def note_response(notes, status_code: int = 200, headers: dict | None = None):
+    """Returns trusted note rows directly as a FastJSONResponse, skipping response_model validation.
+
+    The rows come from our own database, so instead of re-validating them field by field
+    we only drop keys the schema doesn't expose. When FAST_SERIALIZATION is off the data
+    is returned unchanged for FastAPI to validate and encode as usual.
+    """
+    if not settings.FAST_SERIALIZATION:
+        return notes
+
+    content = [_trim(note) for note in notes] if isinstance(notes, list) else _trim(notes)
+    return FastJSONResponse(content=content, status_code=status_code, headers=headers)
+
+
+def search_batch_response(queries: list[str], results: list[list]):
+    """One {"query", "results"} entry per query, encoded like note_response."""
+    if not settings.FAST_SERIALIZATION:
+        return [{"query": query, "results": notes} for query, notes in zip(queries, results)]
+    content = [{"query": query, "results": [_trim(note) for note in notes]} for query, notes in zip(queries, results)]
+    return FastJSONResponse(content=content)
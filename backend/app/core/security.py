@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+import httpx
+import jwt
+from app.core.config import settings
+from app.models.user import AuthenticatedUser
+
+logger = logging.getLogger(__name__)
+
+# Asymmetric algorithms accepted from the JWKS; HS256 is accepted only with a configured secret
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class SigningKeyUnavailable(Exception):
+    """No key is available locally to verify a token; callers may fall back to a remote check."""
+
+
+class VerifiedTokenCache:
+    """Short-lived cache of already-verified tokens, keyed by the token's SHA-256."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return user
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, token: str, user, token_expires_at: float | None = None):
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        key = self._key(token)
+        self._entries[key] = (expires_at, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class JWTVerifier:
+    """Verifies Supabase access tokens locally (signature, expiry, audience).
+
+    Asymmetric keys come from the project's JWKS endpoint and are cached; an unknown
+    `kid` triggers a refresh so key rotation is picked up. Legacy HS256 tokens are
+    verified with the project's JWT secret.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        jwt_secret: str = "",
+        audience: str = "authenticated",
+        issuer: str = "",
+        jwks_ttl_seconds: float = 600.0,
+        jwks_min_refresh_seconds: float = 30.0,
+        leeway_seconds: float = 0.0,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        self.jwks_url = jwks_url
+        self.jwt_secret = jwt_secret
+        self.audience = audience
+        self.issuer = issuer
+        self.jwks_ttl = jwks_ttl_seconds
+        self.jwks_min_refresh = jwks_min_refresh_seconds
+        self.leeway = leeway_seconds
+        self._http_client = http_client
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+
+    async def verify(self, token: str) -> tuple[AuthenticatedUser, float]:
+        """Returns the authenticated user and the token's expiry timestamp.
+
+        Raises jwt.InvalidTokenError for bad tokens and SigningKeyUnavailable when
+        no key can be found to check the signature.
+        """
+        header = jwt.get_unverified_header(token)
+        # The header only picks which key to try; the algorithm checked is always the key's own
+        claimed = header.get("alg")
+        if claimed == "HS256":
+            if not self.jwt_secret:
+                raise SigningKeyUnavailable("HS256 token but SUPABASE_JWT_SECRET is not configured")
+            key, algorithm = self.jwt_secret, "HS256"
+        elif claimed in ASYMMETRIC_ALGORITHMS:
+            jwk = await self._signing_key(header.get("kid"))
+            key, algorithm = jwk.key, jwk.algorithm_name
+            if algorithm not in ASYMMETRIC_ALGORITHMS or algorithm != claimed:
+                raise jwt.InvalidAlgorithmError(f"Token algorithm {claimed} does not match its signing key ({algorithm})")
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported signing algorithm: {claimed}")
+
+        options = {"require": ["exp", "sub"], "verify_iss": bool(self.issuer)}
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience or None,
+            issuer=self.issuer or None,
+            leeway=self.leeway,
+            options=options,
+        )
+        return AuthenticatedUser.from_claims(claims), float(claims["exp"])
+
+    async def prefetch_keys(self) -> int:
+        """Loads the JWKS ahead of the first request; returns how many keys are cached."""
+        async with self._refresh_lock:
+            await self._refresh_keys()
+        return len(self._keys)
+
+    async def _signing_key(self, kid: str | None) -> jwt.PyJWK:
+        stale = time.monotonic() - self._fetched_at > self.jwks_ttl
+        if kid not in self._keys or stale:
+            async with self._refresh_lock:
+                since_fetch = time.monotonic() - self._fetched_at
+                # Refresh on expiry, or on an unknown kid (key rotation) at most every jwks_min_refresh
+                if since_fetch > self.jwks_ttl or (kid not in self._keys and since_fetch > self.jwks_min_refresh):
+                    await self._refresh_keys()
+
+        if kid in self._keys:
+            return self._keys[kid]
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        raise SigningKeyUnavailable(f"No signing key found for kid {kid!r}")
+
+    async def _refresh_keys(self):
+        try:
+            if self._http_client is not None:
+                response = await self._http_client.get(self.jwks_url)
+            else:
+                async with httpx.AsyncClient(timeout=5.0) as client:
+                    response = await client.get(self.jwks_url)
+            response.raise_for_status()
+            jwks = jwt.PyJWKSet.from_dict(response.json())
+        except (httpx.HTTPError, jwt.PyJWKSetError, ValueError) as e:
+            logger.warning("Could not refresh JWKS", extra={"jwks_url": self.jwks_url, "error": str(e)})
+            self._fetched_at = time.monotonic()
+            return
+
+        self._keys = {key.key_id: key for key in jwks.keys}
+        self._fetched_at = time.monotonic()
+
+
+def build_jwt_verifier() -> JWTVerifier:
+    return JWTVerifier(
+        jwks_url=settings.SUPABASE_JWKS_URL or f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+        jwt_secret=settings.SUPABASE_JWT_SECRET,
+        audience=settings.JWT_AUDIENCE,
+        issuer=settings.JWT_ISSUER,
+        jwks_ttl_seconds=settings.JWKS_CACHE_TTL_SECONDS,
+    )
@@ -1,19 +1,147 @@
+import asyncio
+import importlib
+import logging
+import math
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.routers import notes
+from app.api import deps
+from app.api.deps import token_cache
 from app.core.config import settings
+from app.core.deadline import DeadlineMiddleware
+from app.core.logging_config import configure_logging
+from app.core.metrics import MetricsMiddleware, render_prometheus
+from app.services.ai_services import get_ai_service
+from app.services.indexing import get_indexing_pipeline
+from app.services.db_executor import get_db_executor
+from app.services.rate_limiter import get_rate_limiter
+from app.services.resilience import ServiceUnavailableError
+from app.services.search_cache import get_search_cache
+from app.services.vector_db import get_vector_db_service
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address, default_limits=[settings.RATE_LIMIT])
+logger = logging.getLogger(__name__)
+
+async def _start_vector_db():
+    if settings.VECTOR_BACKEND != "memory":
+        # Importing qdrant-client takes most of a second; do it off the event loop
+        await asyncio.to_thread(importlib.import_module, "qdrant_client")
+    await get_vector_db_service().setup_collection()
+
+async def _start_supabase():
+    await asyncio.to_thread(deps.get_supabase_client)
+
+async def _start_auth():
+    if settings.AUTH_MODE != "local":
+        return
+    verifier = deps.jwt_verifier
+    if not await verifier.prefetch_keys() and not verifier.jwt_secret:
+        raise RuntimeError("no JWKS signing keys and no SUPABASE_JWT_SECRET for local verification")
+
+async def _start_indexing():
+    indexer = get_indexing_pipeline()
+    if indexer is not None:
+        await indexer.start()
+
+# Each component gets this many tries, waiting 1s, 2s, 4s... in between
+STARTUP_ATTEMPTS = 5
+STARTUP_RETRY_BACKOFF_SECONDS = 1.0
+
+STARTUP_COMPONENTS = {
+    "embedding": lambda: get_ai_service().start(),
+    "vector_db": _start_vector_db,
+    "supabase": _start_supabase,
+    "auth": _start_auth,
+}
+
+async def warm_up(readiness: dict):
+    """Creates and warms every client concurrently, recording each one's state in `readiness`."""
+    async def start(name, starter):
+        # Backing services may still be coming up alongside us, so retry with backoff
+        for attempt in range(STARTUP_ATTEMPTS):
+            try:
+                await starter()
+                readiness[name] = "ok"
+                return
+            except Exception as e:
+                readiness[name] = f"error: {e}"
+                logger.error("Start-up warmup failed", extra={"component": name, "attempt": attempt + 1, "error": str(e)})
+                if attempt + 1 < STARTUP_ATTEMPTS:
+                    await asyncio.sleep(STARTUP_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+    await asyncio.gather(*(start(name, starter) for name, starter in STARTUP_COMPONENTS.items()))
+    # The indexing workers need the vector DB service, so they start once it exists
+    await start("indexing", _start_indexing)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm clients in the background so the process answers liveness probes straight away;
+    # /health/ready reports 503 until every component is up
+    app.state.readiness = {name: "pending" for name in (*STARTUP_COMPONENTS, "indexing")}
+    warmup = asyncio.create_task(warm_up(app.state.readiness))
+    if settings.STARTUP_WAIT_FOR_WARMUP:
+        await warmup
+    yield
+    if not warmup.done():
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+    indexer = get_indexing_pipeline()
+    if indexer is not None:
+        await indexer.stop()
+    await get_ai_service().aclose()
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        await limiter.aclose()
+    get_rate_limiter.cache_clear()
+    search_cache = get_search_cache()
+    if search_cache is not None:
+        await search_cache.aclose()
+    get_search_cache.cache_clear()
+    get_db_executor().shutdown()
+    get_db_executor.cache_clear()
+
+def add_compression(app: FastAPI) -> None:
+    """Compresses response bodies above RESPONSE_COMPRESSION_MIN_SIZE with gzip or brotli."""
+    mode = settings.RESPONSE_COMPRESSION
+    if mode == "none":
+        return
+    if mode == "brotli":
+        try:
+            from brotli_asgi import BrotliMiddleware
+        except ImportError:
+            logger.warning("brotli-asgi is not installed, falling back to gzip compression.")
+        else:
+            # BrotliMiddleware still serves gzip to clients that don't accept br
+            app.add_middleware(BrotliMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+            return
+    app.add_middleware(GZipMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+
+def runtime_stats() -> dict:
+    ai = get_ai_service()
+    indexer = get_indexing_pipeline()
+    limiter = get_rate_limiter()
+    search_cache = get_search_cache()
+    return {
+        "embedding_http_pool": ai.pool_stats(),
+        "embedding_batcher": ai.batcher.stats() if ai.batcher else None,
+        "embedding_cache": ai.cache.stats() if ai.cache else None,
+        "embedding_resilience": ai.resilience.stats(),
+        "indexing": indexer.stats() if indexer else None,
+        "auth_token_cache": token_cache.stats(),
+        "db_executor": get_db_executor().stats(),
+        "rate_limiter": limiter.stats() if limiter else None,
+        "search_cache": search_cache.stats() if search_cache else None,
+    }
 
 def create_app() -> FastAPI:
+    configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
     app = FastAPI(
         title="Notes Management API",
         description="A scalable and secure API for managing and searching user notes.",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
 
     # Add middleware
@@ -23,19 +151,54 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
-    # Add rate limiting state and handler
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    add_compression(app)
+    if settings.REQUEST_DEADLINE_SECONDS > 0:
+        app.add_middleware(DeadlineMiddleware, seconds=settings.REQUEST_DEADLINE_SECONDS)
+    if settings.METRICS_ENABLED:
+        # Added last so it is outermost and its timing covers the other middleware
+        app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
 
     # Add routers
     app.include_router(notes.router)
 
+    @app.exception_handler(ServiceUnavailableError)
+    async def service_unavailable_handler(request: Request, exc: ServiceUnavailableError):
+        """A backing service is down, overloaded or too slow for the request's deadline."""
+        headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after else None
+        return JSONResponse({"detail": str(exc)}, status_code=exc.status_code, headers=headers)
+
     @app.get("/", tags=["Health Check"])
     def read_root():
         return {"status": "ok", "message": "Welcome to the Notes API!"}
 
+    @app.get("/health/live", tags=["Health Check"])
+    def read_liveness():
+        """The process is up and serving; doesn't touch any backing service."""
+        return {"status": "ok"}
+
+    @app.get("/health/ready", tags=["Health Check"])
+    def read_readiness(request: Request):
+        """Whether start-up warmup has finished for every component; 503 until it has."""
+        components = getattr(request.app.state, "readiness", {})
+        ready = bool(components) and all(state == "ok" for state in components.values())
+        return JSONResponse(
+            {"status": "ready" if ready else "starting", "components": components},
+            status_code=200 if ready else 503,
+        )
+
+    @app.get("/stats", tags=["Health Check"])
+    def read_stats():
+        """Runtime statistics for sizing connection pools and queues."""
+        return runtime_stats()
+
+    @app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+    def read_metrics():
+        """Per-stage and per-route latency histograms and the /stats counters, in Prometheus text format."""
+        return PlainTextResponse(render_prometheus(runtime_stats()), media_type="text/plain; version=0.0.4")
+
     return app
 
 app = create_app()
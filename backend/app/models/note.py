@@ -1,7 +1,7 @@
 import uuid
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Union
 
 class NoteBase(BaseModel):
     content: str
@@ -19,7 +19,51 @@ class NoteSchema(NoteBase):
     title: str
     created_at: datetime
     updated_at: datetime
+    indexing_status: Optional[str] = None
+    score: Optional[float] = None
 
     class Config:
         from_attributes = True
         populate_by_name = True
+
+# Fields that can be requested with `fields=`; "snippet" is a truncated copy of content
+NOTE_FIELDS = ("id", "title", "content", "snippet", "tags", "created_at", "updated_at")
+SUMMARY_FIELDS = ("id", "title", "snippet", "tags", "created_at", "updated_at")
+
+class NoteSummarySchema(BaseModel):
+    """A lighter projection of a note for list and search views; only requested fields are set."""
+    id: uuid.UUID
+    title: Optional[str] = None
+    content: Optional[str] = None
+    snippet: Optional[str] = None
+    tags: Optional[List[str]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    indexing_status: Optional[str] = None
+    score: Optional[float] = None
+
+class NoteSearchBatch(BaseModel):
+    queries: List[str] = Field(..., min_length=1)
+
+class SearchBatchResult(BaseModel):
+    query: str
+    results: Union[List[NoteSchema], List[NoteSummarySchema]]
+
+class BulkImportItemResult(BaseModel):
+    line: int
+    status: str  # "created" or "error"
+    id: Optional[uuid.UUID] = None
+    indexed: bool = False
+    error: Optional[str] = None
+
+class BulkImportSummary(BaseModel):
+    received: int
+    created: int
+    indexed: int
+    failed: int
+    elapsed_seconds: float
+    notes_per_second: float
+
+class BulkImportResult(BaseModel):
+    results: List[BulkImportItemResult]
+    summary: BulkImportSummary
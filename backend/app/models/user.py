@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class AuthenticatedUser(BaseModel):
+    """The caller identified by a locally verified Supabase JWT."""
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    claims: dict = {}
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "AuthenticatedUser":
+        return cls(id=claims["sub"], email=claims.get("email"), role=claims.get("role"), claims=claims)
@@ -44,46 +44,266 @@
 # def get_ai_service() -> AIService:
 #     return AIService(api_key=settings.GOOGLE_API_KEY)
 
+import asyncio
+import logging
 from functools import lru_cache
 import httpx
 from app.core.config import settings
+from app.core.deadline import no_deadline, time_remaining
+from app.core.metrics import instrument
+from app.services.embedding_batcher import EmbeddingBatcher, estimate_tokens
+from app.services.embedding_cache import EmbeddingCache
+from app.services.resilience import AIMDLimiter, CircuitBreaker, DeadlineExceededError, ResilientCaller
+
+logger = logging.getLogger(__name__)
+
+
+def is_embedding_failure(error: BaseException) -> bool:
+    """Whether an error says the API is unhealthy; other 4xx responses are the request's own fault."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def build_resilience(timeout: float) -> ResilientCaller:
+    return ResilientCaller(
+        "Embedding service",
+        limiter=AIMDLimiter(
+            initial=settings.EMBEDDING_CONCURRENCY_INITIAL,
+            minimum=settings.EMBEDDING_CONCURRENCY_MIN,
+            maximum=settings.EMBEDDING_CONCURRENCY_MAX,
+        ),
+        breaker=CircuitBreaker(settings.EMBEDDING_BREAKER_FAILURES, settings.EMBEDDING_BREAKER_RESET_SECONDS),
+        default_timeout=timeout,
+        hedge=settings.EMBEDDING_HEDGE_ENABLED,
+        hedge_min_delay=settings.EMBEDDING_HEDGE_MIN_DELAY_MS / 1000,
+        is_failure=is_embedding_failure,
+    )
+
 
 class AIService:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str = settings.EMBEDDING_API_URL,
+        max_connections: int = settings.EMBEDDING_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.EMBEDDING_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = settings.EMBEDDING_HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = settings.EMBEDDING_HTTP2,
+        timeout: float = settings.EMBEDDING_TIMEOUT,
+        connect_timeout: float = settings.EMBEDDING_CONNECT_TIMEOUT,
+        batching: bool = settings.EMBEDDING_BATCH_ENABLED,
+        cache: EmbeddingCache | None = None,
+        resilience: ResilientCaller | None = None,
+    ):
         self.api_key = api_key
-        self.api_url = "https://api.jina.ai/v1/embeddings"
+        self.api_url = api_url
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2
+        # Swapped for an in-process fake (e.g. httpx.MockTransport) by the benchmarks
+        self.transport: httpx.AsyncBaseTransport | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._in_flight = 0
+        self.resilience = resilience or build_resilience(timeout)
+        self.batcher = EmbeddingBatcher(
+            self._request_batch,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_batch_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS,
+        ) if batching else None
+        self.cache = cache
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared, long-lived HTTP client. Created on first use if the lifespan hasn't started it."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("EMBEDDING_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1.")
+                http2 = False
+        return httpx.AsyncClient(
+            headers=self.headers,
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=http2,
+            transport=self.transport,
+        )
+
+    async def start(self):
+        """Opens the shared HTTP client. Called from the app lifespan."""
+        _ = self.client
+
+    async def aclose(self):
+        """Closes the shared HTTP client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def pool_stats(self) -> dict:
+        """Returns connection-pool statistics for sizing the pool under load."""
+        stats = {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "in_flight": self._in_flight,
+            "connections": 0,
+            "active": 0,
+            "idle": 0,
+            "waiting": 0,
+        }
+        if self._client is None:
+            return stats
 
-    async def generate_embedding(self, text: str) -> list[float]:
+        # httpx doesn't expose pool state publicly, so read it from the httpcore pool.
+        pool = getattr(self._client._transport, "_pool", None)
+        if pool is None:
+            return stats
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        stats["connections"] = len(connections)
+        stats["idle"] = idle
+        stats["active"] = len(connections) - idle
+        stats["waiting"] = sum(1 for req in getattr(pool, "_requests", []) if req.is_queued())
+        return stats
+
+    @instrument("embedding")
+    async def generate_embedding(self, text: str, timeout: float | None = None) -> list[float]:
         """Generates embedding for a given text using Jina AI's API."""
         if not text.strip():
             return [0.0] * settings.EMBEDDING_DIMENSION
 
-        async with httpx.AsyncClient(timeout=20.0) as client:
+        if self.cache is not None:
+            cached = await self.cache.get(text)
+            if cached is not None:
+                return cached
+
+        # Concurrent callers share one multi-input request when batching is on
+        if self.batcher is not None and timeout is None:
+            vector = await self._wait_for_batch(text)
+        else:
+            vector = (await self._request_embeddings([text], timeout=timeout))[0]
+
+        if self.cache is not None:
+            await self.cache.set(text, vector)
+        return vector
+
+    @instrument("embedding")
+    async def generate_embeddings(self, texts: list[str], timeout: float | None = None) -> list[list[float]]:
+        """Generates embeddings for several texts in as few API calls as the batch limits allow.
+
+        Texts not in the cache are grouped by EMBEDDING_BATCH_MAX_SIZE and
+        EMBEDDING_BATCH_MAX_TOKENS, and the groups are requested concurrently.
+        """
+        vectors = [[0.0] * settings.EMBEDDING_DIMENSION for _ in texts]
+        indexed = []
+        for i, text in enumerate(texts):
+            if not text.strip():
+                continue
+            cached = await self.cache.get(text) if self.cache is not None else None
+            if cached is not None:
+                vectors[i] = cached
+            else:
+                indexed.append((i, text))
+
+        if indexed:
+            groups = self._request_groups(indexed)
+            responses = await asyncio.gather(*(
+                self._request_embeddings([text for _, text in group], timeout=timeout) for group in groups
+            ))
+            embedded = [vector for response in responses for vector in response]
+            for (i, text), vector in zip(indexed, embedded):
+                vectors[i] = vector
+                if self.cache is not None:
+                    await self.cache.set(text, vector)
+        return vectors
+
+    @staticmethod
+    def _request_groups(items: list[tuple[int, str]]) -> list[list[tuple[int, str]]]:
+        """Splits (index, text) items into consecutive groups within the per-request limits."""
+        groups, tokens = [[]], 0
+        for item in items:
+            cost = estimate_tokens(item[1])
+            if groups[-1] and (len(groups[-1]) >= settings.EMBEDDING_BATCH_MAX_SIZE or tokens + cost > settings.EMBEDDING_BATCH_MAX_TOKENS):
+                groups.append([])
+                tokens = 0
+            groups[-1].append(item)
+            tokens += cost
+        return groups
+
+    async def _wait_for_batch(self, text: str) -> list[float]:
+        """Waits for the text's batch, but no longer than the current request's deadline."""
+        remaining = time_remaining()
+        if remaining is None:
+            return await self.batcher.submit(text)
+        try:
+            return await asyncio.wait_for(self.batcher.submit(text), max(remaining, 0.0))
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("Embedding service did not answer before the request deadline.") from None
+
+    async def _request_batch(self, texts: list[str]) -> list[list[float]]:
+        # A batch serves several requests, so it runs on the default timeout rather than whichever
+        # request happened to open it; each caller stops waiting at its own deadline
+        with no_deadline():
+            return await self._request_embeddings(texts)
+
+    async def _request_embeddings(self, texts: list[str], timeout: float | None = None) -> list[list[float]]:
+        """Sends one multi-input embedding request through the resilience layer (deadline, limit, hedging, breaker)."""
+        return await self.resilience.call(lambda budget: self._post_embeddings(texts, budget), timeout=timeout)
+
+    async def _post_embeddings(self, texts: list[str], timeout: float | None = None) -> list[list[float]]:
+        """Sends one multi-input embedding request and returns vectors in input order."""
+        try:
+            payload = {
+                "input": texts, # Jina API expects a list of strings
+                "model": settings.EMBEDDING_MODEL
+            }
+            if settings.EMBEDDING_REQUEST_DIMENSIONS:
+                payload["dimensions"] = settings.EMBEDDING_DIMENSION
+            self._in_flight += 1
             try:
-                payload = {
-                    "input": [text], # Jina API expects a list of strings
-                    "model": settings.JINA_EMBEDDING_MODEL
-                }
-                response = await client.post(self.api_url, headers=self.headers, json=payload)
-                response.raise_for_status()
-
-                # Extract the embedding from the response structure
-                data = response.json()
-                return data["data"][0]["embedding"]
-
-            except httpx.HTTPStatusError as e:
-                print(f"HTTP error calling Jina AI API: {e.response.text}")
-                raise
-            except (KeyError, IndexError) as e:
-                print(f"Error parsing Jina AI API response: {e}")
-                raise
-            except Exception as e:
-                print(f"An error occurred while generating embedding: {e}")
-                raise
+                response = await self.client.post(
+                    self.api_url,
+                    json=payload,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                )
+            finally:
+                self._in_flight -= 1
+            response.raise_for_status()
+
+            # Extract the embeddings from the response structure
+            data = response.json()["data"]
+            if len(data) != len(texts):
+                raise IndexError(f"expected {len(texts)} embeddings, got {len(data)}")
+            data = sorted(data, key=lambda item: item.get("index", 0))
+            return [item["embedding"] for item in data]
+
+        except httpx.HTTPStatusError as e:
+            logger.error("HTTP error calling Jina AI API", extra={"status": e.response.status_code, "body": e.response.text})
+            raise
+        except (KeyError, IndexError) as e:
+            logger.error("Error parsing Jina AI API response", extra={"error": str(e)})
+            raise
+        except Exception as e:
+            logger.error("An error occurred while generating embedding", extra={"error": str(e)})
+            raise
 
     async def generate_title_from_content(self, content: str) -> str:
         """Generates a simple title from the content, efficiently."""
@@ -100,4 +320,12 @@ class AIService:
 def get_ai_service() -> AIService:
     if not settings.JINA_API_KEY:
         raise ValueError("Jina AI API Key is not configured.")
-    return AIService(api_key=settings.JINA_API_KEY)
+    cache = EmbeddingCache(
+        model=settings.EMBEDDING_MODEL,
+        dimension=settings.EMBEDDING_DIMENSION,
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        disk_path=settings.EMBEDDING_CACHE_DISK_PATH,
+        disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+    ) if settings.EMBEDDING_CACHE_ENABLED else None
+    return AIService(api_key=settings.JINA_API_KEY, cache=cache)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import AsyncIterator
+from pydantic import ValidationError
+from app.core.config import settings
+from app.models.note import NoteCreate
+from app.services.chunking import NoteChunks, embed_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class NDJSONError(ValueError):
+    pass
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: int = settings.BULK_IMPORT_MAX_LINE_BYTES) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """Incrementally parses an NDJSON byte stream, yielding (line_number, record_or_error).
+
+    Only the current partial line is buffered, so arbitrarily large bodies can be streamed.
+    """
+    buffer = b""
+    line_no = 0
+
+    def parse(raw: bytes) -> dict | Exception:
+        try:
+            record = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return NDJSONError(f"Invalid JSON: {e}")
+        if not isinstance(record, dict):
+            return NDJSONError("Each line must be a JSON object")
+        return record
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if raw.strip():
+                yield line_no, parse(raw)
+        if len(buffer) > max_line_bytes:
+            raise NDJSONError(f"Line {line_no + 1} exceeds {max_line_bytes} bytes")
+
+    if buffer.strip():
+        yield line_no + 1, parse(buffer)
+
+
+class BulkImporter:
+    """Imports notes in batches: one Supabase insert, one multi-input embedding request
+    and one multi-point Qdrant upsert per batch, with a bounded number of batches in flight."""
+
+    def __init__(
+        self,
+        note_service,
+        batch_size: int = settings.BULK_IMPORT_BATCH_SIZE,
+        concurrency: int = settings.BULK_IMPORT_CONCURRENCY,
+        max_items: int = settings.BULK_IMPORT_MAX_ITEMS,
+    ):
+        self.service = note_service
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_items = max_items
+
+    async def run(self, records: AsyncIterator[tuple[int, dict | Exception]], user_id: str) -> dict:
+        started = time.perf_counter()
+        results: list[dict] = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks: list[asyncio.Task] = []
+        batch: list[tuple[int, NoteCreate]] = []
+        seen = 0
+
+        async def dispatch(items: list[tuple[int, NoteCreate]]):
+            # Waiting for a slot here also pauses reading the request body
+            await semaphore.acquire()
+            task = asyncio.create_task(self._import_batch(items, user_id, results))
+            task.add_done_callback(lambda _: semaphore.release())
+            tasks.append(task)
+
+        try:
+            async for line_no, record in records:
+                seen += 1
+                if seen > self.max_items:
+                    results.append(_error(line_no, f"Import is limited to {self.max_items} notes per request"))
+                    break
+                if isinstance(record, Exception):
+                    results.append(_error(line_no, str(record)))
+                    continue
+                try:
+                    batch.append((line_no, NoteCreate.model_validate(record)))
+                except ValidationError as e:
+                    results.append(_error(line_no, _validation_message(e)))
+                    continue
+                if len(batch) >= self.batch_size:
+                    await dispatch(batch)
+                    batch = []
+        except NDJSONError as e:
+            results.append(_error(seen + 1, str(e)))
+
+        if batch:
+            await dispatch(batch)
+        await asyncio.gather(*tasks)
+
+        elapsed = time.perf_counter() - started
+        results.sort(key=lambda item: item["line"])
+        created = sum(1 for item in results if item["status"] == "created")
+        return {
+            "results": results,
+            "summary": {
+                "received": len(results),
+                "created": created,
+                "indexed": sum(1 for item in results if item["indexed"]),
+                "failed": len(results) - created,
+                "elapsed_seconds": round(elapsed, 3),
+                "notes_per_second": round(created / elapsed, 1) if elapsed > 0 else 0.0,
+            },
+        }
+
+    async def _import_batch(self, items: list[tuple[int, NoteCreate]], user_id: str, results: list[dict]):
+        service = self.service
+
+        # 1. Generate titles and insert all rows in one statement
+        rows = []
+        for _, note_in in items:
+            rows.append({
+                "user_id": user_id,
+                "title": await service.ai.generate_title_from_content(note_in.content),
+                "content": note_in.content,
+                "tags": note_in.tags,
+            })
+        try:
+            response = await service.executor.execute(service.db.table("notes").insert(rows))
+        except Exception as e:
+            results.extend(_error(line_no, f"Insert failed: {e}") for line_no, _ in items)
+            return
+        inserted = response.data
+
+        # 2. Embed all chunks in one batched call and upsert all points in one request
+        indexing_error = None
+        try:
+            chunked = [NoteChunks.split(uuid.UUID(note["id"]), note["content"]) for note in inserted]
+            vectors = await embed_chunks(service.ai, [(chunks, list(range(len(chunks)))) for chunks in chunked])
+            await service.vector_db.upsert_notes([
+                point
+                for note, chunks, note_vectors in zip(inserted, chunked, vectors)
+                for point in chunks.points(user_id, note_vectors, service.search_payload(note))
+            ])
+        except Exception as e:
+            logger.error("Bulk import indexing failed", extra={"notes": len(inserted), "error": str(e)})
+            indexing_error = f"Indexing failed, reindex the note to make it searchable: {e}"
+
+        await service.invalidate_search_cache(user_id)
+        for (line_no, _), note in zip(items, inserted):
+            results.append({
+                "line": line_no,
+                "status": "created",
+                "id": note["id"],
+                "indexed": indexing_error is None,
+                "error": indexing_error,
+            })
+
+
+def _error(line_no: int, message: str) -> dict:
+    return {"line": line_no, "status": "error", "id": None, "indexed": False, "error": message}
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
@@ -0,0 +1,98 @@
+import re
+import uuid
+from dataclasses import dataclass
+from app.core.config import settings
+from app.services.embedding_cache import content_hash
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_long(text: str, max_chars: int) -> list[str]:
+    """Splits an over-long paragraph at sentence ends, then at whitespace, then anywhere."""
+    pieces = []
+    for sentence in SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars + 1)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def split_text(text: str, max_chars: int) -> list[str]:
+    """Splits text into chunks of at most `max_chars`, packing whole paragraphs where possible.
+
+    Boundaries only depend on the text before them, so an edit leaves the chunks ahead
+    of it untouched and, unless it moves a paragraph across a boundary, those after it
+    too. `max_chars` <= 0 disables chunking.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+
+    chunks: list[str] = []
+    current = ""
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        pieces = [paragraph] if len(paragraph) <= max_chars else _split_long(paragraph, max_chars)
+        for i, piece in enumerate(pieces):
+            separator = "\n\n" if i == 0 else " "
+            if current and len(current) + len(separator) + len(piece) <= max_chars:
+                current += separator + piece
+            else:
+                if current:
+                    chunks.append(current)
+                current = piece
+    if current:
+        chunks.append(current)
+    return chunks or [text]
+
+
+def chunk_point_id(note_id: uuid.UUID, index: int) -> uuid.UUID:
+    """Chunk 0 keeps the note's own id, so single-chunk notes are stored exactly as before."""
+    return note_id if index == 0 else uuid.uuid5(note_id, f"chunk-{index}")
+
+
+@dataclass
+class NoteChunks:
+    """A note's content split into chunks, each embedded and stored as its own point."""
+    note_id: uuid.UUID
+    texts: list[str]
+    hashes: list[str]
+
+    @classmethod
+    def split(cls, note_id: uuid.UUID, content: str, max_chars: int | None = None) -> "NoteChunks":
+        texts = split_text(content, settings.CHUNK_MAX_CHARS if max_chars is None else max_chars)
+        return cls(note_id=note_id, texts=texts, hashes=[content_hash(text) for text in texts])
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def changed(self, indexed_hashes: list[str | None] | None = None) -> list[int]:
+        """Indexes of the chunks whose stored vector is missing or was embedded from other text."""
+        if indexed_hashes is None:
+            return list(range(len(self.texts)))
+        return [
+            i for i, chunk_hash in enumerate(self.hashes)
+            if i >= len(indexed_hashes) or indexed_hashes[i] != chunk_hash
+        ]
+
+    def points(self, user_id: str, vectors: dict[int, list[float]], payload: dict | None = None) -> list[tuple]:
+        """(point_id, user_id, vector, payload) items for VectorDBService.upsert_notes."""
+        return [
+            (
+                chunk_point_id(self.note_id, i),
+                user_id,
+                vector,
+                {**(payload or {}), "note_id": str(self.note_id), "chunk": i, "chunk_hash": self.hashes[i]},
+            )
+            for i, vector in sorted(vectors.items())
+        ]
+
+
+async def embed_chunks(ai, notes: list[tuple[NoteChunks, list[int]]]) -> list[dict[int, list[float]]]:
+    """Embeds the given chunk indexes of several notes with one batched call; returns each note's vectors by index."""
+    texts = [chunks.texts[i] for chunks, indexes in notes for i in indexes]
+    vectors = iter(await ai.generate_embeddings(texts) if texts else [])
+    return [{i: next(vectors) for i in indexes} for _, indexes in notes]
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from app.core.config import settings
+from app.core.metrics import instrument
+
+
+class DBExecutor:
+    """Runs blocking supabase-py `.execute()` calls on a bounded thread pool.
+
+    Keeps Supabase round trips off the event loop so one slow query doesn't stall
+    every other request in the worker, and records queueing and run-time metrics.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.active = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    @instrument("db")
+    async def execute(self, query):
+        """Executes a PostgREST query builder on the pool and returns its response."""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+
+        def run():
+            started_at = time.perf_counter()
+            with self._lock:
+                self.active += 1
+                waited = started_at - submitted_at
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            failed = False
+            try:
+                return query.execute()
+            except Exception:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.errors += failed
+                    self._run_total += time.perf_counter() - started_at
+
+        return await asyncio.get_running_loop().run_in_executor(self._pool, run)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": self.submitted - self.completed - self.active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "errors": self.errors,
+                "mean_wait_ms": self._wait_total / self.completed * 1000 if self.completed else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+                "mean_run_ms": self._run_total / self.completed * 1000 if self.completed else 0.0,
+            }
+
+
+@lru_cache()
+def get_db_executor() -> DBExecutor:
+    return DBExecutor(max_workers=settings.DB_THREADPOOL_SIZE)
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+# Upper bounds of the batch-size histogram buckets reported in stats()
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for the batch budget."""
+    return max(1, len(text) // 4)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text embedding requests into multi-input API calls.
+
+    Requests are collected until the wait window expires, the batch is full or the
+    token budget is reached, then sent as one request and fanned back out to callers.
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[list[str]], Awaitable[list[list[float]]]],
+        max_wait_ms: float,
+        max_batch_size: int,
+        max_batch_tokens: int,
+    ):
+        self._embed_many = embed_many
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+
+        self._pending: list[tuple[str, asyncio.Future, float]] = []
+        self._pending_tokens = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def submit(self, text: str) -> list[float]:
+        """Queues a text for the next batch and waits for its embedding."""
+        loop = asyncio.get_running_loop()
+        tokens = estimate_tokens(text)
+
+        # Don't let this text push the pending batch over the token budget
+        if self._pending and self._pending_tokens + tokens > self.max_batch_tokens:
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        self._pending_tokens += tokens
+
+        if len(self._pending) >= self.max_batch_size or self._pending_tokens >= self.max_batch_tokens:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        self._pending_tokens = 0
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, asyncio.Future, float]]):
+        self._record(batch)
+        try:
+            vectors = await self._embed_many([text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def _record(self, batch: list[tuple[str, asyncio.Future, float]]):
+        now = time.perf_counter()
+        size = len(batch)
+        self._batches += 1
+        self._items += size
+        self._max_batch = max(self._max_batch, size)
+
+        bucket = next((i for i, bound in enumerate(BATCH_SIZE_BUCKETS) if size <= bound), len(BATCH_SIZE_BUCKETS))
+        self._size_histogram[bucket] += 1
+
+        for _, _, enqueued_at in batch:
+            waited = now - enqueued_at
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> dict:
+        """Per-batch size and wait-time metrics for tuning the batching window."""
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "pending": len(self._pending),
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "max_batch_size": self._max_batch,
+            "batch_size_histogram": dict(zip(labels, self._size_histogram)),
+            "mean_wait_ms": self._wait_total / self._items * 1000 if self._items else 0.0,
+            "max_wait_ms": self._wait_max * 1000,
+        }
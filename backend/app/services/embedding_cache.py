@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a note's text, used to detect unchanged content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache keyed by model, dimension and text hash.
+
+    A bounded in-process LRU tier with a TTL sits in front of an optional SQLite
+    tier on disk, which survives restarts. Vectors are stored as float32.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dimension: int,
+        max_entries: int,
+        ttl_seconds: float,
+        disk_path: str = "",
+        disk_max_entries: int = 0,
+    ):
+        self.model = model
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._memory: OrderedDict[str, tuple[float, array]] = OrderedDict()
+
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self._disk: sqlite3.Connection | None = None
+        self._disk_lock = threading.Lock()
+        self._disk_writes = 0
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._disk.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text: str) -> str:
+        return content_hash(f"{self.model}:{self.dimension}:{text}")
+
+    async def get(self, text: str) -> list[float] | None:
+        """Returns the cached vector for a text, checking memory then disk."""
+        key = self.key(text)
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, vector = entry
+            if expires_at > time.monotonic():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector.tolist()
+            del self._memory[key]
+
+        if self._disk is not None:
+            vector = await asyncio.to_thread(self._disk_get, key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, vector: list[float]):
+        """Stores a vector in both tiers."""
+        key = self.key(text)
+        packed = array("f", vector)
+        self._remember(key, packed)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk_set, key, packed)
+
+    def _remember(self, key: str, vector: array):
+        self._memory[key] = (time.monotonic() + self.ttl, vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str) -> array | None:
+        with self._disk_lock:
+            row = self._disk.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector
+
+    def _disk_set(self, key: str, vector: array):
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, vector.tobytes(), time.time()),
+            )
+            self._disk_writes += 1
+            # Trim the oldest rows every so often rather than on every write
+            if self.disk_max_entries and self._disk_writes % 100 == 0:
+                self._disk.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings "
+                    "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_max_entries,),
+                )
+            self._disk.commit()
+
+    def close(self):
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.close()
+            self._disk = None
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_enabled": self._disk is not None,
+        }
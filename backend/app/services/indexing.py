@@ -0,0 +1,324 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from app.core.config import settings
+from app.services.ai_services import AIService, get_ai_service
+from app.services.chunking import NoteChunks, embed_chunks
+from app.services.search_cache import SearchCache, get_search_cache
+from app.services.vector_db import VectorDBService, get_vector_db_service
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_ERROR = "shutdown before indexing completed"
+
+# How many finished (indexed/failed) statuses to remember for GET responses
+MAX_TRACKED_STATUSES = 10000
+
+# How many dead letters to keep in memory; the dead-letter file has all of them
+MAX_DEAD_LETTERS = 1000
+
+
+class IndexingStatus(str, Enum):
+    PENDING = "pending"
+    INDEXED = "indexed"
+    FAILED = "failed"
+
+
+@dataclass
+class IndexJob:
+    note_id: uuid.UUID
+    user_id: str
+    content: str
+    version: int
+    enqueued_at: float
+    payload: dict | None = None
+    attempts: int = 0
+
+
+class IndexingPipeline:
+    """Write-behind indexing: embeds and upserts note vectors off the request path.
+
+    Jobs go through a bounded queue to a pool of workers that embed and upsert in
+    batches, retrying with exponential backoff. Jobs that exhaust their retries are
+    marked failed, logged and recorded as dead letters; they are never dropped.
+    """
+
+    def __init__(
+        self,
+        ai: AIService,
+        vector_db: VectorDBService,
+        workers: int = settings.INDEXING_WORKERS,
+        queue_size: int = settings.INDEXING_QUEUE_SIZE,
+        batch_size: int = settings.INDEXING_BATCH_SIZE,
+        max_retries: int = settings.INDEXING_MAX_RETRIES,
+        retry_backoff: float = settings.INDEXING_RETRY_BACKOFF_SECONDS,
+        dead_letter_path: str = settings.INDEXING_DEAD_LETTER_PATH,
+        search_cache: SearchCache | None = None,
+    ):
+        self.ai = ai
+        self.vector_db = vector_db
+        self.search_cache = search_cache
+        self.num_workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.dead_letter_path = dead_letter_path
+
+        self._queue: asyncio.Queue[IndexJob] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._retry_tasks: set[asyncio.Task] = set()
+
+        # Latest enqueued version of each note with a job in flight, so stale or deleted jobs
+        # are skipped. Versions come from one counter, so a finished note's entry can be dropped
+        # without a later job reusing the version of one still waiting to retry.
+        self._versions: dict[uuid.UUID, int] = {}
+        self._version_counter = itertools.count(1)
+        self._statuses: OrderedDict[uuid.UUID, IndexingStatus] = OrderedDict()
+        self._pending: dict[uuid.UUID, float] = {}
+        self.dead_letters: deque[dict] = deque(maxlen=MAX_DEAD_LETTERS)
+
+        # Metrics
+        self.indexed = 0
+        self.failed = 0
+        self.retries = 0
+        self.sync_fallbacks = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Starts the worker pool. Called from the app lifespan or lazily on first enqueue."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Drains the queue, then stops the workers. Undrained jobs become dead letters."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        for task in [*self._workers, *self._retry_tasks]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retry_tasks, return_exceptions=True)
+        self._workers = []
+        self._retry_tasks.clear()
+
+        while not self._queue.empty():
+            self._dead_letter(self._queue.get_nowait(), SHUTDOWN_ERROR)
+        self._pending.clear()
+        self._versions.clear()
+
+    async def enqueue(self, note_id: uuid.UUID, user_id: str, content: str, payload: dict | None = None) -> IndexingStatus:
+        """Queues a note for indexing and returns its status.
+
+        When the queue is full the note is indexed inline instead, so back-pressure
+        slows writers down rather than losing work.
+        """
+        await self.start()
+        version = next(self._version_counter)
+        self._versions[note_id] = version
+        job = IndexJob(
+            note_id=note_id, user_id=user_id, content=content, version=version,
+            enqueued_at=time.monotonic(), payload=payload,
+        )
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.sync_fallbacks += 1
+            try:
+                await self._index([job])
+            except Exception as e:
+                if self._is_current(job):
+                    self._dead_letter(job, repr(e))
+                    self._finish(job)
+                return IndexingStatus.FAILED
+            if self._is_current(job):
+                self._set_status(note_id, IndexingStatus.INDEXED)
+                self._finish(job)
+            return IndexingStatus.INDEXED
+
+        self._pending[note_id] = job.enqueued_at
+        self._set_status(note_id, IndexingStatus.PENDING)
+        return IndexingStatus.PENDING
+
+    def discard(self, note_id: uuid.UUID):
+        """Forgets a deleted note so queued jobs for it are skipped."""
+        self._versions.pop(note_id, None)
+        self._pending.pop(note_id, None)
+        self._statuses.pop(note_id, None)
+
+    def status(self, note_id: uuid.UUID) -> IndexingStatus | None:
+        return self._statuses.get(note_id)
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._process(batch)
+            except asyncio.CancelledError:
+                for job in batch:
+                    if self._is_current(job) and self.status(job.note_id) == IndexingStatus.PENDING:
+                        self._dead_letter(job, SHUTDOWN_ERROR)
+                raise
+            except Exception as e:
+                # Never let one batch kill the worker; its unfinished jobs go through the usual retries
+                logger.exception("Indexing worker error", extra={"batch_size": len(batch)})
+                for job in batch:
+                    if self._is_current(job) and self.status(job.note_id) == IndexingStatus.PENDING:
+                        self._retry_or_fail(job, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process(self, batch: list[IndexJob]):
+        batch = [job for job in batch if self._is_current(job)]
+        if not batch:
+            return
+
+        try:
+            await self._index(batch)
+        except Exception as e:
+            for job in batch:
+                self._retry_or_fail(job, e)
+            return
+
+        now = time.monotonic()
+        for job in batch:
+            if not self._is_current(job):
+                # Deleted while its upsert was in flight; don't leave an orphaned vector behind
+                if job.note_id not in self._statuses:
+                    try:
+                        await self.vector_db.delete_note(note_id=job.note_id)
+                    except Exception as e:
+                        logger.error("Could not delete vectors of a deleted note", extra={"note_id": str(job.note_id), "error": str(e)})
+                continue
+            lag = now - job.enqueued_at
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.indexed += 1
+            self._pending.pop(job.note_id, None)
+            self._set_status(job.note_id, IndexingStatus.INDEXED)
+            self._finish(job)
+
+    async def _index(self, jobs: list[IndexJob]):
+        """Embeds every chunk of the jobs' notes in one batched call and replaces their stored chunks."""
+        chunked = [NoteChunks.split(job.note_id, job.content) for job in jobs]
+        vectors = await embed_chunks(self.ai, [(chunks, list(range(len(chunks)))) for chunks in chunked])
+        await asyncio.gather(
+            self.vector_db.upsert_notes([
+                point
+                for job, chunks, note_vectors in zip(jobs, chunked, vectors)
+                for point in chunks.points(job.user_id, note_vectors, job.payload)
+            ]),
+            # A note that got shorter leaves chunks past its new end behind
+            self.vector_db.delete_stale_chunks({chunks.note_id: len(chunks) for chunks in chunked}),
+        )
+        # The new vectors change these users' search results
+        if self.search_cache is not None:
+            for user_id in {job.user_id for job in jobs}:
+                await self.search_cache.invalidate(user_id)
+
+    def _is_current(self, job: IndexJob) -> bool:
+        return self._versions.get(job.note_id) == job.version
+
+    def _finish(self, job: IndexJob):
+        """Drops the note's version once its latest job is done; any older job left is stale either way."""
+        if self._is_current(job):
+            del self._versions[job.note_id]
+
+    def _retry_or_fail(self, job: IndexJob, error: Exception):
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            self._pending.pop(job.note_id, None)
+            self._dead_letter(job, repr(error))
+            self._finish(job)
+            return
+
+        self.retries += 1
+        task = asyncio.create_task(self._requeue_after(job, self.retry_backoff * 2 ** (job.attempts - 1)))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _requeue_after(self, job: IndexJob, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if self._is_current(job):
+                self._dead_letter(job, SHUTDOWN_ERROR)
+            raise
+        if self._is_current(job):
+            await self._queue.put(job)
+
+    def _dead_letter(self, job: IndexJob, error: str):
+        self.failed += 1
+        self._set_status(job.note_id, IndexingStatus.FAILED)
+        record = {
+            "note_id": str(job.note_id),
+            "user_id": job.user_id,
+            "attempts": job.attempts,
+            "error": error,
+            "failed_at": time.time(),
+        }
+        self.dead_letters.append(record)
+        logger.error("Indexing failed", extra={"note_id": str(job.note_id), "attempts": job.attempts, "error": error})
+        if self.dead_letter_path:
+            try:
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logger.error("Could not write dead letter", extra={"path": self.dead_letter_path, "error": str(e)})
+
+    def _set_status(self, note_id: uuid.UUID, status: IndexingStatus):
+        self._statuses[note_id] = status
+        self._statuses.move_to_end(note_id)
+        while len(self._statuses) > MAX_TRACKED_STATUSES:
+            oldest, oldest_status = next(iter(self._statuses.items()))
+            if oldest_status == IndexingStatus.PENDING:
+                break
+            self._statuses.popitem(last=False)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        oldest = min(self._pending.values(), default=None)
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": self.queue_size,
+            "pending": len(self._pending),
+            "retrying": len(self._retry_tasks),
+            "indexed": self.indexed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "sync_fallbacks": self.sync_fallbacks,
+            "dead_letters": len(self.dead_letters),
+            "oldest_pending_age_seconds": now - oldest if oldest is not None else 0.0,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag,
+        }
+
+
+@lru_cache()
+def get_indexing_pipeline() -> IndexingPipeline | None:
+    """Returns the shared pipeline, or None when notes are indexed synchronously."""
+    if settings.INDEXING_MODE != "async":
+        return None
+    return IndexingPipeline(ai=get_ai_service(), vector_db=get_vector_db_service(), search_cache=get_search_cache())
@@ -0,0 +1,289 @@
+import time
+from collections import OrderedDict
+from typing import Callable
+from app.core.lazy import LazyModule
+
+# Only needed once the local index or in-memory backend is in use
+np = LazyModule("numpy")
+
+
+class TenantIndex:
+    """One user's vectors in a contiguous, L2-normalised float32 matrix.
+
+    Cosine similarity is then a single matrix-vector product. Rows are kept dense:
+    deletes move the last row into the freed slot.
+    """
+
+    def __init__(self, dimension: int, capacity: int = 16):
+        self.dimension = dimension
+        self.matrix = np.zeros((max(capacity, 1), dimension), dtype=np.float32)
+        self.ids: list[str] = []
+        self.payloads: list[dict] = []
+        self._rows: dict[str, int] = {}
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, point_id: str) -> bool:
+        return point_id in self._rows
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def upsert(self, point_id: str, vector: list[float], payload: dict | None = None):
+        normalised = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(normalised)
+        if norm > 0:
+            normalised = normalised / norm
+
+        row = self._rows.get(point_id)
+        if row is None:
+            row = len(self.ids)
+            if row == self.matrix.shape[0]:
+                grown = np.zeros((row * 2, self.dimension), dtype=np.float32)
+                grown[:row] = self.matrix
+                self.matrix = grown
+            self.ids.append(point_id)
+            self.payloads.append({})
+            self._rows[point_id] = row
+        self.matrix[row] = normalised
+        self.payloads[row] = dict(payload or {})
+
+    def set_payload(self, point_id: str, payload: dict):
+        row = self._rows.get(point_id)
+        if row is not None:
+            self.payloads[row].update(payload)
+
+    def note_points(self, note_id: str) -> list[tuple[str, dict]]:
+        """(point_id, payload) of every chunk of a note."""
+        return [
+            (point_id, payload) for point_id, payload in zip(self.ids, self.payloads)
+            if point_id == note_id or payload.get("note_id") == note_id
+        ]
+
+    def delete(self, point_id: str):
+        row = self._rows.pop(point_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.payloads[row] = self.payloads[last]
+            self._rows[self.ids[row]] = row
+        self.ids.pop()
+        self.payloads.pop()
+
+    def recommend(self, positive: list[str], negative: list[str], limit: int) -> list[tuple[str, float, dict]] | None:
+        """Top-k for stored example points, like Qdrant's average_vector recommendation; None if one isn't stored."""
+        rows = [self._rows.get(point_id) for point_id in (*positive, *negative)]
+        if not positive or None in rows:
+            return None
+        query = self.matrix[rows[:len(positive)]].mean(axis=0)
+        if negative:
+            query = query + (query - self.matrix[rows[len(positive):]].mean(axis=0))
+        return self.search(query, limit)
+
+    def search(
+        self,
+        query_vector: list[float],
+        limit: int,
+        where: Callable[[dict], bool] | None = None,
+        score_threshold: float | None = None,
+    ) -> list[tuple[str, float, dict]]:
+        """Top-k by cosine similarity as (point_id, score, payload), best first.
+
+        `where` keeps only points whose payload it accepts and `score_threshold`
+        drops points scoring below it, as Qdrant's filter and score_threshold do.
+        """
+        count = len(self.ids)
+        if count == 0 or limit <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self.matrix[:count] @ query
+        if where is not None or score_threshold is not None:
+            # Walk candidates best first until enough pass; the scoring itself is unchanged
+            hits = []
+            for i in np.argsort(-scores, kind="stable"):
+                if score_threshold is not None and scores[i] < score_threshold:
+                    break
+                if where is None or where(self.payloads[i]):
+                    hits.append((self.ids[i], float(scores[i]), self.payloads[i]))
+                    if len(hits) == limit:
+                        break
+            return hits
+
+        k = min(limit, count)
+        top = np.argpartition(-scores, k - 1)[:k] if k < count else np.arange(count)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[i], float(scores[i]), self.payloads[i]) for i in top]
+
+
+class LocalVectorIndex:
+    """In-process tier of per-tenant indexes, evicted by LRU under a memory budget.
+
+    Tenants with more than `max_tenant_points` vectors are remembered as large and
+    left to Qdrant. Loaded tenants expire after `ttl_seconds`, which bounds how stale
+    a worker's copy can get when another worker writes to the same tenant.
+    """
+
+    def __init__(self, dimension: int, memory_budget_bytes: int, max_tenant_points: int, ttl_seconds: float = 0.0):
+        self.dimension = dimension
+        self.memory_budget = memory_budget_bytes
+        self.max_tenant_points = max_tenant_points
+        self.ttl = ttl_seconds
+        self._tenants: OrderedDict[str, TenantIndex] = OrderedDict()
+        self._large: dict[str, float] = {}  # user_id -> when it was found too large
+        self._owners: dict[str, str] = {}  # point_id -> user_id for loaded tenants
+        # Writes and invalidations seen per user while a load of their tenant is in flight (see begin_load)
+        self._loading: dict[str, int] = {}
+        self._writes: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @property
+    def memory_used(self) -> int:
+        return sum(tenant.nbytes for tenant in self._tenants.values())
+
+    def is_large(self, user_id: str) -> bool:
+        marked_at = self._large.get(user_id)
+        if marked_at is None:
+            return False
+        if self.ttl and time.monotonic() - marked_at > self.ttl:
+            # Re-check now and then, in case the tenant has shrunk
+            del self._large[user_id]
+            return False
+        return True
+
+    def get(self, user_id: str) -> TenantIndex | None:
+        tenant = self._tenants.get(user_id)
+        if tenant is not None and self.ttl and time.monotonic() - tenant.loaded_at > self.ttl:
+            self.drop(user_id)
+            tenant = None
+        if tenant is None:
+            self.misses += 1
+            return None
+        self._tenants.move_to_end(user_id)
+        self.hits += 1
+        return tenant
+
+    def peek(self, user_id: str) -> TenantIndex | None:
+        """Like get(), without touching LRU order or hit/miss counters."""
+        return self._tenants.get(user_id)
+
+    def begin_load(self, user_id: str) -> int:
+        """Call before fetching a tenant's rows; pass the returned token to load(), then call end_load()."""
+        self._loading[user_id] = self._loading.get(user_id, 0) + 1
+        return self._writes.setdefault(user_id, 0)
+
+    def end_load(self, user_id: str):
+        self._loading[user_id] -= 1
+        if not self._loading[user_id]:
+            del self._loading[user_id]
+            del self._writes[user_id]
+
+    def mark_written(self, user_id: str | None):
+        """Records a write to a tenant that isn't loaded here, so a load racing it is thrown away.
+
+        With no `user_id` (a write by note id alone) every load in flight is suspect.
+        """
+        for loading in [user_id] if user_id is not None else list(self._loading):
+            if loading in self._writes:
+                self._writes[loading] += 1
+
+    def load(self, user_id: str, points: list[tuple[str, list[float], dict]], token: int | None = None) -> TenantIndex | None:
+        """Installs a tenant from (point_id, vector, payload) rows; returns None if it's too large.
+
+        Pass the begin_load() `token` taken before fetching the rows: if this user's notes
+        were written or their tenant invalidated since, the rows may predate that write,
+        so nothing is installed and None is returned.
+        """
+        if token is not None and token != self._writes.get(user_id):
+            return None
+        if len(points) > self.max_tenant_points:
+            self._large[user_id] = time.monotonic()
+            return None
+
+        tenant = TenantIndex(self.dimension, capacity=len(points))
+        for point_id, vector, payload in points:
+            tenant.upsert(point_id, vector, payload)
+        self.drop(user_id)
+        self._tenants[user_id] = tenant
+        self._owners.update((point_id, user_id) for point_id in tenant.ids)
+        self.loads += 1
+        self._evict()
+        return tenant
+
+    def drop(self, user_id: str):
+        tenant = self._tenants.pop(user_id, None)
+        if tenant is not None:
+            for point_id in tenant.ids:
+                self._owners.pop(point_id, None)
+
+    def invalidate(self, user_id: str):
+        """Drops a tenant another worker has written to; it is reloaded on next use."""
+        self.drop(user_id)
+        self.mark_written(user_id)
+
+    def upsert(self, user_id: str, point_id: str, vector: list[float], payload: dict | None = None):
+        """Applies a write to a loaded tenant; unloaded tenants pick it up on their next load."""
+        tenant = self._tenants.get(user_id)
+        if tenant is None:
+            self.mark_written(user_id)
+            return
+        tenant.upsert(point_id, vector, payload)
+        self._owners[point_id] = user_id
+        if len(tenant) > self.max_tenant_points:
+            self.drop(user_id)
+            self._large[user_id] = time.monotonic()
+        else:
+            self._evict()
+
+    def set_payload(self, point_id: str, payload: dict):
+        user_id = self._owners.get(point_id)
+        if user_id is not None:
+            self._tenants[user_id].set_payload(point_id, payload)
+
+    def note_points(self, note_id: str) -> list[tuple[str, dict]] | None:
+        """(point_id, payload) of every chunk of a note, or None if its tenant isn't loaded here."""
+        user_id = self._owners.get(note_id)
+        if user_id is None:
+            return None
+        return self._tenants[user_id].note_points(note_id)
+
+    def delete(self, point_id: str, user_id: str | None = None):
+        """Deletes a point; with `user_id`, only if it belongs to that user."""
+        owner = self._owners.get(point_id)
+        if owner is None or (user_id is not None and owner != user_id):
+            return
+        del self._owners[point_id]
+        self._tenants[owner].delete(point_id)
+
+    def _evict(self):
+        while len(self._tenants) > 1 and self.memory_used > self.memory_budget:
+            user_id = next(iter(self._tenants))
+            self.drop(user_id)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "tenants": len(self._tenants),
+            "large_tenants": len(self._large),
+            "points": len(self._owners),
+            "memory_used_bytes": self.memory_used,
+            "memory_budget_bytes": self.memory_budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
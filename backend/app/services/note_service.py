@@ -1,93 +1,555 @@
+import asyncio
+import logging
 import uuid
-from supabase import Client
-from app.models.note import NoteCreate, NoteUpdate
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.note import NoteCreate, NoteUpdate, NoteSummarySchema, NOTE_FIELDS, SUMMARY_FIELDS
 from app.services.ai_services import AIService
-from app.services.vector_db import VectorDBService
+from app.services.bulk_import import BulkImporter
+from app.services.chunking import NoteChunks, embed_chunks
+from app.services.db_executor import DBExecutor, get_db_executor
+from app.services.indexing import IndexingPipeline
+from app.services.search_cache import SearchCache, normalize_query
+from app.services.vector_db import SearchFilters, VectorDBService
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+def resolve_fields(view: str = "full", fields: str | None = None) -> tuple[str, ...] | None:
+    """Turns the `view`/`fields` query parameters into a projection; None means the full note.
+
+    Raises ValueError for unknown views or fields.
+    """
+    if fields:
+        requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in requested if f not in NOTE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(NOTE_FIELDS)}")
+        return tuple(dict.fromkeys(("id", *requested)))
+    if view == "summary":
+        return SUMMARY_FIELDS
+    if view != "full":
+        raise ValueError("view must be 'full' or 'summary'")
+    return None
+
+def select_columns(fields: tuple[str, ...] | None, required: tuple[str, ...] = ("id",)) -> str:
+    """The Supabase column list for a projection, so unused columns never leave the database."""
+    if fields is None:
+        return "*"
+    columns = [f for f in fields if f != "snippet"]
+    if "snippet" in fields:
+        columns.append("content")
+    return ",".join(dict.fromkeys((*required, *columns)))
+
+def project_note(note: dict, fields: tuple[str, ...] | None):
+    """Returns the note as-is, or a NoteSummarySchema with only the requested fields set."""
+    if fields is None:
+        return note
+    data = {f: note[f] for f in fields if f != "snippet" and f in note}
+    if "snippet" in fields:
+        data["snippet"] = note.get("snippet") or (note.get("content") or "")[:settings.NOTE_SNIPPET_LENGTH]
+    for extra in ("score", "indexing_status"):
+        if extra in note:
+            data[extra] = note[extra]
+    return NoteSummarySchema(**data)
 
 class NoteService:
-    def __init__(self, db: Client, ai: AIService, vector_db: VectorDBService):
+    def __init__(
+        self,
+        db: "Client",
+        ai: AIService,
+        vector_db: VectorDBService,
+        indexer: IndexingPipeline | None = None,
+        executor: DBExecutor | None = None,
+        search_cache: SearchCache | None = None,
+    ):
         self.db = db
         self.ai = ai
         self.vector_db = vector_db
+        self.indexer = indexer
+        self.executor = executor or get_db_executor()
+        self.search_cache = search_cache
+
+    async def _execute(self, query):
+        """Runs a blocking supabase-py query on the DB thread pool instead of the event loop."""
+        return await self.executor.execute(query)
+
+    async def invalidate_search_cache(self, user_id: str):
+        """Drops the user's cached search results; call once a write to their notes is visible."""
+        if self.search_cache is not None:
+            await self.search_cache.invalidate(user_id)
+
+    def search_payload(self, note: dict) -> dict:
+        """The note fields stored alongside its vector: tags and created_at for search filters and,
+        with SEARCH_FROM_PAYLOAD, what search needs to skip Supabase."""
+        payload = {"tags": note.get('tags') or []}
+        if note.get('created_at'):
+            payload["created_at"] = note['created_at']
+        if settings.SEARCH_FROM_PAYLOAD:
+            payload.update({
+                "title": note['title'],
+                "created_at": note['created_at'],
+                "updated_at": note['updated_at'],
+                "snippet": note['content'][:settings.NOTE_SNIPPET_LENGTH],
+            })
+        return payload
+
+    async def _index_note(self, note: dict, user_id: str, indexed_hashes: list[str | None] | None = None):
+        """Embeds and stores a note's chunk vectors, inline or via the write-behind pipeline.
+
+        Inline, only chunks whose hash differs from `indexed_hashes` (the stored chunk
+        hashes, None if unknown) are re-embedded.
+        """
+        note_id = uuid.UUID(note['id'])
+        if self.indexer is not None:
+            status = await self.indexer.enqueue(note_id=note_id, user_id=user_id, content=note['content'], payload=self.search_payload(note))
+            note['indexing_status'] = status.value
+            return
+
+        chunks = NoteChunks.split(note_id, note['content'])
+        vectors = await self._embed_chunks(chunks, chunks.changed(indexed_hashes))
+        await self._store_chunks(note, user_id, chunks, vectors, indexed_hashes)
+
+    async def _embed_chunks(self, chunks: NoteChunks, indexes: list[int]) -> dict[int, list[float]]:
+        if len(indexes) == 1:
+            # A single text goes through the request batcher, shared with concurrent requests
+            return {indexes[0]: await self.ai.generate_embedding(chunks.texts[indexes[0]])}
+        return (await embed_chunks(self.ai, [(chunks, indexes)]))[0]
+
+    async def _store_chunks(
+        self,
+        note: dict,
+        user_id: str,
+        chunks: NoteChunks,
+        vectors: dict[int, list[float]],
+        indexed_hashes: list[str | None] | None,
+    ):
+        """Upserts the re-embedded chunks, drops chunks past the note's end and refreshes the rest's payload."""
+        payload = self.search_payload(note)
+        writes = []
+        if vectors:
+            writes.append(self.vector_db.upsert_notes(chunks.points(user_id, vectors, payload)))
+        if indexed_hashes is None or len(indexed_hashes) > len(chunks):
+            writes.append(self.vector_db.delete_stale_chunks({chunks.note_id: len(chunks)}))
+        if len(vectors) < len(chunks):
+            # Chunks that kept their vectors still need the note's new title, tags and dates
+            writes.append(self.vector_db.update_note_payload(chunks.note_id, payload))
+        await asyncio.gather(*writes)
 
     async def create_note(self, note_in: NoteCreate, user_id: str) -> dict:
         # 1. Generate title from content
         title = await self.ai.generate_title_from_content(note_in.content)
 
-        # 2. Insert note metadata into Supabase
-        response = self.db.table("notes").insert({
+        # The id is chosen here rather than by the database, so nothing has to wait for the insert
+        note_id = uuid.uuid4()
+        insert = self._execute(self.db.table("notes").insert({
+            "id": str(note_id),
             "user_id": user_id,
             "title": title,
             "content": note_in.content,
             "tags": note_in.tags
-        }).execute()
+        }))
+
+        if self.indexer is not None:
+            # 2. Insert note metadata into Supabase, then queue the embedding on the pipeline
+            new_note = (await insert).data[0]
+            await self._index_note(new_note, user_id)
+            await self.invalidate_search_cache(user_id)
+            return new_note
 
-        new_note = response.data[0]
-        note_id = uuid.UUID(new_note['id'])
+        # 2. Insert note metadata into Supabase while the content's chunks are embedded
+        chunks = NoteChunks.split(note_id, note_in.content)
+        inserted, vectors = await asyncio.gather(
+            insert, self._embed_chunks(chunks, chunks.changed()), return_exceptions=True
+        )
+        if isinstance(inserted, BaseException):
+            raise inserted
+        new_note = inserted.data[0]
 
-        # 3. Generate and store embedding (fire and forget is an option for speed)
-        embedding = await self.ai.generate_embedding(note_in.content)
-        await self.vector_db.upsert_note(note_id=note_id, user_id=user_id, vector=embedding)
+        # 3. Store the vectors; a note that can't be indexed is rolled back rather than left unsearchable
+        try:
+            if isinstance(vectors, BaseException):
+                raise vectors
+            await self._store_chunks(new_note, user_id, chunks, vectors, indexed_hashes=[])
+        except Exception:
+            await self._rollback_insert(new_note['id'], user_id)
+            raise
 
+        await self.invalidate_search_cache(user_id)
         return new_note
 
-    async def get_note_by_id(self, note_id: uuid.UUID, user_id: str) -> dict | None:
+    async def _rollback_insert(self, note_id: str, user_id: str):
+        try:
+            await self._execute(self.db.table("notes").delete().eq("id", note_id).eq("user_id", user_id))
+        except Exception as e:
+            logger.error("Could not roll back a note that failed to index", extra={"note_id": note_id, "error": str(e)})
+
+    async def bulk_import(self, records: AsyncIterator[tuple[int, dict | Exception]], user_id: str) -> dict:
+        """Imports a stream of parsed NDJSON records in batches and reports per-item results."""
+        return await BulkImporter(self).run(records, user_id)
+
+    async def get_note_by_id(self, note_id: uuid.UUID, user_id: str, fields: tuple[str, ...] | None = None):
         # RLS in Supabase ensures the user_id check is redundant but good for clarity
-        response = self.db.table("notes").select("*").eq("id", str(note_id)).eq("user_id", user_id).execute()
-        return response.data[0] if response.data else None
+        response = await self._execute(self.db.table("notes").select(select_columns(fields)).eq("id", str(note_id)).eq("user_id", user_id))
+        if not response.data:
+            return None
+
+        note = response.data[0]
+        status = self.indexer.status(note_id) if self.indexer is not None else None
+        if status is not None:
+            note['indexing_status'] = status.value
+        return project_note(note, fields)
 
-    def get_all_notes(self, user_id: str, page: int, page_size: int) -> list[dict]:
+    async def get_all_notes(self, user_id: str, page: int, page_size: int, fields: tuple[str, ...] | None = None) -> tuple[list, str | None]:
+        """Offset pagination. Returns the notes and a cursor for continuing with keyset pages."""
         offset = (page - 1) * page_size
-        response = self.db.table("notes").select("*").eq("user_id", user_id).order("created_at", desc=True).range(offset, offset + page_size - 1).execute()
-        return response.data
+        columns = select_columns(fields, required=("id", "created_at"))
+        response = await self._execute(self.db.table("notes").select(columns).eq("user_id", user_id).order("created_at", desc=True).order("id", desc=True).range(offset, offset + page_size - 1))
+        return [project_note(note, fields) for note in response.data], self.next_cursor(response.data, page_size)
 
-    async def update_note(self, note_id: uuid.UUID, note_in: NoteUpdate, user_id: str) -> dict | None:
-        # Check if the note exists and belongs to the user first
-        existing_note = await self.get_note_by_id(note_id, user_id)
-        if not existing_note:
+    async def get_notes_page(self, user_id: str, page_size: int, cursor: str | None = None, fields: tuple[str, ...] | None = None) -> tuple[list, str | None]:
+        """Keyset pagination on (created_at, id): every page costs the same as the first.
+
+        Backed by the (user_id, created_at DESC, id DESC) index in scripts/notes_keyset_index.sql.
+
+        Returns the notes and the cursor for the next page (None on the last page).
+        Raises InvalidCursorError for a malformed cursor.
+        """
+        columns = select_columns(fields, required=("id", "created_at"))
+        query = self.db.table("notes").select(columns).eq("user_id", user_id)
+        if cursor:
+            created_at, note_id = decode_cursor(cursor)
+            # The lte bound lets Postgres seek to the cursor in the index; the or_ breaks created_at ties by id
+            query = query.lte("created_at", created_at).or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{note_id})')
+        response = await self._execute(query.order("created_at", desc=True).order("id", desc=True).limit(page_size))
+        return [project_note(note, fields) for note in response.data], self.next_cursor(response.data, page_size)
+
+    @staticmethod
+    def next_cursor(notes: list[dict], page_size: int) -> str | None:
+        if len(notes) < page_size:
             return None
+        last = notes[-1]
+        return encode_cursor(last['created_at'], last['id'])
 
+    async def update_note(self, note_id: uuid.UUID, note_in: NoteUpdate, user_id: str) -> dict | None:
         update_data = note_in.model_dump(exclude_unset=True)
 
         if not update_data:
-            return existing_note # Nothing to update
+            return await self.get_note_by_id(note_id, user_id) # Nothing to update
 
-        response = self.db.table("notes").update(update_data).eq("id", str(note_id)).execute()
+        # The ownership check is part of the update itself: no row comes back for other users' notes
+        update = self._execute(self.db.table("notes").update(update_data).eq("id", str(note_id)).eq("user_id", user_id))
+        if update_data.get("content") is None:
+            response, indexed_hashes = await update, None
+        else:
+            # Read the hashes of the indexed chunks meanwhile, to tell which chunks actually changed
+            response, indexed_hashes = await asyncio.gather(update, self._indexed_chunk_hashes(note_id, user_id))
+
+        if not response.data:
+            return None
         updated_note = response.data[0]
 
-        # If content was updated, regenerate and upsert embedding
-        if "content" in update_data:
-            embedding = await self.ai.generate_embedding(updated_note['content'])
-            await self.vector_db.upsert_note(note_id=note_id, user_id=user_id, vector=embedding)
+        # If content actually changed, re-embed and upsert the chunks that changed
+        content_changed = (
+            update_data.get("content") is not None
+            and NoteChunks.split(note_id, updated_note["content"]).hashes != indexed_hashes
+        )
+        if content_changed:
+            await self._index_note(updated_note, user_id, indexed_hashes)
+        elif "tags" in update_data or settings.SEARCH_FROM_PAYLOAD:
+            # Keep the search payload (tags, updated_at) in sync without re-embedding
+            await self.vector_db.update_note_payload(note_id, self.search_payload(updated_note))
 
+        await self.invalidate_search_cache(user_id)
         return updated_note
 
+    async def _indexed_chunk_hashes(self, note_id: uuid.UUID, user_id: str) -> list[str | None] | None:
+        """The hashes stored with the note's chunk vectors; None (meaning reindex everything) if they can't be read."""
+        try:
+            return await self.vector_db.get_chunk_hashes(note_id, user_id)
+        except Exception as e:
+            logger.warning("Could not read the indexed chunk hashes", extra={"note_id": str(note_id), "error": str(e)})
+            return None
+
+    async def reindex_note(self, note_id: uuid.UUID, user_id: str) -> dict | None:
+        """Re-embeds and stores a note's vector, e.g. after its indexing failed."""
+        note = await self.get_note_by_id(note_id, user_id)
+        if not note:
+            return None
+        await self._index_note(note, user_id)
+        await self.invalidate_search_cache(user_id)
+        return note
+
     async def delete_note(self, note_id: uuid.UUID, user_id: str) -> bool:
-        # RLS handles security, this is just to confirm the operation
-        response = self.db.table("notes").delete().eq("id", str(note_id)).eq("user_id", user_id).execute()
+        # Delete the row and the vector concurrently; both deletes only match the user's own note
+        deleted, vector_deleted = await asyncio.gather(
+            self._execute(self.db.table("notes").delete().eq("id", str(note_id)).eq("user_id", user_id)),
+            self.vector_db.delete_note(note_id=note_id, user_id=user_id),
+            return_exceptions=True,
+        )
+        if isinstance(deleted, BaseException):
+            if not isinstance(vector_deleted, BaseException):
+                # The row may have survived without its vector
+                await self._restore_vector(note_id, user_id)
+            await self.invalidate_search_cache(user_id)
+            raise deleted
+
+        if not deleted.data:
+            return False
+
+        # Drop any queued indexing work so it can't bring the vector back
+        if self.indexer is not None:
+            self.indexer.discard(note_id)
+        if isinstance(vector_deleted, BaseException):
+            try:
+                await self.vector_db.delete_note(note_id=note_id, user_id=user_id)
+            except Exception as e:
+                logger.error("Could not delete the vector of a deleted note", extra={"note_id": str(note_id), "error": str(e)})
+        await self.invalidate_search_cache(user_id)
+        return True
+
+    async def _restore_vector(self, note_id: uuid.UUID, user_id: str):
+        try:
+            note = await self.get_note_by_id(note_id, user_id)
+            if note is not None:
+                await self._index_note(note, user_id)
+        except Exception as e:
+            logger.error("Could not restore the vector of a note that failed to delete", extra={"note_id": str(note_id), "error": str(e)})
 
-        if response.data:
-            # Also delete from vector DB
-            await self.vector_db.delete_note(note_id=note_id)
-            return True
-        return False
+    async def search_user_notes(
+        self,
+        query: str,
+        user_id: str,
+        fields: tuple[str, ...] | None = None,
+        limit: int = 5,
+        filters: SearchFilters | None = None,
+    ) -> list:
+        """Notes most similar to the query; `filters` (tags, dates, minimum score) are applied inside the vector index."""
+        if self.search_cache is None:
+            return await self._search(query, user_id, fields, limit, filters)
+        return await self.search_cache.get_or_search(
+            user_id, query, (fields, limit, filters), lambda: self._search(query, user_id, fields, limit, filters)
+        )
 
-    async def search_user_notes(self, query: str, user_id: str) -> list[dict]:
+    async def _search(
+        self,
+        query: str,
+        user_id: str,
+        fields: tuple[str, ...] | None = None,
+        limit: int = 5,
+        filters: SearchFilters | None = None,
+    ) -> list:
         # 1. Generate embedding for the search query
         query_embedding = await self.ai.generate_embedding(query)
 
+        if self._from_payload(fields):
+            notes = await self._search_from_payload(query_embedding, user_id, fields, limit, filters)
+            return [project_note(note, fields) for note in notes]
+
         # 2. Search in Qdrant for similar note IDs for this user
-        note_ids = await self.vector_db.search_notes(user_id=user_id, query_vector=query_embedding)
+        note_ids = await self.vector_db.search_notes(
+            user_id=user_id, query_vector=query_embedding, limit=limit, filters=filters
+        )
 
         if not note_ids:
             return []
 
-        # 3. Retrieve full note data from Supabase for the found IDs
+        # 3. Retrieve note data from Supabase for the found IDs
+        notes = await self._hydrate_notes(note_ids, select_columns(fields))
+        return [project_note(note, fields) for note in notes]
+
+    async def search_user_notes_batch(
+        self,
+        queries: list[str],
+        user_id: str,
+        fields: tuple[str, ...] | None = None,
+        limit: int = 5,
+        filters: SearchFilters | None = None,
+    ) -> list[list]:
+        """Results for each query, in order.
+
+        Queries missing from the search cache are embedded with one multi-input request,
+        searched with one batched Qdrant call and hydrated with one Supabase query.
+        """
+        unique = list(dict.fromkeys(normalize_query(query) for query in queries))
+        if self.search_cache is None:
+            results = await self._search_batch(unique, user_id, fields, limit, filters)
+        else:
+            results = await self._cached_search_batch(unique, user_id, fields, limit, filters)
+        by_query = dict(zip(unique, results))
+        return [by_query[normalize_query(query)] for query in queries]
+
+    async def _cached_search_batch(
+        self,
+        queries: list[str],
+        user_id: str,
+        fields: tuple[str, ...] | None = None,
+        limit: int = 5,
+        filters: SearchFilters | None = None,
+    ) -> list[list]:
+        """Looks each query up in the search cache; the misses are searched together once every lookup has settled."""
+        loop = asyncio.get_running_loop()
+        misses: dict[str, asyncio.Future] = {}
+        unsettled = len(queries)
+
+        async def settle():
+            nonlocal unsettled
+            unsettled -= 1
+            if unsettled == 0 and misses:
+                # The last lookup to settle runs the batch for everyone
+                await self._resolve_batch(misses, lambda: self._search_batch(list(misses), user_id, fields, limit, filters))
+
+        async def lookup(query: str) -> list:
+            missed = False
+
+            async def search():
+                nonlocal missed
+                missed = True
+                misses[query] = loop.create_future()
+                await settle()
+                return await misses[query]
+
+            results = await self.search_cache.get_or_search(user_id, query, (fields, limit, filters), search)
+            if not missed:
+                await settle()
+            return results
+
+        return list(await asyncio.gather(*(lookup(query) for query in queries)))
+
+    @staticmethod
+    async def _resolve_batch(misses: dict[str, asyncio.Future], search_batch: Callable[[], Awaitable[list[list]]]):
+        try:
+            results = await search_batch()
+        except Exception as e:
+            for future in misses.values():
+                future.set_exception(e)
+            return
+        for future, notes in zip(misses.values(), results):
+            future.set_result(notes)
+
+    async def _search_batch(
+        self,
+        queries: list[str],
+        user_id: str,
+        fields: tuple[str, ...] | None = None,
+        limit: int = 5,
+        filters: SearchFilters | None = None,
+    ) -> list[list]:
+        query_embeddings = await self.ai.generate_embeddings(queries)
+        hit_groups = await self.vector_db.search_note_hits_batch(
+            user_id=user_id, query_vectors=query_embeddings, limit=limit, with_payload=self._hit_payload(fields), filters=filters
+        )
+        return await self._results_for_hits(hit_groups, fields)
+
+    async def related_notes(
+        self,
+        note_id: uuid.UUID,
+        user_id: str,
+        positive: list[uuid.UUID] | None = None,
+        negative: list[uuid.UUID] | None = None,
+        limit: int = 5,
+        fields: tuple[str, ...] | None = None,
+    ) -> list | None:
+        """The user's notes most similar to `note_id` (and the other `positive` examples, away from the `negative` ones).
+
+        Uses the vectors already stored for the examples, so nothing is embedded.
+        Returns None if an example isn't one of the user's indexed notes.
+        """
+        hits = await self.vector_db.recommend_notes(
+            user_id=user_id,
+            positive=list(dict.fromkeys([note_id, *(positive or [])])),
+            negative=negative,
+            limit=limit,
+            with_payload=self._hit_payload(fields),
+        )
+        if hits is None:
+            return None
+        return (await self._results_for_hits([hits], fields))[0]
+
+    @staticmethod
+    def _from_payload(fields: tuple[str, ...] | None) -> bool:
+        """Whether results can be built from Qdrant payloads: they hold a snippet, never the full content."""
+        return settings.SEARCH_FROM_PAYLOAD and fields is not None and "content" not in fields
+
+    @classmethod
+    def _hit_payload(cls, fields: tuple[str, ...] | None) -> bool | list[str]:
+        """Payload to fetch with search hits: all of it to build results from, or just what groups chunks by note."""
+        return True if cls._from_payload(fields) else ["note_id"]
+
+    async def _results_for_hits(self, hit_groups: list[list], fields: tuple[str, ...] | None = None) -> list[list]:
+        """Projected notes for each group of hits, with one Supabase query (if any) for all groups."""
+        if self._from_payload(fields):
+            return [[project_note(note, fields) for note in notes] for notes in await self._notes_from_hits(hit_groups, fields)]
+
+        note_ids = list(dict.fromkeys(uuid.UUID(str(hit.id)) for hits in hit_groups for hit in hits))
+        if not note_ids:
+            return [[] for _ in hit_groups]
+        notes = {note['id']: note for note in await self._hydrate_notes(note_ids, select_columns(fields))}
+        return [
+            [project_note(notes[str(hit.id)], fields) for hit in hits if str(hit.id) in notes]
+            for hits in hit_groups
+        ]
+
+    async def _hydrate_notes(self, note_ids: list[uuid.UUID], columns: str = "*") -> list[dict]:
+        """Fetches notes from Supabase in one query, ordered like note_ids."""
         str_note_ids = [str(nid) for nid in note_ids]
-        response = self.db.table("notes").select("*").in_("id", str_note_ids).execute()
+        response = await self._execute(self.db.table("notes").select(columns).in_("id", str_note_ids))
 
         # Re-order results based on Qdrant's similarity ranking
         note_map = {note['id']: note for note in response.data}
         ordered_notes = [note_map[str(nid)] for nid in note_ids if str(nid) in note_map]
 
         return ordered_notes
+
+    async def _search_from_payload(
+        self,
+        query_embedding: list[float],
+        user_id: str,
+        fields: tuple[str, ...] | None = None,
+        limit: int = 5,
+        filters: SearchFilters | None = None,
+    ) -> list[dict]:
+        """Builds results straight from Qdrant payloads, for projections without `content`."""
+        hits = await self.vector_db.search_note_hits(
+            user_id=user_id, query_vector=query_embedding, limit=limit, filters=filters
+        )
+        return (await self._notes_from_hits([hits], fields))[0]
+
+    async def _notes_from_hits(self, hit_groups: list[list], fields: tuple[str, ...] | None = None) -> list[list[dict]]:
+        """Turns groups of scored hits into scored notes built from their payloads.
+
+        Points indexed before payload storage was enabled are hydrated from Supabase,
+        with one query for all groups.
+        """
+        results = {}
+        missing = []
+        seen = set()
+        for hit in (hit for hits in hit_groups for hit in hits):
+            note_id = str(hit.id)
+            payload = hit.payload or {}
+            if note_id in seen:
+                continue
+            seen.add(note_id)
+            if "title" not in payload:
+                missing.append(uuid.UUID(note_id))
+                continue
+            results[note_id] = {
+                "id": note_id,
+                "title": payload["title"],
+                "snippet": payload.get("snippet", ""),
+                "tags": payload.get("tags", []),
+                "created_at": payload["created_at"],
+                "updated_at": payload["updated_at"],
+            }
+
+        if missing:
+            for note in await self._hydrate_notes(missing, select_columns(fields)):
+                results[note['id']] = note
+
+        return [
+            [{**results[str(hit.id)], "score": hit.score} for hit in hits if str(hit.id) in results]
+            for hits in hit_groups
+        ]
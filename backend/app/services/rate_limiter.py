@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import math
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Drop expired leases once this many (scope, user) pairs are tracked
+MAX_TRACKED_LEASES = 10000
+
+# Most (scope, user) buckets a LocalBucketStore keeps; refilled buckets are dropped first
+MAX_TRACKED_BUCKETS = 10000
+
+# Refills a bucket, grants up to the requested count and takes back refunded tokens in one
+# atomic step. Timestamps come from the Redis clock so workers with skewed clocks agree.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local count = tonumber(ARGV[3])
+local refund = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate + refund)
+local granted = math.min(count, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return granted
+"""
+
+
+@dataclass(frozen=True)
+class Budget:
+    capacity: int
+    refill_per_second: float
+
+
+def parse_rate(rate: str) -> Budget:
+    """Parses a slowapi-style limit such as "30/minute" into a token bucket budget."""
+    try:
+        count, period = rate.strip().split("/")
+        seconds = RATE_PERIODS[period.strip().rstrip("s")]
+        capacity = int(count)
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit '{rate}'; expected e.g. '30/minute'.")
+    if capacity < 1:
+        raise ValueError(f"Invalid rate limit '{rate}'; the count must be positive.")
+    return Budget(capacity=capacity, refill_per_second=capacity / seconds)
+
+
+class LocalBucketStore:
+    """Per-process token buckets; a stand-in for the shared store in single-worker setups and tests.
+
+    Like the Redis keys' EXPIRE, a bucket is forgotten once it has refilled, since a
+    missing bucket reads as full. Beyond `max_buckets` the least recently used go too.
+    """
+
+    def __init__(self, max_buckets: int = MAX_TRACKED_BUCKETS):
+        self.max_buckets = max_buckets
+        # key -> (tokens, updated_at, full_at), least recently updated first
+        self._buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+
+    async def take(self, key: str, count: int, budget: Budget, refund: int = 0) -> int:
+        now = time.monotonic()
+        tokens, updated_at, _ = self._buckets.get(key, (budget.capacity, now, now))
+        tokens = min(budget.capacity, tokens + (now - updated_at) * budget.refill_per_second + refund)
+        granted = min(count, math.floor(tokens))
+        tokens -= granted
+        self._buckets[key] = (tokens, now, now + (budget.capacity - tokens) / budget.refill_per_second)
+        self._buckets.move_to_end(key)
+        self._prune(now)
+        return granted
+
+    def _prune(self, now: float):
+        while self._buckets:
+            _, _, full_at = next(iter(self._buckets.values()))
+            if full_at > now and len(self._buckets) <= self.max_buckets:
+                return
+            self._buckets.popitem(last=False)
+
+    async def close(self):
+        pass
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker and node through Redis."""
+
+    def __init__(self, url: str):
+        from redis import asyncio as redis
+
+        self.client = redis.from_url(url)
+        self._take = self.client.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, count: int, budget: Budget, refund: int = 0) -> int:
+        return int(await self._take(keys=[key], args=[budget.capacity, budget.refill_per_second, count, refund]))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+@dataclass
+class _Lease:
+    tokens: int
+    expires_at: float
+
+
+class RateLimiter:
+    """Token bucket rate limiting per (scope, user) with locally leased tokens.
+
+    Instead of asking the shared store on every request, a worker leases a small batch
+    of tokens and spends them locally until the batch runs out or the lease expires;
+    unused tokens go back to the store with the next lease. At most
+    (lease_size - 1) tokens per worker can be held back from other workers, and the
+    store is only contacted roughly once per lease_size requests.
+    """
+
+    def __init__(
+        self,
+        store,
+        budgets: dict[str, Budget],
+        lease_size: int,
+        lease_ttl_seconds: float,
+        key_prefix: str = "ratelimit",
+    ):
+        self.store = store
+        self.budgets = budgets
+        self.lease_size = max(1, lease_size)
+        self.lease_ttl = lease_ttl_seconds
+        self.key_prefix = key_prefix
+        self._leases: dict[str, _Lease] = {}
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+        self.local_grants = 0
+        self.store_calls = 0
+        self.store_errors = 0
+        self.denied = 0
+
+    def _take_local(self, key: str) -> bool:
+        lease = self._leases.get(key)
+        if lease is None or lease.tokens < 1 or lease.expires_at <= time.monotonic():
+            return False
+        lease.tokens -= 1
+        self.local_grants += 1
+        return True
+
+    async def acquire(self, scope: str, subject: str) -> float:
+        """Spends one token of `scope` for `subject`.
+
+        Returns 0 when the request is allowed, otherwise the number of seconds
+        after which a token should be available again.
+        """
+        budget = self.budgets.get(scope) or self.budgets["default"]
+        key = f"{scope}:{subject}"
+        if self._take_local(key):
+            return 0.0
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            # Another request may have renewed the lease while we waited
+            if self._take_local(key):
+                return 0.0
+
+            stale = self._leases.pop(key, None)
+            refund = stale.tokens if stale else 0
+            want = min(self.lease_size, budget.capacity)
+            self.store_calls += 1
+            try:
+                granted = await self.store.take(f"{self.key_prefix}:{key}", want, budget, refund)
+            except Exception as e:
+                # Fail open: an unreachable store shouldn't take the API down with it
+                self.store_errors += 1
+                logger.warning("Rate limit store unavailable, allowing request", extra={"error": str(e)})
+                return 0.0
+
+            if granted < 1:
+                self.denied += 1
+                return 1 / budget.refill_per_second
+
+            if len(self._leases) >= MAX_TRACKED_LEASES:
+                self._prune()
+            self._leases[key] = _Lease(tokens=granted - 1, expires_at=time.monotonic() + self.lease_ttl)
+            return 0.0
+
+    def _prune(self):
+        now = time.monotonic()
+        for key in [key for key, lease in self._leases.items() if lease.expires_at <= now]:
+            del self._leases[key]
+
+    async def aclose(self):
+        """Hands unused leased tokens back to the store and closes it."""
+        leases, self._leases = self._leases, {}
+        for key, lease in leases.items():
+            if lease.tokens > 0:
+                scope = key.split(":", 1)[0]
+                budget = self.budgets.get(scope) or self.budgets["default"]
+                try:
+                    await self.store.take(f"{self.key_prefix}:{key}", 0, budget, lease.tokens)
+                except Exception:
+                    break
+        await self.store.close()
+
+    def stats(self) -> dict:
+        return {
+            "local_grants": self.local_grants,
+            "store_calls": self.store_calls,
+            "store_errors": self.store_errors,
+            "denied": self.denied,
+            "active_leases": len(self._leases),
+        }
+
+
+@lru_cache()
+def get_rate_limiter() -> RateLimiter | None:
+    """Returns the shared limiter, or None when rate limiting is disabled."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    store = RedisBucketStore(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_REDIS_URL else LocalBucketStore()
+    return RateLimiter(
+        store=store,
+        budgets={
+            "default": parse_rate(settings.RATE_LIMIT),
+            "search": parse_rate(settings.RATE_LIMIT_SEARCH),
+            "write": parse_rate(settings.RATE_LIMIT_WRITE),
+        },
+        lease_size=settings.RATE_LIMIT_LEASE_SIZE,
+        lease_ttl_seconds=settings.RATE_LIMIT_LEASE_TTL_SECONDS,
+    )
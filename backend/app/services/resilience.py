@@ -0,0 +1,346 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+from app.core.deadline import time_remaining
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ServiceUnavailableError(Exception):
+    """A dependency can't serve the request right now; surfaced to clients as `status_code`."""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    pass
+
+
+class OverloadedError(ServiceUnavailableError):
+    pass
+
+
+class DeadlineExceededError(ServiceUnavailableError):
+    status_code = 504
+
+
+class LatencyTracker:
+    """Latencies of the last `window` successful calls, for percentile-based hedging delays."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AIMDLimiter:
+    """Caps in-flight calls with a limit that adapts like TCP congestion control.
+
+    Each success raises the limit by about one per limit's worth of calls (additive
+    increase); a timeout or overload response cuts it by `decrease_factor`, at most
+    once per `cooldown` so one burst of failures doesn't collapse it to the minimum.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+        self.increases = 0
+        self.decreases = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    async def acquire(self, timeout: float | None = None):
+        """Waits for a free slot; raises OverloadedError if none frees up within `timeout`."""
+        if not self._waiters and self.try_acquire():
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to the waiter, so in_flight is already counted
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return
+            waiter.cancel()
+            self.rejected += 1
+            raise OverloadedError("Too many calls in flight, try again shortly.", retry_after=1.0) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def on_success(self):
+        if self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.increases += 1
+
+    def on_overload(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.decrease_factor)
+        self.decreases += 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast for `reset_timeout` seconds.
+
+    Then it lets a single probe call through (half-open): success closes it again,
+    failure re-opens it for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self, name: str) -> bool:
+        """Raises CircuitOpenError unless a call may go ahead; returns True if that call is the half-open probe."""
+        if self.state == "closed":
+            return False
+        remaining = self._opened_at + self.reset_timeout - time.monotonic()
+        if remaining <= 0 and not self._probing:
+            self.state = "half_open"
+            self._probing = True
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"{name} is unavailable, failing fast until it recovers.", retry_after=max(remaining, 1.0)
+        )
+
+    def cancel_probe(self):
+        """Lets another call probe when the admitted one never reached the dependency or was cancelled."""
+        self._probing = False
+
+    def on_success(self):
+        self.failures = 0
+        self._probing = False
+        self.state = "closed"
+
+    def on_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "opened": self.opened, "rejected": self.rejected}
+
+
+class ResilientCaller:
+    """Deadline, adaptive concurrency limit, hedging and circuit breaking around one idempotent remote call.
+
+    `call(request)` runs `request(timeout)` within the tighter of `timeout` and the
+    current request's deadline. If it hasn't answered after the recent
+    `hedge_percentile` latency, an identical hedge request is sent (when the limiter
+    has room) and whichever answers first wins; a request that fails outright gets
+    that one backup as a retry instead. Failures for which `is_failure` returns True
+    count towards the breaker and shrink the concurrency limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limiter: AIMDLimiter,
+        breaker: CircuitBreaker,
+        default_timeout: float,
+        hedge: bool = True,
+        hedge_percentile: float = 0.95,
+        hedge_min_delay: float = 0.05,
+        hedge_min_samples: int = 20,
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.default_timeout = default_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.is_failure = is_failure
+        self.latency = LatencyTracker()
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.deadline_exceeded = 0
+
+    def hedge_delay(self) -> float | None:
+        """How long to wait before hedging, or None while there are too few samples to tell."""
+        if not self.hedge or len(self.latency) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latency.percentile(self.hedge_percentile))
+
+    async def call(self, request: Callable[[float], Awaitable[T]], timeout: float | None = None) -> T:
+        budget = timeout if timeout is not None else self.default_timeout
+        remaining = time_remaining()
+        if remaining is not None:
+            budget = min(budget, remaining)
+        if budget <= 0:
+            self.deadline_exceeded += 1
+            raise DeadlineExceededError(f"Request deadline passed before calling {self.name}.")
+
+        probe = self.breaker.before_call(self.name)
+        deadline_at = time.monotonic() + budget
+        try:
+            await self.limiter.acquire(timeout=budget)
+        except BaseException:
+            # Overloaded or cancelled while waiting: the probe never ran, so let the next call try
+            if probe:
+                self.breaker.cancel_probe()
+            raise
+
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            result = await self._attempt(request, deadline_at)
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            self.breaker.on_failure()
+            self.limiter.on_overload()
+            raise DeadlineExceededError(f"{self.name} did not answer within {budget:.1f}s.") from None
+        except Exception as e:
+            if not self.is_failure(e):
+                self.breaker.on_success()
+                raise
+            self.breaker.on_failure()
+            self.limiter.on_overload()
+            if self.breaker.state == "open":
+                logger.warning("Circuit breaker open", extra={"dependency": self.name, "error": str(e)})
+            if time.monotonic() >= deadline_at:
+                # e.g. the HTTP client's own timeout firing at the same moment as ours
+                self.deadline_exceeded += 1
+                raise DeadlineExceededError(f"{self.name} did not answer within {budget:.1f}s.") from e
+            raise
+        except BaseException:
+            # Cancelled (client disconnect, losing hedge): no verdict on the dependency, but don't hold the probe
+            if probe:
+                self.breaker.cancel_probe()
+            raise
+        finally:
+            self.limiter.release()
+
+        self.latency.record(time.monotonic() - started)
+        self.breaker.on_success()
+        self.limiter.on_success()
+        return result
+
+    async def _attempt(self, request: Callable[[float], Awaitable[T]], deadline_at: float) -> T:
+        """Runs the primary request plus at most one backup: a hedge if the primary is slow, a retry if it fails."""
+        def start():
+            return asyncio.ensure_future(request(deadline_at - time.monotonic()))
+
+        primary = start()
+        tasks = {primary}
+        delay = self.hedge_delay()
+        hedge_at = time.monotonic() + delay if delay is not None else None
+        backup_slot = False
+        error: BaseException | None = None
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline_at:
+                    raise asyncio.TimeoutError
+                wait = deadline_at - now
+                if hedge_at is not None and not backup_slot:
+                    wait = min(wait, max(0.0, hedge_at - now))
+                done, tasks = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+
+                slow = not done and hedge_at is not None and time.monotonic() >= hedge_at
+                failed = not tasks and error is not None and self.is_failure(error)
+                if not backup_slot and (slow or failed):
+                    if self.limiter.try_acquire():
+                        backup_slot = True
+                        if slow:
+                            self.hedges += 1
+                        else:
+                            self.retries += 1
+                        tasks.add(start())
+                    hedge_at = None
+                if not tasks:
+                    raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if backup_slot:
+                self.limiter.release()
+
+    def stats(self) -> dict:
+        delay = self.hedge_delay()
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retries": self.retries,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "deadline_exceeded": self.deadline_exceeded,
+            "concurrency": self.limiter.stats(),
+            "breaker": self.breaker.stats(),
+        }
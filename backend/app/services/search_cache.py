@@ -0,0 +1,189 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable
+from app.core.config import settings
+from app.core.metrics import SEARCH_SECONDS
+from app.services.vector_db import get_vector_db_service
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Collapses whitespace, so queries differing only in spacing share an entry."""
+    return " ".join(query.split())
+
+
+class LocalGenerationStore:
+    """Per-process write generations; exact as long as a single worker serves each user."""
+
+    def __init__(self):
+        self._generations: dict[str, int] = {}
+
+    async def get(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    async def bump(self, user_id: str) -> int:
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        return self._generations[user_id]
+
+    async def close(self):
+        pass
+
+
+class RedisGenerationStore:
+    """Write generations shared by every worker through Redis.
+
+    Keys outlive every cache entry (twice the TTL, refreshed on each write). A key
+    that does expire reads as 0, which can only turn entries into misses.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float, key_prefix: str = "searchgen"):
+        from redis import asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.expire_seconds = max(60, math.ceil(ttl_seconds * 2))
+        self.key_prefix = key_prefix
+
+    async def get(self, user_id: str) -> int:
+        return int(await self.client.get(f"{self.key_prefix}:{user_id}") or 0)
+
+    async def bump(self, user_id: str) -> int:
+        key = f"{self.key_prefix}:{user_id}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            generation, _ = await pipe.incr(key).expire(key, self.expire_seconds).execute()
+        return int(generation)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class SearchCache:
+    """Per-user search results, bounded by LRU and TTL, invalidated by write generations.
+
+    Every write to a user's notes bumps their generation once it is visible. An entry
+    is only served while the generation it was computed under is still current, and
+    that generation is read before the search starts, so results that raced with a
+    write are never served.
+
+    When a user's generation moves on without this worker having made the write,
+    `on_foreign_write(user_id)` runs before searching, so per-worker copies of the
+    user's vectors (the local index) are dropped rather than searched stale.
+    """
+
+    def __init__(
+        self, store, max_entries: int, ttl_seconds: float, on_foreign_write: Callable[[str], None] | None = None
+    ):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.on_foreign_write = on_foreign_write
+        self._entries: OrderedDict[tuple, tuple[int, float, tuple]] = OrderedDict()
+        # Last generation of each user this worker has searched under or written itself
+        self._seen: OrderedDict[str, int] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self._hit_seconds = 0.0
+        self._miss_seconds = 0.0
+
+    async def get_or_search(self, user_id: str, query: str, params: tuple, search: Callable[[], Awaitable[list]]) -> list:
+        """Returns cached results for (user, normalized query, params), or runs `search` and caches its results."""
+        started = time.perf_counter()
+        try:
+            generation = await self.store.get(user_id)
+        except Exception as e:
+            # Without a generation we can't tell whether an entry is fresh, so don't use the cache at all
+            logger.warning("Search cache generation unavailable, bypassing cache", extra={"error": str(e)})
+            self.bypassed += 1
+            results = await search()
+            SEARCH_SECONDS.observe(time.perf_counter() - started, "bypass")
+            return results
+
+        self._note_generation(user_id, generation)
+        key = (user_id, normalize_query(query), params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry_generation, expires_at, results = entry
+            if entry_generation == generation and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                elapsed = time.perf_counter() - started
+                self._hit_seconds += elapsed
+                SEARCH_SECONDS.observe(elapsed, "hit")
+                return list(results)
+            del self._entries[key]
+
+        results = await search()
+        self._entries[key] = (generation, time.monotonic() + self.ttl, tuple(results))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self.misses += 1
+        elapsed = time.perf_counter() - started
+        self._miss_seconds += elapsed
+        SEARCH_SECONDS.observe(elapsed, "miss")
+        return results
+
+    async def invalidate(self, user_id: str):
+        """Bumps the user's write generation; call after a write to their notes is visible."""
+        try:
+            generation = await self.store.bump(user_id)
+        except Exception as e:
+            # Other workers may keep serving stale entries until they expire; this one at least won't
+            logger.error("Could not bump search cache generation", extra={"user_id": user_id, "error": str(e)})
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+            return
+        if self._seen.get(user_id) == generation - 1:
+            # Only our own write happened since we last looked; our local copies already have it
+            self._seen[user_id] = generation
+
+    def _note_generation(self, user_id: str, generation: int):
+        if self._seen.get(user_id) != generation:
+            if self.on_foreign_write is not None:
+                self.on_foreign_write(user_id)
+            self._seen[user_id] = generation
+        self._seen.move_to_end(user_id)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)  # Forgotten users count as changed, which is always safe
+
+    async def aclose(self):
+        self._entries.clear()
+        await self.store.close()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_hit_ms": self._hit_seconds / self.hits * 1000 if self.hits else 0.0,
+            "avg_miss_ms": self._miss_seconds / self.misses * 1000 if self.misses else 0.0,
+        }
+
+
+@lru_cache()
+def get_search_cache() -> SearchCache | None:
+    """Returns the shared search cache, or None when it is disabled."""
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+    store = (
+        RedisGenerationStore(settings.SEARCH_CACHE_REDIS_URL, settings.SEARCH_CACHE_TTL_SECONDS)
+        if settings.SEARCH_CACHE_REDIS_URL
+        else LocalGenerationStore()
+    )
+    on_foreign_write = None
+    if settings.LOCAL_INDEX_ENABLED:
+        on_foreign_write = get_vector_db_service().invalidate_local_tenant
+    return SearchCache(
+        store, settings.SEARCH_CACHE_MAX_ENTRIES, settings.SEARCH_CACHE_TTL_SECONDS, on_foreign_write=on_foreign_write
+    )
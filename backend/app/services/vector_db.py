@@ -1,82 +1,687 @@
-from qdrant_client import QdrantClient, AsyncQdrantClient
-from qdrant_client.http import models
+from __future__ import annotations
+from app.core.lazy import LazyModule
 from app.core.config import settings
-from functools import lru_cache
+from app.core.metrics import instrument
+from app.services.local_index import LocalVectorIndex, TenantIndex
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import cached_property, lru_cache
+import asyncio
+import logging
 import uuid
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# qdrant-client is slow to import, so it's loaded on first use rather than at app start-up
+qdrant_client = LazyModule("qdrant_client")
+models = LazyModule("qdrant_client.http.models")
+
+# Bytes per stored dimension for each QDRANT_QUANTIZATION mode, used for memory estimates
+BYTES_PER_DIMENSION = {"none": 4.0, "scalar": 1.0, "binary": 1 / 8}
+
+def recall_at_k(expected: list, actual: list) -> float:
+    """Fraction of the exact top-k results that an approximate search also returned."""
+    if not expected:
+        return 1.0
+    return len(set(expected) & set(actual)) / len(expected)
+
+def build_quantization_config(mode: str, always_ram: bool = True):
+    """Qdrant quantization config for a QDRANT_QUANTIZATION mode, or None for full precision."""
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=always_ram)
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=always_ram))
+    if mode == "none":
+        return None
+    raise ValueError(f"Unknown quantization mode: {mode}")
+
+def build_hnsw_config(tenant_mode: bool) -> models.HnswConfigDiff:
+    """Per-tenant graphs only (m=0, payload_m) in tenant mode, otherwise one global graph."""
+    if tenant_mode:
+        return models.HnswConfigDiff(m=0, payload_m=settings.QDRANT_TENANT_PAYLOAD_M)
+    return models.HnswConfigDiff(m=settings.QDRANT_HNSW_M, payload_m=0)
+
+def user_id_index_schema(tenant_mode: bool):
+    """Keyword index on user_id, marked as the tenant key in tenant mode so Qdrant co-locates each user's points."""
+    if tenant_mode:
+        return models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True)
+    return models.PayloadSchemaType.KEYWORD
+
+def payload_index_schemas() -> dict:
+    """Indexed payload fields besides user_id: note_id ties a note's chunks together, tags and created_at filter searches."""
+    return {
+        "note_id": models.PayloadSchemaType.KEYWORD,
+        "tags": models.PayloadSchemaType.KEYWORD,
+        "created_at": models.PayloadSchemaType.DATETIME,
+    }
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """Tag and creation-date predicates applied inside the vector index, plus a minimum score.
+
+    A note must carry every tag in `tags`; `since` and `until` bound created_at
+    inclusively, naive datetimes being UTC.
+    """
+    tags: tuple[str, ...] = ()
+    since: datetime | None = None
+    until: datetime | None = None
+    score_threshold: float | None = None
+
+    def conditions(self) -> list:
+        """The predicates as Qdrant field conditions, served by the tags and created_at payload indexes."""
+        conditions = [models.FieldCondition(key="tags", match=models.MatchValue(value=tag)) for tag in self.tags]
+        if self.since is not None or self.until is not None:
+            conditions.append(
+                models.FieldCondition(key="created_at", range=models.DatetimeRange(
+                    gte=_as_utc(self.since) if self.since else None, lte=_as_utc(self.until) if self.until else None
+                ))
+            )
+        return conditions
+
+    def matches(self, payload: dict) -> bool:
+        """The same predicates over a stored payload, for searches answered by the local index."""
+        tags = payload.get("tags") or ()
+        if any(tag not in tags for tag in self.tags):
+            return False
+        if self.since is None and self.until is None:
+            return True
+        try:
+            created_at = _as_utc(datetime.fromisoformat(payload["created_at"]))
+        except (KeyError, TypeError, ValueError):
+            return False
+        return (self.since is None or created_at >= _as_utc(self.since)) and (
+            self.until is None or created_at <= _as_utc(self.until)
+        )
+
+    def local_where(self):
+        return self.matches if self.tags or self.since is not None or self.until is not None else None
+
+def collapse_chunks(hits: list[tuple[str, float, dict]], limit: int) -> list[tuple[str, float, dict]]:
+    """Turns (point_id, score, payload) chunk hits into note hits, each scoring as its best chunk."""
+    best: dict[str, tuple[str, float, dict]] = {}
+    for point_id, score, payload in hits:
+        note_id = (payload or {}).get("note_id") or str(point_id)
+        if note_id not in best or score > best[note_id][1]:
+            best[note_id] = (note_id, score, payload)
+    return sorted(best.values(), key=lambda hit: hit[1], reverse=True)[:limit]
+
+def chunk_hashes(payloads: list[dict]) -> list[str | None]:
+    """The stored hash of each chunk of a note, by chunk index; points from before chunking count as chunk 0."""
+    hashes: list[str | None] = []
+    for payload in payloads:
+        index = payload.get("chunk", 0)
+        hashes.extend([None] * (index + 1 - len(hashes)))
+        hashes[index] = payload.get("chunk_hash") or payload.get("content_hash")
+    return hashes
+
+def search_fetch_limit(limit: int) -> int:
+    """How many chunk hits to fetch for `limit` notes."""
+    return limit * settings.CHUNK_SEARCH_OVERFETCH if settings.CHUNK_MAX_CHARS > 0 else limit
+
+# Page size used when loading a tenant's vectors into the local index
+SCROLL_PAGE_SIZE = 256
 
 class VectorDBService:
-    def __init__(self, url: str, api_key: str, collection_name: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        collection_name: str,
+        local_index: LocalVectorIndex | None = None,
+        quantization: str = settings.QDRANT_QUANTIZATION,
+        tenant_mode: bool = settings.QDRANT_TENANT_MODE,
+    ):
         self.collection_name = collection_name
+        self.quantization = quantization
+        self.tenant_mode = tenant_mode
+        self.url = url
+        self.api_key = api_key
         # Use Async client for FastAPI
-        self.client = AsyncQdrantClient(url=url, api_key=api_key)
-        self.sync_client = QdrantClient(url=url, api_key=api_key) # For initial setup
+        self.client = qdrant_client.AsyncQdrantClient(url=url, api_key=api_key)
+        # Optional in-process tier that answers searches for small tenants without a Qdrant hop
+        self.local_index = local_index
+        self._tenant_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
 
-    def setup_collection(self):
-        """Creates the Qdrant collection if it doesn't exist."""
-        try:
-            self.sync_client.get_collection(collection_name=self.collection_name)
-        except Exception:
-            self.sync_client.recreate_collection(
+    @cached_property
+    def sync_client(self) -> qdrant_client.QdrantClient:
+        """Blocking client for the migration script; the app itself only uses `client`."""
+        return qdrant_client.QdrantClient(url=self.url, api_key=self.api_key)
+
+    async def setup_collection(self):
+        """Creates the Qdrant collection and its payload indexes if they don't exist.
+
+        Runs from the app lifespan at start-up, so no request waits on schema creation.
+        """
+        if not await self.client.collection_exists(self.collection_name):
+            try:
+                await self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=models.VectorParams(
+                        size=settings.EMBEDDING_DIMENSION,
+                        distance=models.Distance.COSINE,
+                        on_disk=settings.QDRANT_ON_DISK_VECTORS,
+                    ),
+                    quantization_config=build_quantization_config(self.quantization, settings.QDRANT_QUANTIZATION_ALWAYS_RAM),
+                    hnsw_config=build_hnsw_config(self.tenant_mode),
+                )
+            except Exception:
+                # Another worker starting at the same time may have created it first
+                if not await self.client.collection_exists(self.collection_name):
+                    raise
+            # Create a payload index on user_id for efficient filtering
+            await self.client.create_payload_index(
                 collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=settings.EMBEDDING_DIMENSION,
-                    distance=models.Distance.COSINE
-                ),
+                field_name="user_id",
+                field_schema=user_id_index_schema(self.tenant_mode),
             )
-            # Create a payload index on user_id for efficient filtering
+            # ... and on the fields chunk lookups and search filters use
+            for field_name, field_schema in payload_index_schemas().items():
+                await self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                )
+        logger.info("Qdrant collection is ready", extra={"collection": self.collection_name})
+
+    def apply_storage_settings(self):
+        """Applies the configured quantization and on-disk settings to an existing collection.
+
+        Qdrant re-quantizes in the background. Changing EMBEDDING_DIMENSION still needs a new
+        collection and a full re-index, since stored vectors can't be resized in place.
+        """
+        quantization = build_quantization_config(self.quantization, settings.QDRANT_QUANTIZATION_ALWAYS_RAM)
+        self.sync_client.update_collection(
+            collection_name=self.collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=settings.QDRANT_ON_DISK_VECTORS)},
+            quantization_config=quantization or models.Disabled.DISABLED,
+        )
+
+    def apply_tenant_settings(self):
+        """Migrates an existing collection to (or from) the tenant layout in place.
+
+        Re-creating the user_id index with the new schema replaces the old one, and the
+        HNSW change makes Qdrant rebuild its graphs in the background; searches keep
+        working on the old segments until the optimizer swaps them.
+        """
+        self.sync_client.create_payload_index(
+            collection_name=self.collection_name,
+            field_name="user_id",
+            field_schema=user_id_index_schema(self.tenant_mode),
+            wait=True,
+        )
+        self.sync_client.update_collection(
+            collection_name=self.collection_name,
+            hnsw_config=build_hnsw_config(self.tenant_mode),
+        )
+
+    def create_payload_indexes(self):
+        """Adds the note_id, tags and created_at indexes to a collection created before they existed."""
+        for field_name, field_schema in payload_index_schemas().items():
             self.sync_client.create_payload_index(
                 collection_name=self.collection_name,
-                field_name="user_id",
-                field_schema=models.PayloadSchemaType.KEYWORD,
+                field_name=field_name,
+                field_schema=field_schema,
+                wait=True,
+            )
+
+    def backfill_payloads(self, payloads: dict[str, dict]):
+        """Sets payload fields on every chunk of the given notes in one blocking batch call (for migrations)."""
+        self.sync_client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=[
+                models.SetPayloadOperation(set_payload=models.SetPayload(payload=payload, filter=self._note_filter(note_id)))
+                for note_id, payload in payloads.items()
+            ],
+            wait=False,
+        )
+
+    def _search_params(self) -> models.SearchParams | None:
+        if self.quantization == "none":
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=settings.QDRANT_SEARCH_RESCORE,
+                oversampling=settings.QDRANT_SEARCH_OVERSAMPLING,
             )
-        print(f"Qdrant collection '{self.collection_name}' is ready.")
+        )
 
+    async def measure_recall(self, user_id: str, query_vectors: list[list[float]], limit: int = 5) -> dict:
+        """Compares the configured (quantized) search with exact full-precision search.
 
-    async def upsert_note(self, note_id: uuid.UUID, user_id: str, vector: list[float]):
-        """Upserts a note's vector into the collection."""
+        Returns mean recall@limit over the queries and an estimate of vector memory per
+        point in the current mode relative to float32.
+        """
+        recalls = []
+        for query_vector in query_vectors:
+            exact = await self.client.query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                query_filter=self._user_filter(user_id),
+                limit=limit,
+                search_params=models.SearchParams(
+                    exact=True, quantization=models.QuantizationSearchParams(ignore=True)
+                ),
+            )
+            approximate = await self.client.query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                query_filter=self._user_filter(user_id),
+                limit=limit,
+                search_params=self._search_params(),
+            )
+            recalls.append(recall_at_k(
+                [point.id for point in exact.points], [point.id for point in approximate.points]
+            ))
+        return {
+            "mode": self.quantization,
+            "queries": len(recalls),
+            "recall": sum(recalls) / len(recalls) if recalls else 1.0,
+            "memory_ratio": BYTES_PER_DIMENSION[self.quantization] / BYTES_PER_DIMENSION["none"],
+        }
+
+
+    @instrument("vector_write")
+    async def upsert_note(self, note_id: uuid.UUID, user_id: str, vector: list[float], payload: dict | None = None):
+        """Upserts a note's vector into the collection, with optional extra payload fields."""
         await self.client.upsert(
             collection_name=self.collection_name,
             points=[
                 models.PointStruct(
                     id=str(note_id),
                     vector=vector,
-                    payload={"user_id": user_id}
+                    payload={"user_id": user_id, **(payload or {})}
                 )
             ],
             wait=True
         )
+        if self.local_index is not None:
+            self.local_index.upsert(user_id, str(note_id), vector, {"user_id": user_id, **(payload or {})})
 
-    async def search_notes(self, user_id: str, query_vector: list[float], limit: int = 5) -> list[uuid.UUID]:
+    @instrument("vector_write")
+    async def upsert_notes(self, notes: list[tuple[uuid.UUID, str, list[float], dict | None]]):
+        """Upserts several notes' vectors in one request. Each item is (note_id, user_id, vector, payload)."""
+        if not notes:
+            return
+        await self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                models.PointStruct(
+                    id=str(note_id),
+                    vector=vector,
+                    payload={"user_id": user_id, **(payload or {})}
+                )
+                for note_id, user_id, vector, payload in notes
+            ],
+            wait=True
+        )
+        if self.local_index is not None:
+            for note_id, user_id, vector, payload in notes:
+                self.local_index.upsert(user_id, str(note_id), vector, {"user_id": user_id, **(payload or {})})
+
+    @instrument("vector_write")
+    async def update_note_payload(self, note_id: uuid.UUID, payload: dict):
+        """Overwrites the given payload fields of all of a note's chunk points without touching their vectors."""
+        await self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=payload,
+            points=models.FilterSelector(filter=self._note_filter(note_id)),
+            wait=True
+        )
+        self._set_local_payload(note_id, payload)
+
+    def _set_local_payload(self, note_id: uuid.UUID, payload: dict):
+        if self.local_index is None:
+            return
+        points = self.local_index.note_points(str(note_id))
+        if points is None:
+            self.local_index.mark_written(None)  # The owner isn't known without its tenant
+            return
+        for point_id, _ in points:
+            self.local_index.set_payload(point_id, payload)
+
+    def _user_filter(self, user_id: str) -> models.Filter:
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="user_id",
+                    match=models.MatchValue(value=user_id)
+                )
+            ]
+        )
+
+    def _search_filter(self, user_id: str, filters: SearchFilters | None = None) -> models.Filter:
+        user_filter = self._user_filter(user_id)
+        if filters is not None:
+            user_filter.must.extend(filters.conditions())
+        return user_filter
+
+    def _note_filter(self, note_id: uuid.UUID, user_id: str | None = None) -> models.Filter:
+        """Matches every chunk point of a note (and, with `user_id`, only if it's that user's)."""
+        return models.Filter(
+            must=[models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))] if user_id else None,
+            should=[
+                models.HasIdCondition(has_id=[str(note_id)]),
+                models.FieldCondition(key="note_id", match=models.MatchValue(value=str(note_id))),
+            ],
+        )
+
+    async def _local_tenant(self, user_id: str) -> TenantIndex | None:
+        """Returns the user's in-process index, loading it on first use; None means ask Qdrant."""
+        if self.local_index is None or self.local_index.is_large(user_id):
+            return None
+        tenant = self.local_index.get(user_id)
+        if tenant is not None:
+            return tenant
+
+        lock = self._tenant_locks.get(user_id)
+        if lock is None:
+            lock = self._tenant_locks[user_id] = asyncio.Lock()
+        async with lock:
+            # Another request may have loaded the tenant while we waited
+            tenant = self.local_index.peek(user_id)
+            if tenant is None and not self.local_index.is_large(user_id):
+                token = self.local_index.begin_load(user_id)
+                try:
+                    points = await self._scroll_user_points(user_id, self.local_index.max_tenant_points + 1)
+                    tenant = self.local_index.load(user_id, points, token)
+                finally:
+                    self.local_index.end_load(user_id)
+        return tenant
+
+    def invalidate_local_tenant(self, user_id: str):
+        """Forgets this worker's copy of the user's vectors after another worker wrote to them."""
+        if self.local_index is not None:
+            self.local_index.invalidate(user_id)
+
+    async def _scroll_user_points(self, user_id: str, max_points: int) -> list[tuple[str, list[float], dict]]:
+        points = []
+        offset = None
+        while len(points) < max_points:
+            records, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._user_filter(user_id),
+                limit=min(SCROLL_PAGE_SIZE, max_points - len(points)),
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            points.extend((str(record.id), record.vector, record.payload or {}) for record in records)
+            if offset is None:
+                break
+        return points
+
+    @instrument("vector_search")
+    async def search_notes(
+        self, user_id: str, query_vector: list[float], limit: int = 5, filters: SearchFilters | None = None
+    ) -> list[uuid.UUID]:
         """Searches for similar notes for a specific user."""
-        search_result = await self.client.search(
+        hits = await self._search_hits(user_id, query_vector, limit, filters, with_payload=["note_id"]) # Only needed to group chunks by note
+        return [uuid.UUID(note_id) for note_id, _, _ in collapse_chunks(hits, limit)]
+
+    @instrument("vector_search")
+    async def search_note_hits(
+        self, user_id: str, query_vector: list[float], limit: int = 5, filters: SearchFilters | None = None
+    ) -> list[models.ScoredPoint]:
+        """Searches for similar notes and returns scored points with their payloads."""
+        hits = await self._search_hits(user_id, query_vector, limit, filters, with_payload=True)
+        return [
+            models.ScoredPoint(id=note_id, version=0, score=score, payload=payload)
+            for note_id, score, payload in collapse_chunks(hits, limit)
+        ]
+
+    async def _search_hits(
+        self, user_id: str, query_vector: list[float], limit: int, filters: SearchFilters | None, with_payload: bool | list[str]
+    ) -> list[tuple[str, float, dict]]:
+        """Chunk hits as (point_id, score, payload), from the local index when it holds the user's points."""
+        filters = filters or SearchFilters()
+        tenant = await self._local_tenant(user_id)
+        if tenant is not None:
+            return tenant.search(query_vector, search_fetch_limit(limit), filters.local_where(), filters.score_threshold)
+        response = await self.client.query_points(
             collection_name=self.collection_name,
-            query_vector=query_vector,
-            query_filter=models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="user_id",
-                        match=models.MatchValue(value=user_id)
+            query=query_vector,
+            query_filter=self._search_filter(user_id, filters),
+            limit=search_fetch_limit(limit),
+            score_threshold=filters.score_threshold,
+            search_params=self._search_params(),
+            with_payload=with_payload,
+        )
+        return [(hit.id, hit.score, hit.payload) for hit in response.points]
+
+    @instrument("vector_search")
+    async def search_note_hits_batch(
+        self,
+        user_id: str,
+        query_vectors: list[list[float]],
+        limit: int = 5,
+        with_payload: bool | list[str] = True,
+        filters: SearchFilters | None = None,
+    ) -> list[list[models.ScoredPoint]]:
+        """Runs several searches for one user in a single Qdrant round trip; one list of note hits per query vector."""
+        filters = filters or SearchFilters()
+        tenant = await self._local_tenant(user_id)
+        if tenant is not None:
+            where = filters.local_where()
+            batches = [
+                tenant.search(vector, search_fetch_limit(limit), where, filters.score_threshold) for vector in query_vectors
+            ]
+        else:
+            search_filter = self._search_filter(user_id, filters)
+            responses = await self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=vector,
+                        filter=search_filter,
+                        limit=search_fetch_limit(limit),
+                        score_threshold=filters.score_threshold,
+                        params=self._search_params(),
+                        with_payload=with_payload,
                     )
-                ]
-            ),
-            limit=limit,
-            with_payload=False, # We only need the IDs
+                    for vector in query_vectors
+                ],
+            )
+            batches = [[(hit.id, hit.score, hit.payload) for hit in response.points] for response in responses]
+        return [
+            [models.ScoredPoint(id=note_id, version=0, score=score, payload=payload) for note_id, score, payload in collapse_chunks(hits, limit)]
+            for hits in batches
+        ]
+
+    @instrument("vector_search")
+    async def recommend_notes(
+        self,
+        user_id: str,
+        positive: list[uuid.UUID],
+        negative: list[uuid.UUID] | None = None,
+        limit: int = 5,
+        with_payload: bool | list[str] = True,
+    ) -> list[models.ScoredPoint] | None:
+        """The user's notes closest to the stored vectors of example notes, without embedding anything.
+
+        Each example is its note's first chunk. Results are Qdrant recommendations
+        (average_vector) and never include the examples themselves. Returns None when
+        an example isn't one of the user's indexed notes.
+        """
+        negative = negative or []
+        examples = [str(note_id) for note_id in dict.fromkeys((*positive, *negative))]
+        tenant = await self._local_tenant(user_id)
+        if tenant is not None:
+            excluded = {point_id for note_id in examples for point_id, _ in tenant.note_points(note_id)}
+            hits = tenant.recommend(
+                [str(note_id) for note_id in positive], [str(note_id) for note_id in negative],
+                search_fetch_limit(limit) + len(excluded),
+            )
+            if hits is None:
+                return None
+            hits = [hit for hit in hits if hit[0] not in excluded]
+        else:
+            records = await self.client.retrieve(
+                collection_name=self.collection_name, ids=examples, with_payload=["user_id"], with_vectors=False
+            )
+            if len(records) != len(examples) or any((record.payload or {}).get("user_id") != user_id for record in records):
+                return None
+            response = await self.client.query_points(
+                collection_name=self.collection_name,
+                query=models.RecommendQuery(
+                    recommend=models.RecommendInput(
+                        positive=[str(note_id) for note_id in positive],
+                        negative=[str(note_id) for note_id in negative] or None,
+                        strategy=models.RecommendStrategy.AVERAGE_VECTOR,
+                    )
+                ),
+                query_filter=models.Filter(
+                    must=self._user_filter(user_id).must,
+                    # The examples' other chunks
+                    must_not=[models.FieldCondition(key="note_id", match=models.MatchAny(any=examples))],
+                ),
+                limit=search_fetch_limit(limit),
+                search_params=self._search_params(),
+                with_payload=with_payload,
+            )
+            hits = [(hit.id, hit.score, hit.payload) for hit in response.points]
+        return [
+            models.ScoredPoint(id=note_id, version=0, score=score, payload=payload)
+            for note_id, score, payload in collapse_chunks(hits, limit)
+        ]
+
+    @instrument("vector_read")
+    async def get_chunk_hashes(self, note_id: uuid.UUID, user_id: str) -> list[str | None]:
+        """The content hash of each of a user's note's stored chunks, by chunk index; empty if none are stored.
+
+        Always read from Qdrant: this decides whether a write re-embeds, and a local
+        tenant copy may predate another worker's write to the note.
+        """
+        payloads = []
+        offset = None
+        while True:
+            records, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._note_filter(note_id, user_id),
+                limit=SCROLL_PAGE_SIZE,
+                offset=offset,
+                with_payload=["chunk", "chunk_hash", "content_hash"],
+                with_vectors=False,
+            )
+            payloads.extend(record.payload or {} for record in records)
+            if offset is None:
+                return chunk_hashes(payloads)
+
+    @instrument("vector_write")
+    async def delete_note(self, note_id: uuid.UUID, user_id: str | None = None):
+        """Deletes all of a note's chunk points; with `user_id`, only if the note is that user's."""
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=self._note_filter(note_id, user_id)),
         )
-        return [uuid.UUID(hit.id) for hit in search_result]
+        self._delete_local_chunks(note_id, user_id)
 
-    async def delete_note(self, note_id: uuid.UUID):
-        """Deletes a note's vector from the collection."""
+    @instrument("vector_write")
+    async def delete_stale_chunks(self, chunk_counts: dict[uuid.UUID, int]):
+        """Deletes the chunk points past each note's current chunk count, e.g. after a note got shorter."""
+        if not chunk_counts:
+            return
         await self.client.delete(
             collection_name=self.collection_name,
-            points_selector=models.PointIdsList(points=[str(note_id)]),
+            points_selector=models.FilterSelector(
+                filter=models.Filter(
+                    should=[
+                        models.Filter(
+                            must=[
+                                models.FieldCondition(key="note_id", match=models.MatchValue(value=str(note_id))),
+                                models.FieldCondition(key="chunk", range=models.Range(gte=count)),
+                            ]
+                        )
+                        for note_id, count in chunk_counts.items()
+                    ]
+                )
+            ),
+        )
+        for note_id, count in chunk_counts.items():
+            self._delete_local_chunks(note_id, first_chunk=count)
+
+    def _delete_local_chunks(self, note_id: uuid.UUID, user_id: str | None = None, first_chunk: int = 0):
+        if self.local_index is None:
+            return
+        points = self.local_index.note_points(str(note_id))
+        if points is None:
+            self.local_index.mark_written(user_id)
+            return
+        for point_id, payload in points:
+            if payload.get("chunk", 0) >= first_chunk:
+                self.local_index.delete(point_id, user_id)
+
+
+class InMemoryVectorDBService(VectorDBService):
+    """A Qdrant-free backend that keeps every tenant in the local index.
+
+    Meant for local development and benchmarking; vectors live only in this process.
+    """
+
+    def __init__(self, collection_name: str, dimension: int = settings.EMBEDDING_DIMENSION):
+        self.collection_name = collection_name
+        self.quantization = "none"
+        self.tenant_mode = False
+        self.client = None
+        self.local_index = LocalVectorIndex(
+            dimension=dimension, memory_budget_bytes=2**63, max_tenant_points=2**63
         )
 
+    async def setup_collection(self):
+        logger.info("In-memory vector collection is ready", extra={"collection": self.collection_name})
+
+    async def _local_tenant(self, user_id: str) -> TenantIndex:
+        return self.local_index.peek(user_id) or self.local_index.load(user_id, [])
+
+    def invalidate_local_tenant(self, user_id: str):
+        pass  # The local index is the only copy, never stale
+
+    async def upsert_note(self, note_id: uuid.UUID, user_id: str, vector: list[float], payload: dict | None = None):
+        await self.upsert_notes([(note_id, user_id, vector, payload)])
+
+    async def upsert_notes(self, notes: list[tuple[uuid.UUID, str, list[float], dict | None]]):
+        for note_id, user_id, vector, payload in notes:
+            await self._local_tenant(user_id)
+            self.local_index.upsert(user_id, str(note_id), vector, {"user_id": user_id, **(payload or {})})
+
+    async def update_note_payload(self, note_id: uuid.UUID, payload: dict):
+        self._set_local_payload(note_id, payload)
+
+    async def get_chunk_hashes(self, note_id: uuid.UUID, user_id: str) -> list[str | None]:
+        points = self.local_index.note_points(str(note_id)) or []
+        return chunk_hashes([payload for _, payload in points if payload.get("user_id") == user_id])
+
+    async def delete_note(self, note_id: uuid.UUID, user_id: str | None = None):
+        self._delete_local_chunks(note_id, user_id)
+
+    async def delete_stale_chunks(self, chunk_counts: dict[uuid.UUID, int]):
+        for note_id, count in chunk_counts.items():
+            self._delete_local_chunks(note_id, first_chunk=count)
+
+def build_local_index() -> LocalVectorIndex | None:
+    if not settings.LOCAL_INDEX_ENABLED:
+        return None
+    return LocalVectorIndex(
+        dimension=settings.EMBEDDING_DIMENSION,
+        memory_budget_bytes=settings.LOCAL_INDEX_MEMORY_BUDGET_MB * 1024 * 1024,
+        max_tenant_points=settings.LOCAL_INDEX_MAX_TENANT_POINTS,
+        ttl_seconds=settings.LOCAL_INDEX_TTL_SECONDS,
+    )
+
 @lru_cache()
 def get_vector_db_service() -> VectorDBService:
-    service = VectorDBService(
-        url=settings.QDRANT_URL,
-        api_key=settings.QDRANT_API_KEY,
-        collection_name=settings.QDRANT_COLLECTION_NAME
-    )
-    service.setup_collection()
+    if settings.VECTOR_BACKEND == "memory":
+        service = InMemoryVectorDBService(collection_name=settings.QDRANT_COLLECTION_NAME)
+    else:
+        service = VectorDBService(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY,
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            local_index=build_local_index()
+        )
     return service
@@ -0,0 +1,79 @@
+"""Measures recall and memory of each Qdrant storage mode against full precision.
+
+Loads the same synthetic, clustered vectors into one temporary collection per mode
+on the Qdrant instance at QDRANT_URL, then reports recall@k against exact search,
+the vector memory ratio and the median search latency.
+
+    python -m benchmarks.bench_quantization_recall --points 20000 --dimension 1024
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import numpy as np
+from qdrant_client.http import models
+from app.core.config import settings
+from app.services.vector_db import VectorDBService, build_quantization_config
+
+USER_ID = "bench-user"
+
+
+def clustered_vectors(count: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Gaussian clusters roughly mimic how note embeddings bunch by topic."""
+    centres = rng.normal(size=(clusters, dimension))
+    labels = rng.integers(0, clusters, size=count)
+    return (centres[labels] + 0.35 * rng.normal(size=(count, dimension))).astype(np.float32)
+
+
+async def bench_mode(mode: str, points: np.ndarray, queries: np.ndarray, limit: int) -> dict:
+    collection = f"bench-quantization-{mode}-{uuid.uuid4().hex[:8]}"
+    service = VectorDBService(settings.QDRANT_URL, settings.QDRANT_API_KEY, collection, quantization=mode)
+    await service.client.create_collection(
+        collection_name=collection,
+        vectors_config=models.VectorParams(size=points.shape[1], distance=models.Distance.COSINE),
+        quantization_config=build_quantization_config(mode),
+    )
+    try:
+        for start in range(0, len(points), 512):
+            await service.upsert_notes([
+                (uuid.uuid4(), USER_ID, vector.tolist(), None) for vector in points[start:start + 512]
+            ])
+
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            await service.search_notes(USER_ID, query.tolist(), limit=limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        report = await service.measure_recall(USER_ID, [query.tolist() for query in queries], limit=limit)
+        report["p50_ms"] = statistics.median(latencies)
+        report["vector_mb"] = len(points) * points.shape[1] * 4 * report["memory_ratio"] / 2**20
+        return report
+    finally:
+        await service.client.delete_collection(collection)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dimension", type=int, default=settings.EMBEDDING_DIMENSION)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--modes", default="none,scalar,binary")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    points = clustered_vectors(args.points, args.dimension, args.clusters, rng)
+    queries = clustered_vectors(args.queries, args.dimension, args.clusters, rng)
+
+    print(f"{'mode':<8} {'recall@' + str(args.limit):>10} {'memory':>8} {'vector MB':>10} {'p50 ms':>8}")
+    for mode in args.modes.split(","):
+        report = await bench_mode(mode, points, queries, args.limit)
+        print(f"{mode:<8} {report['recall']:>10.3f} {report['memory_ratio']:>7.3f}x "
+              f"{report['vector_mb']:>10.1f} {report['p50_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""Compares one POST /notes/search/batch call with N sequential GET /notes/search calls.
+
+Boots the app on the in-process fakes (benchmarks.fakes, with injected latency),
+seeds one user's notes, then for each batch size times N sequential searches against
+one batch call carrying the same N queries. Every round uses fresh queries, and the
+search cache is off, so neither side is served from a cache.
+
+    python -m benchmarks.bench_search_batch --sizes 1,5,10,20 --rounds 10 \\
+        --latency embedding=80,qdrant=5,db=20
+"""
+import os
+
+# Settings are read on import; the fakes replace every service these point at
+for name, value in {
+    "SUPABASE_URL": "http://supabase.bench",
+    "SUPABASE_ANON_KEY": "bench-anon-key",
+    "QDRANT_URL": "http://qdrant.bench",
+    "JINA_API_KEY": "bench-jina-key",
+    "EMBEDDING_MODEL": "jina-embeddings-v3",
+    "RATE_LIMIT_ENABLED": "false",
+    "SEARCH_CACHE_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+}.items():
+    os.environ.setdefault(name, value)
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+import httpx
+from benchmarks.fakes import Latency, bench_token, configure_fakes
+from benchmarks.load_test import WORDS, note_text
+
+USER = "bench-user-0"
+
+
+def fresh_queries(counter: itertools.count, n: int) -> list[str]:
+    return [f"{WORDS[i % len(WORDS)]} {WORDS[(i * 5) % len(WORDS)]} query {next(counter)}" for i in range(n)]
+
+
+async def run(sizes: list[int], rounds: int, latency: Latency, seed_notes: int) -> dict:
+    configure_fakes(latency)
+    from app.main import create_app
+
+    app = create_app()
+    headers = {"Authorization": f"Bearer {bench_token(USER)}"}
+    counter = itertools.count()
+    report = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+            for i in range(seed_notes):
+                await client.post("/notes/", json={"content": note_text(0, i)}, headers=headers)
+
+            for size in sizes:
+                sequential, batched = [], []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    for query in fresh_queries(counter, size):
+                        response = await client.get("/notes/search", params={"q": query}, headers=headers)
+                        assert response.status_code == 200, response.text
+                    sequential.append((time.perf_counter() - started) * 1000)
+
+                    started = time.perf_counter()
+                    response = await client.post("/notes/search/batch", json={"queries": fresh_queries(counter, size)}, headers=headers)
+                    assert response.status_code == 200, response.text
+                    batched.append((time.perf_counter() - started) * 1000)
+                report[size] = {"sequential_ms": statistics.median(sequential), "batch_ms": statistics.median(batched)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,5,10,20", help="Comma-separated numbers of queries per batch")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", default="embedding=80,qdrant=5,db=20")
+    parser.add_argument("--seed-notes", type=int, default=50)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = asyncio.run(run(sizes, args.rounds, Latency.parse(args.latency), args.seed_notes))
+
+    print(f"{'queries':>8} {'sequential ms':>14} {'batch ms':>10} {'speedup':>8}")
+    for size, stats in report.items():
+        print(f"{size:>8} {stats['sequential_ms']:>14.1f} {stats['batch_ms']:>10.1f} {stats['sequential_ms'] / stats['batch_ms']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compares response_model validation against the fast serialization path for a note list.
+
+Builds two minimal apps that return the same 100 trusted note rows, one through
+response_model=List[NoteSchema] and one through note_response, calls them over ASGI
+in-process and reports the median request time and response size for each.
+
+    python -m benchmarks.bench_serialization --notes 100 --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from app.core.config import settings
+from app.core.responses import note_response
+from app.models.note import NoteSchema
+
+
+def make_rows(count: int, content_chars: int) -> list[dict]:
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": "bench-user",
+            "title": f"Note {i}",
+            "content": ("lorem ipsum dolor sit amet " * (content_chars // 27 + 1))[:content_chars],
+            "tags": ["bench", f"tag-{i % 5}"],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(rows: list[dict], fast: bool, compress: bool) -> FastAPI:
+    app = FastAPI()
+    if compress:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+
+    if fast:
+        @app.get("/notes")
+        async def list_notes():
+            return note_response(rows)
+    else:
+        @app.get("/notes", response_model=List[NoteSchema], response_model_exclude_unset=True)
+        async def list_notes():
+            return rows
+    return app
+
+
+async def bench(app: FastAPI, requests: int, compress: bool) -> dict:
+    headers = {"Accept-Encoding": "gzip" if compress else "identity"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(20):  # warm up
+            await client.get("/notes", headers=headers)
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get("/notes", headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": statistics.median(latencies),
+        "wire_bytes": int(response.headers["content-length"]),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    rows = make_rows(args.notes, args.content_chars)
+    settings.FAST_SERIALIZATION = True
+    print(f"{'mode':<22} {'p50 ms':>8} {'bytes':>9}")
+    for compress in (False, True):
+        baseline = None
+        for fast in (False, True):
+            report = await bench(build_app(rows, fast, compress), args.requests, compress)
+            label = f"{'fast' if fast else 'response_model'}{' +gzip' if compress else ''}"
+            speedup = f"  x{baseline / report['p50_ms']:.2f}" if baseline else ""
+            print(f"{label:<22} {report['p50_ms']:>8.3f} {report['wire_bytes']:>9}{speedup}")
+            baseline = baseline or report["p50_ms"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=100)
+    parser.add_argument("--content-chars", type=int, default=1500)
+    parser.add_argument("--requests", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""Measures import time and cold start of the app, optionally against another git ref.
+
+Each sample runs in a fresh interpreter: it times `import app.main`, then boots the app
+on the in-process fakes (benchmarks.fakes, with injected latency) and times the
+lifespan start-up and the first authenticated list and search requests. Pass --ref to
+run the same measurement on another commit via a temporary git worktree, e.g. the
+commit before lazy imports and the background warmup.
+
+    python -m benchmarks.bench_startup --samples 5 --ref HEAD~1
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Runs in the child process; only uses APIs that predate this benchmark so older refs work too
+CHILD = r"""
+import json, os, sys, time
+started = time.perf_counter()
+for name, value in {"SUPABASE_URL": "http://supabase.bench", "SUPABASE_ANON_KEY": "k", "QDRANT_URL": "http://qdrant.bench",
+                    "JINA_API_KEY": "k", "EMBEDDING_MODEL": "jina-embeddings-v3", "RATE_LIMIT_ENABLED": "false",
+                    "LOG_LEVEL": "ERROR"}.items():
+    os.environ.setdefault(name, value)
+import app.main
+imported = time.perf_counter()
+
+import asyncio, httpx
+from benchmarks.fakes import Latency, bench_token, configure_fakes
+
+async def cold_start():
+    configure_fakes(Latency.parse(sys.argv[1]))
+    application = app.main.create_app()
+    headers = {"Authorization": f"Bearer {bench_token('bench-user')}"}
+    t0 = time.perf_counter()
+    async with application.router.lifespan_context(application):
+        t1 = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=application), base_url="http://bench") as client:
+            response = await client.get("/notes/", headers=headers)
+            assert response.status_code == 200, response.text
+            t2 = time.perf_counter()
+            response = await client.get("/notes/search", params={"q": "cold start"}, headers=headers)
+            assert response.status_code == 200, response.text
+            t3 = time.perf_counter()
+            await client.get("/notes/", headers=headers)
+            t4 = time.perf_counter()
+    return {"lifespan_ms": (t1 - t0) * 1000, "first_list_ms": (t2 - t1) * 1000,
+            "first_search_ms": (t3 - t2) * 1000, "warm_list_ms": (t4 - t3) * 1000}
+
+report = asyncio.run(cold_start())
+report["import_ms"] = (imported - started) * 1000
+report["to_first_response_ms"] = report["import_ms"] + report["lifespan_ms"] + report["first_list_ms"]
+print(json.dumps(report))
+"""
+
+METRICS = ("import_ms", "lifespan_ms", "first_list_ms", "first_search_ms", "warm_list_ms", "to_first_response_ms")
+
+
+def measure(backend_dir: Path, samples: int, latency: str) -> dict:
+    runs = []
+    for _ in range(samples):
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD, latency], cwd=backend_dir, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Start-up sample failed in {backend_dir}:\n{result.stderr}")
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+
+
+def measure_ref(ref: str, samples: int, latency: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = Path(tmp) / "tree"
+        subprocess.run(["git", "worktree", "add", "--detach", str(worktree), ref], cwd=BACKEND_DIR, check=True, capture_output=True)
+        try:
+            return measure(worktree / BACKEND_DIR.name, samples, latency)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(worktree)], cwd=BACKEND_DIR, capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--latency", default="embedding=80,qdrant=5,db=20,auth=40")
+    parser.add_argument("--ref", help="Also measure this git ref for comparison")
+    args = parser.parse_args()
+
+    columns = {"current": measure(BACKEND_DIR, args.samples, args.latency)}
+    if args.ref:
+        columns[args.ref] = measure_ref(args.ref, args.samples, args.latency)
+
+    print(f"{'median ms':<22}" + "".join(f"{name:>14}" for name in columns))
+    for metric in METRICS:
+        print(f"{metric:<22}" + "".join(f"{report[metric]:>14.1f}" for report in columns.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Measures per-user search latency as the number of users in the collection grows.
+
+For each user count and layout ("shared": one global HNSW graph filtered by user_id,
+"tenant": a tenant user_id index with per-user graphs) a temporary collection on the
+Qdrant instance at QDRANT_URL is filled with the same number of points per user, then
+user-filtered searches are timed for random users. In the tenant layout the latency
+should stay flat as users are added, since each search only walks one user's graph.
+
+    python -m benchmarks.bench_tenant_search --users 10,100,1000 --points-per-user 500
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+import numpy as np
+from qdrant_client.http import models
+from app.core.config import settings
+from app.services.vector_db import VectorDBService, build_hnsw_config, user_id_index_schema
+from benchmarks.bench_quantization_recall import clustered_vectors
+
+
+async def wait_until_indexed(service: VectorDBService, timeout: float = 1800):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = await service.client.get_collection(service.collection_name)
+        if info.status == models.CollectionStatus.GREEN:
+            return
+        await asyncio.sleep(1)
+    raise TimeoutError(f"Collection '{service.collection_name}' did not finish indexing")
+
+
+async def bench_layout(tenant_mode: bool, users: int, args: argparse.Namespace, rng: np.random.Generator) -> dict:
+    collection = f"bench-tenant-{'tenant' if tenant_mode else 'shared'}-{users}-{uuid.uuid4().hex[:8]}"
+    service = VectorDBService(settings.QDRANT_URL, settings.QDRANT_API_KEY, collection, quantization="none", tenant_mode=tenant_mode)
+    hnsw = build_hnsw_config(tenant_mode)
+    # Lower the thresholds so graphs are built and used even for modest collections and tenants
+    hnsw.full_scan_threshold = args.full_scan_threshold
+    await service.client.create_collection(
+        collection_name=collection,
+        vectors_config=models.VectorParams(size=args.dimension, distance=models.Distance.COSINE),
+        hnsw_config=hnsw,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=args.full_scan_threshold),
+    )
+    await service.client.create_payload_index(collection, "user_id", field_schema=user_id_index_schema(tenant_mode), wait=True)
+    try:
+        user_ids = [f"user-{i}" for i in range(users)]
+        for user_id in user_ids:
+            vectors = clustered_vectors(args.points_per_user, args.dimension, args.clusters, rng)
+            await service.upsert_notes([(uuid.uuid4(), user_id, vector.tolist(), None) for vector in vectors])
+        await wait_until_indexed(service)
+
+        queries = clustered_vectors(args.queries, args.dimension, args.clusters, rng)
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            await service.search_notes(random.choice(user_ids), query.tolist(), limit=args.limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        return {
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        }
+    finally:
+        await service.client.delete_collection(collection)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="10,100,1000")
+    parser.add_argument("--points-per-user", type=int, default=500)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--full-scan-threshold", type=int, default=100, help="KB; Qdrant's default is 10000")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    random.seed(42)
+    print(f"{'users':>7} {'points':>9} {'layout':<8} {'p50 ms':>8} {'p95 ms':>8}")
+    for users in (int(count) for count in args.users.split(",")):
+        for tenant_mode in (False, True):
+            report = await bench_layout(tenant_mode, users, args, rng)
+            print(f"{users:>7} {users * args.points_per_user:>9} {'tenant' if tenant_mode else 'shared':<8} "
+                  f"{report['p50_ms']:>8.2f} {report['p95_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,274 @@
+"""In-process fakes of Jina, Qdrant and Supabase for benchmarking the API without any services.
+
+Each fake can add latency to stand in for the network hop it replaces; `configure_fakes`
+wires them into the app's cached service providers so `create_app()` uses them.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import httpx
+import jwt
+import numpy as np
+
+BENCH_JWT_SECRET = "bench-secret-with-at-least-32-bytes!"
+
+# The keyset filter built by NoteService.get_notes_page
+KEYSET_FILTER = re.compile(r'created_at\.lt\."(?P<ts>[^"]+)",and\(created_at\.eq\."(?P=ts)",id\.lt\.(?P<id>[^)]+)\)')
+
+
+@dataclass
+class Latency:
+    """Injected per-call latency in milliseconds, each scaled by up to +/- `jitter`."""
+    embedding: float = 0.0
+    qdrant: float = 0.0
+    db: float = 0.0
+    auth: float = 0.0
+    jitter: float = 0.0
+    _rng: random.Random = field(default_factory=lambda: random.Random(42), repr=False)
+
+    @classmethod
+    def parse(cls, spec: str, jitter: float = 0.0) -> "Latency":
+        """Parses "embedding=80,qdrant=5,db=20,auth=40"."""
+        values = {}
+        for item in filter(None, spec.split(",")):
+            name, _, ms = item.partition("=")
+            if name.strip() not in ("embedding", "qdrant", "db", "auth"):
+                raise ValueError(f"Unknown latency stage: {name}")
+            values[name.strip()] = float(ms)
+        return cls(jitter=jitter, **values)
+
+    def seconds(self, stage: str) -> float:
+        ms = getattr(self, stage)
+        if ms and self.jitter:
+            ms *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        return ms / 1000
+
+
+def fake_embedding(text: str, dimension: int) -> list[float]:
+    """A deterministic unit vector per text, so repeated texts embed identically."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).normal(size=dimension)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@dataclass
+class Faults:
+    """Injected embedding API faults: a share of requests fail with 503, and a share stall for `slow_ms`."""
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_ms: float = 2000.0
+    _rng: random.Random = field(default_factory=lambda: random.Random(7), repr=False)
+
+    def __post_init__(self):
+        for name in ("error_rate", "slow_rate"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+
+def jina_transport(latency: Latency, dimension: int, faults: Faults | None = None) -> httpx.MockTransport:
+    """An httpx transport answering Jina embedding requests in-process."""
+    faults = faults or Faults()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency.seconds("embedding"))
+        if faults.slow_rate and faults._rng.random() < faults.slow_rate:
+            await asyncio.sleep(faults.slow_ms / 1000)
+        if faults.error_rate and faults._rng.random() < faults.error_rate:
+            return httpx.Response(503, json={"detail": "injected fault"})
+        body = json.loads(request.content)
+        data = [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(text, body.get("dimensions", dimension))}
+            for i, text in enumerate(body["input"])
+        ]
+        return httpx.Response(200, json={"model": body["model"], "data": data})
+
+    return httpx.MockTransport(handler)
+
+
+def with_latency(service, methods: tuple[str, ...], latency: Latency, stage: str):
+    """Wraps the given coroutine methods of one service instance to sleep before running."""
+    for name in methods:
+        method = getattr(service, name)
+
+        @functools.wraps(method)
+        async def delayed(*args, _method=method, **kwargs):
+            await asyncio.sleep(latency.seconds(stage))
+            return await _method(*args, **kwargs)
+
+        setattr(service, name, delayed)
+    return service
+
+
+class FakeQuery:
+    """Just enough of the PostgREST query builder for the queries NoteService issues."""
+
+    def __init__(self, store: "FakeSupabase", table: str):
+        self.store = store
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.values = None
+        self.filters = []
+        self.orders = []
+        self.offset = 0
+        self.count = None
+
+    def select(self, columns: str = "*"):
+        self.columns = columns
+        return self
+
+    def insert(self, values):
+        self.action, self.values = "insert", values
+        return self
+
+    def update(self, values: dict):
+        self.action, self.values = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def lte(self, column: str, value):
+        self.filters.append(lambda row: str(row.get(column)) <= str(value))
+        return self
+
+    def in_(self, column: str, values: list):
+        wanted = {str(value) for value in values}
+        self.filters.append(lambda row: str(row.get(column)) in wanted)
+        return self
+
+    def or_(self, expression: str):
+        match = KEYSET_FILTER.fullmatch(expression)
+        if match is None:
+            raise NotImplementedError(f"FakeQuery only supports the keyset filter, got: {expression}")
+        created_at, note_id = match["ts"], match["id"]
+        self.filters.append(lambda row: (row["created_at"], row["id"]) < (created_at, note_id))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self.count = count
+        return self
+
+    def range(self, start: int, end: int):
+        self.offset, self.count = start, end - start + 1
+        return self
+
+    def _project(self, row: dict) -> dict:
+        if self.columns == "*":
+            return dict(row)
+        return {column: row.get(column) for column in self.columns.split(",")}
+
+    def execute(self):
+        time.sleep(self.store.latency.seconds("db"))  # Runs on the DBExecutor pool like a real round trip
+        with self.store.lock:
+            rows = self.store.tables.setdefault(self.table, {})
+            if self.action == "insert":
+                inserted = [self.store.new_row(values) for values in (self.values if isinstance(self.values, list) else [self.values])]
+                rows.update((row["id"], row) for row in inserted)
+                return SimpleNamespace(data=[dict(row) for row in inserted])
+
+            matched = [row for row in rows.values() if all(check(row) for check in self.filters)]
+            if self.action == "update":
+                for row in matched:
+                    row.update(self.values, updated_at=self.store.now())
+                return SimpleNamespace(data=[dict(row) for row in matched])
+            if self.action == "delete":
+                for row in matched:
+                    del rows[row["id"]]
+                return SimpleNamespace(data=matched)
+
+            for column, desc in reversed(self.orders):
+                matched.sort(key=lambda row: row[column], reverse=desc)
+            end = None if self.count is None else self.offset + self.count
+            return SimpleNamespace(data=[self._project(row) for row in matched[self.offset:end]])
+
+
+class FakeSupabase:
+    """An in-memory stand-in for the supabase-py client: PostgREST tables and Auth."""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.tables: dict[str, dict[str, dict]] = {}
+        self.lock = threading.Lock()
+        self.auth = SimpleNamespace(get_user=self._get_user)
+        self._clock = datetime.now(timezone.utc)
+
+    def now(self) -> str:
+        # Strictly increasing timestamps keep keyset order stable under concurrent inserts
+        self._clock += timedelta(microseconds=1)
+        return self._clock.isoformat()
+
+    def new_row(self, values: dict) -> dict:
+        now = self.now()
+        return {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, "tags": [], **values}
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def _get_user(self, token: str):
+        time.sleep(self.latency.seconds("auth"))
+        claims = jwt.decode(token, BENCH_JWT_SECRET, algorithms=["HS256"], audience="authenticated")
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"], email=claims.get("email")))
+
+
+def bench_token(user_id: str) -> str:
+    """An HS256 access token shaped like Supabase's, signed with BENCH_JWT_SECRET."""
+    claims = {
+        "sub": user_id,
+        "email": f"{user_id}@bench.local",
+        "role": "authenticated",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, BENCH_JWT_SECRET, algorithm="HS256")
+
+
+def configure_fakes(latency: Latency, auth_mode: str = "local", faults: Faults | None = None) -> FakeSupabase:
+    """Points the app's service providers at the fakes. Call before create_app()."""
+    from app.api import deps
+    from app.core.config import settings
+    from app.core.security import JWTVerifier
+    from app.services.ai_services import get_ai_service
+    from app.services.indexing import get_indexing_pipeline
+    from app.services.rate_limiter import get_rate_limiter
+    from app.services.search_cache import get_search_cache
+    from app.services.vector_db import get_vector_db_service
+
+    settings.VECTOR_BACKEND = "memory"
+    settings.AUTH_MODE = auth_mode
+    for provider in (get_ai_service, get_vector_db_service, get_indexing_pipeline, get_rate_limiter, get_search_cache):
+        provider.cache_clear()
+
+    supabase = FakeSupabase(latency)
+    deps.supabase_client = supabase
+    deps.jwt_verifier = JWTVerifier(jwks_url="", jwt_secret=BENCH_JWT_SECRET)
+
+    get_ai_service().transport = jina_transport(latency, settings.EMBEDDING_DIMENSION, faults)
+    with_latency(
+        get_vector_db_service(),
+        (
+            "upsert_note", "upsert_notes", "update_note_payload", "get_chunk_hashes",
+            "search_notes", "search_note_hits", "search_note_hits_batch", "recommend_notes", "delete_note", "delete_stale_chunks",
+        ),
+        latency,
+        "qdrant",
+    )
+    return supabase
@@ -0,0 +1,210 @@
+"""Load test of the full API against in-process fakes of Jina, Qdrant and Supabase.
+
+Boots app.main.create_app() (lifespan included) with the fakes from benchmarks.fakes,
+then runs virtual users concurrently, each looping through create, get, list,
+update, search and delete on its own notes. Reports throughput and p50/p95/p99 per
+endpoint, saves the results as JSON tagged with the git commit, and compares them
+with a baseline run when one is given.
+
+    python -m benchmarks.load_test --concurrency 32 --duration 20 \\
+        --latency embedding=80,qdrant=5,db=20,auth=40 --baseline benchmarks/results/<earlier>.json
+
+--embedding-error-rate and --embedding-slow-rate inject embedding API faults to exercise
+the hedging, concurrency limit and circuit breaker in app.services.resilience.
+"""
+import os
+
+# Settings are read on import; the fakes replace every service these point at
+for name, value in {
+    "SUPABASE_URL": "http://supabase.bench",
+    "SUPABASE_ANON_KEY": "bench-anon-key",
+    "QDRANT_URL": "http://qdrant.bench",
+    "JINA_API_KEY": "bench-jina-key",
+    "EMBEDDING_MODEL": "jina-embeddings-v3",
+    "RATE_LIMIT_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+}.items():
+    os.environ.setdefault(name, value)
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+from benchmarks.fakes import Faults, Latency, bench_token, configure_fakes
+
+RESULTS_DIR = Path(__file__).parent / "results"
+ENDPOINTS = ("create", "get", "list", "update", "search", "delete")
+WORDS = "vector note search index latency cache tenant budget shard graph query embed".split()
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def note_text(user: int, i: int) -> str:
+    words = [WORDS[(user * 7 + i * 3 + k) % len(WORDS)] for k in range(40)]
+    return f"Note {i} of user {user}: " + " ".join(words)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors: dict[str, int] = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.recording = False
+
+    async def call(self, endpoint: str, request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await request
+        if self.recording:
+            self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+            self.errors[endpoint] += response.status_code >= 400
+        return response
+
+
+async def virtual_user(client: httpx.AsyncClient, user: int, recorder: Recorder, deadline: float, max_iterations: int):
+    headers = {"Authorization": f"Bearer {bench_token(f'bench-user-{user}')}"}
+    iteration = 0
+    while time.perf_counter() < deadline and (not max_iterations or iteration < max_iterations):
+        created = await recorder.call("create", client.post("/notes/", json={"content": note_text(user, iteration), "tags": ["bench"]}, headers=headers))
+        if created.status_code != 201:
+            iteration += 1
+            continue
+        note_id = created.json()["id"]
+        await recorder.call("get", client.get(f"/notes/{note_id}", headers=headers))
+        await recorder.call("list", client.get("/notes/", params={"page_size": 20}, headers=headers))
+        await recorder.call("update", client.put(f"/notes/{note_id}", json={"content": note_text(user, iteration + 1)}, headers=headers))
+        await recorder.call("search", client.get("/notes/search", params={"q": note_text(user + 1, iteration)[:60]}, headers=headers))
+        await recorder.call("delete", client.delete(f"/notes/{note_id}", headers=headers))
+        iteration += 1
+
+
+async def seed(client: httpx.AsyncClient, users: int, notes_per_user: int):
+    async def seed_user(user: int):
+        headers = {"Authorization": f"Bearer {bench_token(f'bench-user-{user}')}"}
+        for i in range(notes_per_user):
+            await client.post("/notes/", json={"content": note_text(user, 10_000 + i)}, headers=headers)
+
+    await asyncio.gather(*(seed_user(user) for user in range(users)))
+
+
+async def run_load(
+    concurrency: int = 16,
+    duration: float = 10.0,
+    iterations: int = 0,
+    latency: Latency | None = None,
+    auth_mode: str = "local",
+    seed_notes: int = 20,
+    faults: Faults | None = None,
+) -> dict:
+    """Runs the load test and returns its report; `iterations` > 0 caps each user's loops."""
+    latency = latency or Latency()
+    configure_fakes(latency, auth_mode, faults)
+    from app.main import create_app
+
+    app = create_app()
+    recorder = Recorder()
+    async with app.router.lifespan_context(app):
+        # Count server errors (e.g. from injected faults) instead of raising them in the client
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            await seed(client, concurrency, seed_notes)
+            recorder.recording = True
+            started = time.perf_counter()
+            deadline = started + duration if duration else float("inf")
+            await asyncio.gather(*(
+                virtual_user(client, user, recorder, deadline, iterations) for user in range(concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for endpoint, latencies in recorder.latencies.items():
+        latencies.sort()
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[endpoint],
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+        }
+    total = sum(stats["requests"] for stats in endpoints.values())
+    return {
+        "elapsed_s": elapsed,
+        "requests": total,
+        "errors": sum(stats["errors"] for stats in endpoints.values()),
+        "rps": total / elapsed if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    print(f"{'endpoint':<8} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, stats in report["endpoints"].items():
+        line = (f"{endpoint:<8} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8.1f} "
+                f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+        before = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if before and before["p95_ms"]:
+            line += f"   p95 {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:+.1f}%"
+        print(line)
+    summary = f"total    {report['requests']:>9} {report['errors']:>7} {report['rps']:>8.1f} req/s over {report['elapsed_s']:.1f}s"
+    if baseline and baseline.get("rps"):
+        summary += f"   throughput {(report['rps'] / baseline['rps'] - 1) * 100:+.1f}% vs {baseline.get('commit', '?')}"
+    print(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users running in parallel")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run for")
+    parser.add_argument("--iterations", type=int, default=0, help="Stop each user after this many loops (0: no cap)")
+    parser.add_argument("--latency", default="", help="Injected latency in ms, e.g. embedding=80,qdrant=5,db=20,auth=40")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random +/- fraction applied to each injected latency")
+    parser.add_argument("--auth", choices=("local", "remote"), default="local", help="Verify JWTs locally or via the fake Supabase Auth")
+    parser.add_argument("--embedding-error-rate", type=float, default=0.0, help="Share of embedding calls failing with 503")
+    parser.add_argument("--embedding-slow-rate", type=float, default=0.0, help="Share of embedding calls stalling for --embedding-slow-ms")
+    parser.add_argument("--embedding-slow-ms", type=float, default=2000.0)
+    parser.add_argument("--seed-notes", type=int, default=20, help="Notes created per user before measuring")
+    parser.add_argument("--baseline", type=Path, help="Earlier results file to compare against")
+    parser.add_argument("--no-save", action="store_true", help=f"Don't write results to {RESULTS_DIR}")
+    args = parser.parse_args()
+
+    latency = Latency.parse(args.latency, jitter=args.jitter)
+    faults = Faults(args.embedding_error_rate, args.embedding_slow_rate, args.embedding_slow_ms)
+    report = asyncio.run(run_load(
+        args.concurrency, args.duration, args.iterations, latency, args.auth, args.seed_notes, faults
+    ))
+    report.update({
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {key: str(value) for key, value in vars(args).items() if key not in ("baseline", "no_save")},
+    })
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(report, baseline)
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"load-{report['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+        path.write_text(json.dumps(report, indent=2))
+        print(f"Saved results to {path}")
+
+
+if __name__ == "__main__":
+    main()
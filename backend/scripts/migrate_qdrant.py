@@ -0,0 +1,76 @@
+"""Applies the configured Qdrant layout to the existing notes collection in place.
+
+Switches the user_id index and HNSW graphs to match QDRANT_TENANT_MODE, adds the
+note_id, tags and created_at indexes that chunk lookups and search filters use and,
+with --storage, applies the quantization and on-disk settings too. Points are not
+copied; Qdrant rebuilds its indexes in the background while searches keep being
+served, and this script waits until the collection reports green again.
+
+Points stored before tags and created_at were part of every payload only match
+filtered searches once --backfill-filters has copied those fields over from
+Supabase. That reads every user's notes, so it needs SUPABASE_SERVICE_ROLE_KEY.
+
+    QDRANT_TENANT_MODE=true python -m scripts.migrate_qdrant --storage --backfill-filters
+"""
+import argparse
+import os
+import time
+from qdrant_client.http import models
+from app.core.config import settings
+from app.services.vector_db import VectorDBService
+
+
+def wait_until_green(service: VectorDBService, timeout: float, poll_seconds: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = service.sync_client.get_collection(service.collection_name)
+        print(f"status={info.status.value} points={info.points_count} indexed_vectors={info.indexed_vectors_count}")
+        if info.status == models.CollectionStatus.GREEN:
+            return True
+        time.sleep(poll_seconds)
+    return False
+
+
+def backfill_filter_payloads(service: VectorDBService, page_size: int = 500):
+    """Copies each note's tags and created_at from Supabase onto its points, a page of notes per Qdrant call."""
+    from supabase import create_client
+
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not key:
+        raise SystemExit("--backfill-filters needs SUPABASE_SERVICE_ROLE_KEY to read every user's notes.")
+    db = create_client(settings.SUPABASE_URL, key)
+    start = 0
+    while True:
+        rows = db.table("notes").select("id,tags,created_at").order("id").range(start, start + page_size - 1).execute().data
+        if rows:
+            service.backfill_payloads({row["id"]: {"tags": row.get("tags") or [], "created_at": row["created_at"]} for row in rows})
+        start += len(rows)
+        print(f"backfilled filter fields of {start} notes")
+        if len(rows) < page_size:
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage", action="store_true", help="Also apply quantization and on-disk settings")
+    parser.add_argument("--backfill-filters", action="store_true", help="Copy tags and created_at onto existing points")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds to wait for re-indexing")
+    args = parser.parse_args()
+
+    service = VectorDBService(settings.QDRANT_URL, settings.QDRANT_API_KEY, settings.QDRANT_COLLECTION_NAME)
+    layout = f"tenant (payload_m={settings.QDRANT_TENANT_PAYLOAD_M})" if service.tenant_mode else f"shared (m={settings.QDRANT_HNSW_M})"
+    print(f"Migrating '{service.collection_name}' to the {layout} layout...")
+    service.apply_tenant_settings()
+    service.create_payload_indexes()
+    if args.storage:
+        service.apply_storage_settings()
+    if args.backfill_filters:
+        backfill_filter_payloads(service)
+
+    if not wait_until_green(service, args.timeout):
+        raise SystemExit("Timed out waiting for Qdrant to finish re-indexing; it will keep going in the background.")
+    print("Migration complete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+-- Backs the keyset pagination of GET /notes/ (NoteService.get_notes_page).
+--
+-- The listing filters on user_id and orders by (created_at DESC, id DESC); with this
+-- index Postgres seeks straight to the cursor position and reads page_size rows,
+-- instead of filtering and sorting every note the user owns on each page.
+--
+-- Run once against the Supabase database, e.g.
+--     psql "$SUPABASE_DB_URL" -f scripts/notes_keyset_index.sql
+-- CONCURRENTLY keeps the table writable while the index builds, but can't run inside a
+-- transaction block: in the Supabase SQL editor, drop CONCURRENTLY or run it on its own.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS notes_user_id_created_at_id_idx
+    ON public.notes (user_id, created_at DESC, id DESC);
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import httpx
+from app.core.config import settings
+from app.services.ai_services import AIService
+
+
+def make_service(handler):
+    service = AIService(api_key="test-key")
+    service._client = httpx.AsyncClient(
+        headers=service.headers, transport=httpx.MockTransport(handler)
+    )
+    return service
+
+
+def test_generate_embedding_reuses_shared_client():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"data": [{"embedding": [0.1, 0.2]}]})
+
+    service = make_service(handler)
+
+    async def run():
+        client = service.client
+        first = await service.generate_embedding("hello world")
+        second = await service.generate_embedding("hello again")
+        assert service.client is client
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == [0.1, 0.2]
+    assert len(requests) == 2
+    body = json.loads(requests[0].content)
+    assert body == {"input": ["hello world"], "model": settings.EMBEDDING_MODEL}
+    assert requests[0].headers["Authorization"] == "Bearer test-key"
+
+
+def test_blank_text_skips_api_call():
+    def handler(request):
+        raise AssertionError("API should not be called for blank text")
+
+    service = make_service(handler)
+    vector = asyncio.run(service.generate_embedding("   "))
+    assert vector == [0.0] * settings.EMBEDDING_DIMENSION
+
+
+def test_aclose_releases_client_and_reopens_lazily():
+    service = AIService(api_key="test-key", max_connections=7, max_keepalive_connections=3)
+
+    async def run():
+        await service.start()
+        client = service.client
+        await service.aclose()
+        assert client.is_closed
+        assert service.client is not client
+        await service.aclose()
+
+    asyncio.run(run())
+
+
+def test_pool_stats_reports_limits():
+    service = AIService(api_key="test-key", max_connections=7, max_keepalive_connections=3)
+    stats = service.pool_stats()
+    assert stats["max_connections"] == 7
+    assert stats["max_keepalive_connections"] == 3
+    assert stats["connections"] == stats["idle"] == stats["waiting"] == 0
+
+    asyncio.run(service.start())
+    stats = service.pool_stats()
+    assert stats["connections"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_concurrent_embeddings_share_one_request():
+    requests = []
+
+    def handler(request):
+        texts = json.loads(request.content)["input"]
+        requests.append(texts)
+        return httpx.Response(200, json={"data": [
+            {"index": i, "embedding": [float(len(text))]} for i, text in reversed(list(enumerate(texts)))
+        ]})
+
+    service = make_service(handler)
+
+    async def run():
+        return await asyncio.gather(*(service.generate_embedding("a" * n) for n in (1, 2, 3)))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0]]
+    assert requests == [["a", "aa", "aaa"]]
+
+
+def test_generate_embeddings_skips_blank_inputs():
+    requests = []
+
+    def handler(request):
+        texts = json.loads(request.content)["input"]
+        requests.append(texts)
+        return httpx.Response(200, json={"data": [{"embedding": [1.0]} for _ in texts]})
+
+    service = make_service(handler)
+    vectors = asyncio.run(service.generate_embeddings(["first", " ", "second"]))
+    assert requests == [["first", "second"]]
+    assert vectors[0] == vectors[2] == [1.0]
+    assert vectors[1] == [0.0] * settings.EMBEDDING_DIMENSION
+
+
+def test_generate_embeddings_splits_large_inputs_into_concurrent_requests(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_MAX_SIZE", 2)
+    requests = []
+
+    def handler(request):
+        texts = json.loads(request.content)["input"]
+        requests.append(texts)
+        return httpx.Response(200, json={"data": [{"embedding": [float(len(text))]} for text in texts]})
+
+    service = make_service(handler)
+    vectors = asyncio.run(service.generate_embeddings(["a", "bb", "ccc", "dddd", "eeeee"]))
+    assert sorted(requests) == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+
+
+def test_cached_embeddings_skip_the_api():
+    from app.services.embedding_cache import EmbeddingCache
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"data": [{"embedding": [0.25, 0.5]}]})
+
+    service = make_service(handler)
+    service.cache = EmbeddingCache(model="m", dimension=2, max_entries=10, ttl_seconds=60)
+
+    async def run():
+        first = await service.generate_embedding("duplicate text")
+        second = await service.generate_embedding("duplicate text")
+        batch = await service.generate_embeddings(["duplicate text"])
+        return first, second, batch
+
+    first, second, batch = asyncio.run(run())
+    assert len(requests) == 1
+    assert second == batch[0] == first
+
+
+def test_matryoshka_dimensions_are_requested_when_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_REQUEST_DIMENSIONS", True)
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"data": [{"embedding": [1.0]}]})
+
+    service = make_service(handler)
+    asyncio.run(service.generate_embeddings(["text"]))
+    assert bodies[0]["dimensions"] == settings.EMBEDDING_DIMENSION
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from app.api.deps import get_current_user
+from app.api.routers.notes import get_note_service
+from app.main import create_app
+from app.services.bulk_import import BulkImporter, iter_ndjson
+from app.services.note_service import NoteService
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(aiter):
+    return [item async for item in aiter]
+
+
+def test_iter_ndjson_handles_lines_split_across_chunks():
+    body = b'{"content": "one"}\n\n{"content": "two"}\nnot json\n[1]\n{"content": "last"}'
+    records = asyncio.run(collect(iter_ndjson(chunked(body, 5))))
+
+    assert [line for line, _ in records] == [1, 3, 4, 5, 6]
+    assert records[0][1] == {"content": "one"}
+    assert isinstance(records[2][1], ValueError)
+    assert isinstance(records[3][1], ValueError)
+    assert records[4][1] == {"content": "last"}
+
+
+def make_service():
+    db = MagicMock()
+
+    def insert(rows):
+        query = MagicMock()
+        query.execute.return_value.data = [dict(row, id=str(uuid.uuid4())) for row in rows]
+        return query
+
+    db.table.return_value.insert.side_effect = insert
+    ai = MagicMock()
+    ai.generate_title_from_content = AsyncMock(side_effect=lambda content: content[:10])
+    ai.generate_embeddings = AsyncMock(side_effect=lambda texts: [[1.0] for _ in texts])
+    vector_db = MagicMock()
+    vector_db.upsert_notes = AsyncMock()
+    return NoteService(db, ai, vector_db)
+
+
+def test_bulk_importer_batches_inserts_embeddings_and_upserts():
+    service = make_service()
+    lines = [json.dumps({"content": f"note {i}", "tags": ["import"]}) for i in range(7)]
+    lines.insert(3, json.dumps({"tags": ["missing content"]}))
+    body = ("\n".join(lines) + "\n").encode()
+
+    report = asyncio.run(BulkImporter(service, batch_size=3, concurrency=2).run(iter_ndjson(chunked(body, 64)), "user-1"))
+
+    assert report["summary"]["created"] == 7
+    assert report["summary"]["indexed"] == 7
+    assert report["summary"]["failed"] == 1
+    assert [item["line"] for item in report["results"]] == list(range(1, 9))
+    assert report["results"][3]["status"] == "error"
+    assert service.db.table.return_value.insert.call_count == 3
+    assert service.ai.generate_embeddings.await_count == 3
+    assert service.vector_db.upsert_notes.await_count == 3
+
+
+def test_bulk_importer_reports_indexing_failures():
+    service = make_service()
+    service.vector_db.upsert_notes.side_effect = RuntimeError("qdrant down")
+    body = b'{"content": "a"}\n{"content": "b"}\n'
+
+    report = asyncio.run(BulkImporter(service, batch_size=10, concurrency=1).run(iter_ndjson(chunked(body, 64)), "user-1"))
+
+    assert report["summary"]["created"] == 2
+    assert report["summary"]["indexed"] == 0
+    assert all("reindex" in item["error"] for item in report["results"])
+
+
+def test_bulk_endpoint_streams_ndjson():
+    app = create_app()
+    service = make_service()
+    app.dependency_overrides[get_note_service] = lambda: service
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+
+    body = b'{"content": "first"}\n{"content": "second", "tags": ["x"]}\n'
+    response = TestClient(app).post("/notes/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["summary"]["created"] == 2
+    assert all(item["status"] == "created" for item in data["results"])
@@ -0,0 +1,43 @@
+import uuid
+from app.services.chunking import NoteChunks, chunk_point_id, split_text
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_text("Buy milk", 100) == ["Buy milk"]
+    assert split_text("x" * 500, 0) == ["x" * 500]
+
+
+def test_chunks_are_bounded_and_pack_paragraphs():
+    text = "\n\n".join(f"Paragraph number {i} has a few words." for i in range(20))
+    chunks = split_text(text, 120)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+
+def test_long_paragraphs_are_split_at_sentences_and_words():
+    text = "One sentence here. " * 10 + "x" * 50
+    chunks = split_text(text, 40)
+
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert chunks[0] == "One sentence here. One sentence here."
+
+
+def test_edits_only_change_the_chunks_they_touch():
+    note_id = uuid.uuid4()
+    paragraphs = [f"Paragraph {i}: " + "words " * 10 for i in range(6)]
+    before = NoteChunks.split(note_id, "\n\n".join(paragraphs), max_chars=150)
+    paragraphs[2] = paragraphs[2].replace("words", "terms", 1)
+    after = NoteChunks.split(note_id, "\n\n".join(paragraphs), max_chars=150)
+
+    assert len(before) == len(after) > 2
+    assert after.changed(before.hashes) == [1]
+    assert after.changed() == list(range(len(after)))
+
+
+def test_chunk_zero_keeps_the_note_id():
+    note_id = uuid.uuid4()
+    assert chunk_point_id(note_id, 0) == note_id
+    assert chunk_point_id(note_id, 1) != note_id
+    assert chunk_point_id(note_id, 1) == chunk_point_id(note_id, 1)
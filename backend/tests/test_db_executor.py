@@ -0,0 +1,61 @@
+import asyncio
+import time
+import pytest
+from app.services.db_executor import DBExecutor
+
+
+class SlowQuery:
+    def __init__(self, delay, result=None, error=None):
+        self.delay = delay
+        self.result = result
+        self.error = error
+
+    def execute(self):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_blocking_queries_run_concurrently_off_the_event_loop():
+    executor = DBExecutor(max_workers=10)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        results = await asyncio.gather(*(executor.execute(SlowQuery(0.1, result=i)) for i in range(10)))
+        elapsed = time.perf_counter() - started
+        ticker_task.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(run())
+    executor.shutdown()
+    assert results == list(range(10))
+    assert elapsed < 0.5  # ten 100ms queries overlap instead of taking a second
+    assert ticks >= 5  # the event loop kept running while queries blocked
+    stats = executor.stats()
+    assert stats["completed"] == 10
+    assert stats["active"] == stats["queued"] == 0
+
+
+def test_pool_size_bounds_concurrency_and_errors_are_counted():
+    executor = DBExecutor(max_workers=2)
+
+    async def run():
+        await asyncio.gather(*(executor.execute(SlowQuery(0.05)) for _ in range(4)))
+        with pytest.raises(RuntimeError):
+            await executor.execute(SlowQuery(0, error=RuntimeError("boom")))
+
+    asyncio.run(run())
+    executor.shutdown()
+    stats = executor.stats()
+    assert stats["errors"] == 1
+    assert stats["max_wait_ms"] >= 40  # the last two queries waited for a free thread
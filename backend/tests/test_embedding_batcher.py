@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from app.services.embedding_batcher import EmbeddingBatcher, estimate_tokens
+
+
+def make_batcher(calls, **kwargs):
+    async def embed_many(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    options = {"max_wait_ms": 20, "max_batch_size": 64, "max_batch_tokens": 10_000}
+    options.update(kwargs)
+    return EmbeddingBatcher(embed_many, **options)
+
+
+def test_concurrent_requests_are_coalesced():
+    calls = []
+    batcher = make_batcher(calls)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit("x" * n) for n in range(1, 11)))
+
+    vectors = asyncio.run(run())
+    assert len(calls) == 1
+    assert vectors == [[float(n)] for n in range(1, 11)]
+
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["items"] == 10
+    assert stats["max_batch_size"] == 10
+    assert stats["batch_size_histogram"]["<=16"] == 1
+
+
+def test_batch_flushes_when_full():
+    calls = []
+    batcher = make_batcher(calls, max_wait_ms=10_000, max_batch_size=4)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(f"text {i}") for i in range(8))), timeout=1
+        )
+
+    asyncio.run(run())
+    assert [len(batch) for batch in calls] == [4, 4]
+
+
+def test_token_budget_splits_batches():
+    calls = []
+    budget = estimate_tokens("a" * 400) * 2
+    batcher = make_batcher(calls, max_batch_tokens=budget)
+
+    async def run():
+        await asyncio.gather(*(batcher.submit("a" * 400) for _ in range(5)))
+
+    asyncio.run(run())
+    assert [len(batch) for batch in calls] == [2, 2, 1]
+
+
+def test_errors_fan_out_to_every_caller():
+    async def embed_many(texts):
+        raise RuntimeError("upstream down")
+
+    batcher = EmbeddingBatcher(embed_many, max_wait_ms=5, max_batch_size=8, max_batch_tokens=1000)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit("q") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_stats_are_empty_before_first_batch():
+    batcher = make_batcher([])
+    stats = batcher.stats()
+    assert stats["batches"] == 0
+    assert stats["mean_batch_size"] == 0.0
+    assert stats["mean_wait_ms"] == pytest.approx(0.0)
@@ -0,0 +1,60 @@
+import asyncio
+from app.services.embedding_cache import EmbeddingCache, content_hash
+
+
+def make_cache(**kwargs):
+    options = {"model": "test-model", "dimension": 3, "max_entries": 2, "ttl_seconds": 60}
+    options.update(kwargs)
+    return EmbeddingCache(**options)
+
+
+def test_content_hash_is_stable():
+    assert content_hash("note") == content_hash("note")
+    assert content_hash("note") != content_hash("note ")
+
+
+def test_key_depends_on_model_and_dimension():
+    text = "same text"
+    assert make_cache().key(text) != make_cache(model="other-model").key(text)
+    assert make_cache().key(text) != make_cache(dimension=4).key(text)
+
+
+def test_lru_eviction_and_hits():
+    cache = make_cache()
+
+    async def run():
+        await cache.set("a", [1.0, 0.0, 0.0])
+        await cache.set("b", [0.0, 1.0, 0.0])
+        assert await cache.get("a") == [1.0, 0.0, 0.0]
+        await cache.set("c", [0.0, 0.0, 1.0])  # evicts "b", the least recently used
+        return await cache.get("b"), await cache.get("c")
+
+    evicted, kept = asyncio.run(run())
+    assert evicted is None
+    assert kept == [0.0, 0.0, 1.0]
+    stats = cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_expired_entries_are_dropped():
+    cache = make_cache(ttl_seconds=-1)
+
+    async def run():
+        await cache.set("a", [1.0, 2.0, 3.0])
+        return await cache.get("a")
+
+    assert asyncio.run(run()) is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    first = make_cache(disk_path=path)
+    asyncio.run(first.set("persisted", [0.5, 0.25, 0.125]))
+    first.close()
+
+    second = make_cache(disk_path=path)
+    assert asyncio.run(second.get("persisted")) == [0.5, 0.25, 0.125]
+    assert second.stats()["disk_hits"] == 1
+    second.close()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+from app.services.indexing import IndexingPipeline, IndexingStatus
+
+
+def make_pipeline(**kwargs):
+    ai = MagicMock()
+    ai.generate_embeddings = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+    ai.generate_embedding = AsyncMock(return_value=[1.0])
+    vector_db = MagicMock()
+    vector_db.upsert_notes = AsyncMock()
+    vector_db.upsert_note = AsyncMock()
+    vector_db.delete_note = AsyncMock()
+    vector_db.delete_stale_chunks = AsyncMock()
+    options = {"workers": 2, "queue_size": 100, "batch_size": 16, "max_retries": 2, "retry_backoff": 0.001}
+    options.update(kwargs)
+    return IndexingPipeline(ai, vector_db, **options), ai, vector_db
+
+
+def test_jobs_are_batched_and_marked_indexed():
+    pipeline, ai, vector_db = make_pipeline()
+    note_ids = [uuid.uuid4() for _ in range(5)]
+
+    async def run():
+        statuses = [await pipeline.enqueue(note_id, "user-1", f"note {i}") for i, note_id in enumerate(note_ids)]
+        await pipeline.stop()
+        return statuses
+
+    statuses = asyncio.run(run())
+    assert statuses == [IndexingStatus.PENDING] * 5
+    assert all(pipeline.status(note_id) == IndexingStatus.INDEXED for note_id in note_ids)
+    upserted = [item[0] for call in vector_db.upsert_notes.await_args_list for item in call.args[0]]
+    assert sorted(upserted) == sorted(note_ids)
+    assert vector_db.upsert_notes.await_count < 5
+    assert pipeline.stats()["indexed"] == 5
+
+
+def test_failed_jobs_are_retried_then_dead_lettered(tmp_path):
+    dead_letter_path = tmp_path / "dead_letters.jsonl"
+    pipeline, ai, vector_db = make_pipeline(dead_letter_path=str(dead_letter_path))
+    vector_db.upsert_notes.side_effect = RuntimeError("qdrant down")
+    note_id = uuid.uuid4()
+
+    async def run():
+        await pipeline.enqueue(note_id, "user-1", "content")
+        for _ in range(100):
+            if pipeline.status(note_id) == IndexingStatus.FAILED:
+                break
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+
+    asyncio.run(run())
+    assert pipeline.status(note_id) == IndexingStatus.FAILED
+    assert vector_db.upsert_notes.await_count == 3  # first attempt + 2 retries
+    assert pipeline.stats()["retries"] == 2
+    record = json.loads(dead_letter_path.read_text().splitlines()[0])
+    assert record["note_id"] == str(note_id)
+
+
+def test_superseded_and_discarded_jobs_are_skipped():
+    pipeline, ai, vector_db = make_pipeline(workers=1)
+    updated, deleted = uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await pipeline.enqueue(updated, "user-1", "old text")
+        await pipeline.enqueue(updated, "user-1", "new text")
+        await pipeline.enqueue(deleted, "user-1", "gone")
+        pipeline.discard(deleted)
+        await pipeline.stop()
+
+    asyncio.run(run())
+    texts = [text for call in ai.generate_embeddings.await_args_list for text in call.args[0]]
+    assert texts == ["new text"]
+    assert pipeline.status(deleted) is None
+
+
+def test_full_queue_falls_back_to_inline_indexing():
+    pipeline, ai, vector_db = make_pipeline(workers=1, queue_size=1)
+
+    async def run():
+        await pipeline.start()
+        first = await pipeline.enqueue(uuid.uuid4(), "user-1", "a")
+        second = await pipeline.enqueue(uuid.uuid4(), "user-1", "b")
+        await pipeline.stop()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == IndexingStatus.PENDING
+    assert second == IndexingStatus.INDEXED
+    assert vector_db.upsert_notes.await_count == 2
+    assert pipeline.stats()["sync_fallbacks"] == 1
+
+
+def test_worker_survives_unexpected_errors_and_keeps_bookkeeping_bounded(tmp_path):
+    from app.services import indexing
+
+    pipeline, ai, vector_db = make_pipeline(workers=1, dead_letter_path=str(tmp_path / "missing" / "dead.jsonl"))
+    vector_db.upsert_notes.side_effect = RuntimeError("qdrant down")
+    vector_db.delete_note.side_effect = RuntimeError("qdrant down")
+    failing, deleted, later = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await pipeline.enqueue(failing, "user-1", "fails")  # its dead letter can't be written to disk
+        for _ in range(100):
+            if pipeline.status(failing) == IndexingStatus.FAILED:
+                break
+            await asyncio.sleep(0.01)
+
+        # Deleted while its upsert is in flight, and cleaning up its vector fails too
+        async def upsert(points):
+            pipeline.discard(deleted)
+        vector_db.upsert_notes.side_effect = upsert
+        await pipeline.enqueue(deleted, "user-1", "gone")
+        await asyncio.sleep(0.05)
+
+        vector_db.upsert_notes.side_effect = None
+        await pipeline.enqueue(later, "user-1", "still indexed")
+        await asyncio.sleep(0.05)
+        await pipeline.stop()
+
+    asyncio.run(run())
+    assert pipeline.status(failing) == IndexingStatus.FAILED
+    assert pipeline.status(later) == IndexingStatus.INDEXED
+    assert pipeline._versions == {}
+    assert pipeline.dead_letters.maxlen == indexing.MAX_DEAD_LETTERS
+
+
+def test_failed_inline_fallback_is_recorded():
+    pipeline, ai, vector_db = make_pipeline(workers=1, queue_size=1)
+    note_id = uuid.uuid4()
+
+    async def run():
+        await pipeline.start()
+        await pipeline.enqueue(uuid.uuid4(), "user-1", "a")
+        vector_db.upsert_notes.side_effect = RuntimeError("qdrant down")
+        status = await pipeline.enqueue(note_id, "user-1", "b")
+        vector_db.upsert_notes.side_effect = None
+        await pipeline.stop()
+        return status
+
+    assert asyncio.run(run()) == IndexingStatus.FAILED
+    assert pipeline.status(note_id) == IndexingStatus.FAILED
+    assert str(note_id) in [record["note_id"] for record in pipeline.dead_letters]
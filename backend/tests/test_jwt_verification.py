@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.api import deps
+from app.core.security import JWTVerifier, SigningKeyUnavailable, VerifiedTokenCache
+
+SECRET = "super-secret-jwt-token-with-at-least-32-characters"
+
+
+def make_claims(**overrides):
+    claims = {"sub": "user-1", "email": "user@example.com", "role": "authenticated",
+              "aud": "authenticated", "exp": int(time.time()) + 3600}
+    claims.update(overrides)
+    return claims
+
+
+def make_rsa_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, jwk
+
+
+def jwks_client(jwks, calls):
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, json={"keys": list(jwks)})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_hs256_tokens_are_verified_locally():
+    verifier = JWTVerifier(jwks_url="http://auth/jwks", jwt_secret=SECRET)
+    token = jwt.encode(make_claims(), SECRET, algorithm="HS256")
+
+    user, expires_at = asyncio.run(verifier.verify(token))
+    assert user.id == "user-1"
+    assert user.email == "user@example.com"
+    assert expires_at > time.time()
+
+
+@pytest.mark.parametrize("claims", [
+    make_claims(exp=int(time.time()) - 10),
+    make_claims(aud="someone-else"),
+])
+def test_expired_or_wrong_audience_tokens_are_rejected(claims):
+    verifier = JWTVerifier(jwks_url="http://auth/jwks", jwt_secret=SECRET)
+    token = jwt.encode(claims, SECRET, algorithm="HS256")
+    with pytest.raises(jwt.InvalidTokenError):
+        asyncio.run(verifier.verify(token))
+
+
+def test_hs256_without_secret_needs_fallback():
+    verifier = JWTVerifier(jwks_url="http://auth/jwks")
+    token = jwt.encode(make_claims(), SECRET, algorithm="HS256")
+    with pytest.raises(SigningKeyUnavailable):
+        asyncio.run(verifier.verify(token))
+
+
+def test_jwks_keys_are_cached_and_refreshed_on_rotation():
+    old_key, old_jwk = make_rsa_key("old")
+    new_key, new_jwk = make_rsa_key("new")
+    jwks, calls = [old_jwk], []
+    verifier = JWTVerifier(jwks_url="http://auth/jwks", jwks_min_refresh_seconds=0,
+                           http_client=jwks_client(jwks, calls))
+
+    async def run():
+        old_token = jwt.encode(make_claims(), old_key, algorithm="RS256", headers={"kid": "old"})
+        await verifier.verify(old_token)
+        await verifier.verify(old_token)
+        assert len(calls) == 1
+
+        jwks.append(new_jwk)
+        new_token = jwt.encode(make_claims(sub="user-2"), new_key, algorithm="RS256", headers={"kid": "new"})
+        user, _ = await verifier.verify(new_token)
+        return user
+
+    assert asyncio.run(run()).id == "user-2"
+    assert len(calls) == 2
+
+
+def test_token_algorithm_must_match_its_signing_key():
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    rsa_key, rsa_jwk = make_rsa_key("rsa")
+    ec_jwk = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(ec.generate_private_key(ec.SECP256R1()).public_key()))
+    ec_jwk.update({"kid": "ec", "alg": "ES256", "use": "sig"})
+    verifier = JWTVerifier(jwks_url="http://auth/jwks", http_client=jwks_client([rsa_jwk, ec_jwk], []))
+
+    # Claims an algorithm its kid's key isn't for
+    token = jwt.encode(make_claims(), rsa_key, algorithm="RS256", headers={"kid": "ec"})
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        asyncio.run(verifier.verify(token))
+    token = jwt.encode(make_claims(), rsa_key, algorithm="RS256", headers={"kid": "rsa"})
+    assert asyncio.run(verifier.verify(token))[0].id == "user-1"
+
+
+def test_verified_token_cache_respects_token_expiry():
+    cache = VerifiedTokenCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", "user-a")
+    cache.put("expired", "user-b", token_expires_at=time.time() - 1)
+    assert cache.get("a") == "user-a"
+    assert cache.get("expired") is None
+    cache.put("b", "user-b")
+    cache.put("c", "user-c")
+    assert cache.get("a") is None
+
+
+def make_request(token):
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+def test_get_current_user_local_mode_uses_cache(monkeypatch):
+    monkeypatch.setattr(deps.settings, "AUTH_MODE", "local")
+    monkeypatch.setattr(deps, "jwt_verifier", JWTVerifier(jwks_url="http://auth/jwks", jwt_secret=SECRET))
+    monkeypatch.setattr(deps, "token_cache", VerifiedTokenCache(ttl_seconds=60, max_entries=10))
+    token = jwt.encode(make_claims(), SECRET, algorithm="HS256")
+
+    async def run():
+        first = await deps.get_current_user(make_request(token))
+        second = await deps.get_current_user(make_request(token))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.id == "user-1"
+    assert second is first
+    assert deps.token_cache.stats()["hits"] == 1
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(deps.get_current_user(make_request(jwt.encode(make_claims(aud="x"), SECRET, algorithm="HS256"))))
+    assert exc.value.status_code == 401
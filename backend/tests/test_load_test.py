@@ -0,0 +1,41 @@
+import asyncio
+from app.api import deps
+from app.core.config import settings
+from app.services.ai_services import get_ai_service
+from app.services.indexing import get_indexing_pipeline
+from app.services.rate_limiter import get_rate_limiter
+from app.services.vector_db import get_vector_db_service
+from benchmarks.fakes import FakeSupabase, Latency
+from benchmarks.load_test import ENDPOINTS, run_load
+
+
+def test_fake_postgrest_keyset_page():
+    db = FakeSupabase(Latency())
+    rows = [db.table("notes").insert({"user_id": "u", "content": str(i)}).execute().data[0] for i in range(5)]
+    newest_first = sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+    last = newest_first[1]
+
+    page = (
+        db.table("notes").select("id,content").eq("user_id", "u")
+        .or_(f'created_at.lt."{last["created_at"]}",and(created_at.eq."{last["created_at"]}",id.lt.{last["id"]})')
+        .order("created_at", desc=True).order("id", desc=True).limit(2).execute().data
+    )
+    assert page == [{"id": row["id"], "content": row["content"]} for row in newest_first[2:4]]
+
+
+def test_load_test_runs_every_endpoint_against_fakes(monkeypatch):
+    # configure_fakes swaps module-level clients and settings; restore them afterwards
+    for name in ("VECTOR_BACKEND", "AUTH_MODE", "RATE_LIMIT_ENABLED"):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(deps, "supabase_client", deps.supabase_client)
+    monkeypatch.setattr(deps, "jwt_verifier", deps.jwt_verifier)
+    try:
+        report = asyncio.run(run_load(concurrency=2, duration=0, iterations=2, seed_notes=3))
+    finally:
+        for provider in (get_ai_service, get_vector_db_service, get_indexing_pipeline, get_rate_limiter):
+            provider.cache_clear()
+
+    assert report["errors"] == 0
+    assert set(report["endpoints"]) == set(ENDPOINTS)
+    assert all(stats["requests"] == 4 for stats in report["endpoints"].values())
@@ -0,0 +1,226 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock
+import numpy as np
+from app.services.local_index import LocalVectorIndex, TenantIndex
+from app.services.vector_db import InMemoryVectorDBService, VectorDBService
+from tests.test_vector_db import DIM, make_vector_db
+
+
+def test_tenant_search_matches_brute_force_cosine():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8))
+    tenant = TenantIndex(dimension=8, capacity=1)
+    for i, vector in enumerate(vectors):
+        tenant.upsert(f"p{i}", vector.tolist(), {"i": i})
+
+    query = rng.normal(size=8)
+    expected = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    hits = tenant.search(query.tolist(), limit=5)
+
+    assert [pid for pid, _, _ in hits] == [f"p{i}" for i in np.argsort(-expected)[:5]]
+    assert np.allclose([score for _, score, _ in hits], np.sort(expected)[::-1][:5], atol=1e-5)
+
+
+def test_tenant_delete_keeps_rows_dense():
+    tenant = TenantIndex(dimension=2)
+    tenant.upsert("a", [1.0, 0.0])
+    tenant.upsert("b", [0.0, 1.0])
+    tenant.upsert("c", [1.0, 1.0])
+    tenant.delete("a")
+
+    assert len(tenant) == 2
+    assert "a" not in tenant
+    assert [pid for pid, _, _ in tenant.search([0.0, 1.0], limit=1)] == ["b"]
+
+
+def test_lru_eviction_and_large_tenants():
+    row_bytes = 4 * 4
+    index = LocalVectorIndex(dimension=4, memory_budget_bytes=row_bytes * 4, max_tenant_points=3)
+    two_points = [("x", [1.0, 0, 0, 0], {}), ("y", [0, 1.0, 0, 0], {})]
+
+    index.load("alice", two_points)
+    index.load("bob", [("z", [1.0, 0, 0, 0], {}), ("w", [0, 0, 1.0, 0], {})])
+    assert index.get("alice") is not None  # alice becomes most recently used
+    index.load("carol", [("v", [0, 0, 0, 1.0], {}), ("u", [0, 1.0, 0, 0], {})])
+
+    assert index.peek("bob") is None
+    assert index.peek("alice") is not None
+    assert index.stats()["evictions"] == 1
+
+    assert index.load("dave", [(f"p{i}", [1.0, 0, 0, 0], {}) for i in range(4)]) is None
+    assert index.is_large("dave")
+
+
+def test_vector_db_serves_small_tenants_locally_and_stays_coherent():
+    vector_db = make_vector_db()
+    vector_db.local_index = LocalVectorIndex(dimension=DIM, memory_budget_bytes=1 << 20, max_tenant_points=100)
+    first, second = uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await vector_db.upsert_note(first, "user-1", [1.0, 0.0, 0.0, 0.0])
+        assert await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0]) == [first]  # loads the tenant
+
+        vector_db.client.query_points = AsyncMock(side_effect=AssertionError("should be served locally"))
+        await vector_db.upsert_note(second, "user-1", [0.0, 1.0, 0.0, 0.0], {"title": "Second"})
+        hits = await vector_db.search_note_hits("user-1", [0.0, 1.0, 0.0, 0.0])
+        assert [str(hit.id) for hit in hits] == [str(second), str(first)]
+        assert hits[0].payload["title"] == "Second"
+
+        await vector_db.delete_note(first)
+        return await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+    assert asyncio.run(run()) == [second]
+
+
+def test_large_tenants_fall_through_to_qdrant():
+    vector_db = make_vector_db()
+    vector_db.local_index = LocalVectorIndex(dimension=DIM, memory_budget_bytes=1 << 20, max_tenant_points=1)
+
+    async def run():
+        await vector_db.upsert_notes([
+            (uuid.uuid4(), "user-1", [1.0, 0.0, 0.0, float(i)], None) for i in range(3)
+        ])
+        return await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+    assert len(asyncio.run(run())) == 3
+    assert vector_db.local_index.is_large("user-1")
+
+
+def test_in_memory_backend_needs_no_qdrant():
+    vector_db = InMemoryVectorDBService(collection_name="bench", dimension=DIM)
+    assert isinstance(vector_db, VectorDBService)
+    mine, theirs = uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await vector_db.upsert_note(mine, "user-1", [1.0, 0.0, 0.0, 0.0], {"title": "Mine"})
+        await vector_db.upsert_note(theirs, "user-2", [1.0, 0.0, 0.0, 0.0])
+        await vector_db.update_note_payload(mine, {"title": "Renamed"})
+        hits = await vector_db.search_note_hits("user-1", [1.0, 0.0, 0.0, 0.0])
+        await vector_db.delete_note(mine)
+        return hits, await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+    hits, after_delete = asyncio.run(run())
+    assert [(str(hit.id), hit.payload["title"]) for hit in hits] == [(str(mine), "Renamed")]
+    assert after_delete == []
+
+
+def test_recommendations_match_between_qdrant_and_in_memory_backends():
+    from app.services.chunking import NoteChunks
+
+    source, close, far, sideways, theirs = (uuid.UUID(int=i) for i in range(1, 6))
+    chunks = NoteChunks.split(source, "first part\n\nsecond part", max_chars=12)
+
+    async def run(vector_db):
+        await vector_db.upsert_notes(
+            chunks.points("user-1", {0: [1.0, 0.0, 0.0, 0.0], 1: [0.95, 0.05, 0.0, 0.0]})
+            + [
+                (close, "user-1", [0.9, 0.3, 0.0, 0.0], None),
+                (far, "user-1", [0.0, 1.0, 0.0, 0.0], None),
+                (sideways, "user-1", [0.7, 0.0, 0.7, 0.0], None),
+                (theirs, "user-2", [1.0, 0.0, 0.0, 0.0], None),
+            ]
+        )
+        similar = await vector_db.recommend_notes("user-1", [source], limit=3)
+        unlike_close = await vector_db.recommend_notes("user-1", [source], negative=[close], limit=1)
+        not_mine = await vector_db.recommend_notes("user-1", [source, theirs])
+        return [str(hit.id) for hit in similar], [str(hit.id) for hit in unlike_close], not_mine
+
+    for vector_db in (make_vector_db(), InMemoryVectorDBService(collection_name="bench", dimension=DIM)):
+        similar, unlike_close, not_mine = asyncio.run(run(vector_db))
+        assert similar == [str(close), str(sideways), str(far)]
+        assert unlike_close == [str(sideways)]
+        assert not_mine is None
+
+
+def test_search_filters_match_between_qdrant_local_index_and_in_memory_backends():
+    from datetime import datetime, timezone
+    from app.services.vector_db import SearchFilters
+
+    old, work, home, recent = (uuid.UUID(int=i) for i in range(1, 5))
+    points = [
+        (old, "user-1", [1.0, 0.0, 0.0, 0.0], {"tags": ["work"], "created_at": "2023-06-01T00:00:00+00:00"}),
+        (work, "user-1", [0.9, 0.1, 0.0, 0.0], {"tags": ["work", "urgent"], "created_at": "2024-03-01T12:00:00+00:00"}),
+        (home, "user-1", [0.8, 0.2, 0.0, 0.0], {"tags": ["home"], "created_at": "2024-03-02T00:00:00+00:00"}),
+        (recent, "user-1", [0.0, 1.0, 0.0, 0.0], {"tags": ["work"], "created_at": "2024-05-01T00:00:00Z"}),
+        (uuid.UUID(int=5), "user-2", [1.0, 0.0, 0.0, 0.0], {"tags": ["work"], "created_at": "2024-03-01T00:00:00+00:00"}),
+    ]
+    query = [1.0, 0.0, 0.0, 0.0]
+    cases = [
+        (SearchFilters(tags=("work",)), [old, work, recent]),
+        (SearchFilters(tags=("work", "urgent")), [work]),
+        (SearchFilters(since=datetime(2024, 1, 1, tzinfo=timezone.utc)), [work, home, recent]),
+        (SearchFilters(since=datetime(2024, 3, 1, 12), until=datetime(2024, 3, 2)), [work, home]),  # naive is UTC, bounds inclusive
+        (SearchFilters(tags=("work",), until=datetime(2024, 4, 1, tzinfo=timezone.utc)), [old, work]),
+        (SearchFilters(score_threshold=0.98), [old, work]),
+        (SearchFilters(tags=("missing",)), []),
+    ]
+
+    async def run(vector_db):
+        await vector_db.upsert_notes(points)
+        return [await vector_db.search_notes("user-1", query, limit=10, filters=filters) for filters, _ in cases]
+
+    with_local_index = make_vector_db()
+    with_local_index.local_index = LocalVectorIndex(dimension=DIM, memory_budget_bytes=1 << 20, max_tenant_points=100)
+    for vector_db in (make_vector_db(), with_local_index, InMemoryVectorDBService(collection_name="bench", dimension=DIM)):
+        assert asyncio.run(run(vector_db)) == [expected for _, expected in cases]
+
+
+def test_filtered_search_still_fills_the_limit():
+    from app.services.vector_db import SearchFilters
+
+    tenant = TenantIndex(dimension=DIM)
+    for i in range(50):
+        tenant.upsert(str(i), [1.0, i / 100, 0.0, 0.0], {"tags": ["even"] if i % 2 == 0 else []})
+    hits = tenant.search([1.0, 0.0, 0.0, 0.0], 5, SearchFilters(tags=("even",)).local_where())
+    assert [point_id for point_id, _, _ in hits] == ["0", "2", "4", "6", "8"]
+
+
+def test_chunk_hashes_come_from_qdrant_not_a_stale_local_copy():
+    worker_a = make_vector_db()
+    worker_a.local_index = LocalVectorIndex(dimension=DIM, memory_budget_bytes=1 << 20, max_tenant_points=100, ttl_seconds=3600)
+    worker_b = VectorDBService(url="http://localhost:6333", api_key="", collection_name="test-notes")
+    worker_b.client = worker_a.client
+    note_id = uuid.uuid4()
+
+    async def run():
+        await worker_a.upsert_note(note_id, "user-1", [1.0, 0.0, 0.0, 0.0], {"content_hash": "original"})
+        await worker_a.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])  # worker A now holds the tenant
+        await worker_b.upsert_note(note_id, "user-1", [0.0, 1.0, 0.0, 0.0], {"content_hash": "edited"})
+        return await worker_a.get_chunk_hashes(note_id, "user-1")
+
+    # A stale "original" would let reverting the edit on worker A skip re-embedding
+    assert asyncio.run(run()) == ["edited"]
+
+
+def test_writes_during_a_tenant_load_are_not_lost():
+    vector_db = make_vector_db()
+    vector_db.local_index = LocalVectorIndex(dimension=DIM, memory_budget_bytes=1 << 20, max_tenant_points=100)
+    deleted, added = uuid.uuid4(), uuid.uuid4()
+    scroll = vector_db._scroll_user_points
+    racing_writes = []
+
+    async def scroll_then_race(user_id, max_points):
+        points = await scroll(user_id, max_points)
+        if racing_writes:
+            await racing_writes.pop()()  # lands after the rows were read, before they're installed
+        return points
+
+    vector_db._scroll_user_points = scroll_then_race
+
+    async def run():
+        await vector_db.upsert_note(deleted, "user-1", [1.0, 0.0, 0.0, 0.0])
+        racing_writes.append(lambda: vector_db.delete_note(deleted, user_id="user-1"))
+        after_delete = await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+        reloaded = await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+        vector_db.local_index.drop("user-1")
+        racing_writes.append(lambda: vector_db.upsert_note(added, "user-1", [0.0, 1.0, 0.0, 0.0]))
+        after_upsert = await vector_db.search_notes("user-1", [0.0, 1.0, 0.0, 0.0])
+        return after_delete, reloaded, after_upsert, await vector_db.search_notes("user-1", [0.0, 1.0, 0.0, 0.0])
+
+    after_delete, reloaded, after_upsert, served_locally = asyncio.run(run())
+    assert after_delete == reloaded == []
+    assert after_upsert == served_locally == [added]
+    assert vector_db.local_index.peek("user-1") is not None
+    assert vector_db.local_index._writes == {}
@@ -0,0 +1,62 @@
+import json
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from app.api.deps import get_current_user
+from app.api.routers.notes import get_note_service
+from app.core.logging_config import JSONFormatter
+from app.core.metrics import Histogram, server_timing_header
+from app.main import create_app
+from app.services.db_executor import DBExecutor
+from app.services.note_service import NoteService
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "db")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="db",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="db",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{stage="db",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{stage="db"} 4' in lines
+    assert 'test_seconds_sum{stage="db"} 4.05' in lines
+
+
+def test_server_timing_sums_repeated_stages():
+    header = server_timing_header([("db", 0.010), ("embedding", 0.080), ("db", 0.005)], total=0.1)
+    assert header == "db;dur=15.0, embedding;dur=80.0, total;dur=100.0"
+
+
+def test_request_breakdown_and_metrics_endpoint():
+    db = MagicMock()
+    query = db.table.return_value.select.return_value.eq.return_value
+    query.order.return_value = query
+    query.limit.return_value.execute.return_value.data = []
+    service = NoteService(db, MagicMock(), MagicMock(), executor=DBExecutor(max_workers=1))
+    app = create_app()
+    app.dependency_overrides[get_note_service] = lambda: service
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+    client = TestClient(app)
+
+    response = client.get("/notes/")
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert "total;dur=" in response.headers["Server-Timing"]
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'notes_stage_duration_seconds_count{stage="db"}' in metrics.text
+    assert 'notes_http_request_duration_seconds_count{method="GET",route="/notes/",status="200"}' in metrics.text
+    assert "notes_db_executor_submitted" in metrics.text
+
+
+def test_json_log_lines_carry_extra_fields():
+    record = logging.LogRecord("app.services.indexing", logging.ERROR, __file__, 1, "Indexing failed", (), None)
+    record.note_id = "abc"
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["level"] == "error"
+    assert entry["message"] == "Indexing failed"
+    assert entry["note_id"] == "abc"
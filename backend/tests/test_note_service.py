@@ -0,0 +1,282 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from app.models.note import NoteUpdate
+from app.services.embedding_cache import content_hash
+from app.services.note_service import NoteService
+
+NOTE_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+
+def make_note(**overrides):
+    note = {
+        "id": str(NOTE_ID),
+        "user_id": "user-1",
+        "title": "Groceries",
+        "content": "Buy milk and eggs",
+        "tags": ["home"],
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00",
+    }
+    note.update(overrides)
+    return note
+
+
+def make_service(existing, updated):
+    db = MagicMock()
+    notes = db.table.return_value
+    notes.select.return_value.eq.return_value.eq.return_value.execute.return_value.data = [existing]
+    notes.update.return_value.eq.return_value.eq.return_value.execute.return_value.data = [updated]
+    ai = MagicMock()
+    ai.generate_embedding = AsyncMock(return_value=[0.1, 0.2])
+    ai.generate_title_from_content = AsyncMock(return_value="Buy milk and eggs")
+    vector_db = MagicMock()
+    vector_db.upsert_notes = AsyncMock()
+    vector_db.update_note_payload = AsyncMock()
+    vector_db.delete_note = AsyncMock()
+    vector_db.delete_stale_chunks = AsyncMock()
+    vector_db.get_chunk_hashes = AsyncMock(return_value=[content_hash(existing["content"])])
+    return NoteService(db, ai, vector_db), ai, vector_db
+
+
+def test_update_with_unchanged_content_skips_reindexing():
+    existing = make_note()
+    service, ai, vector_db = make_service(existing, make_note(tags=["home", "todo"]))
+
+    note_in = NoteUpdate(content=existing["content"], tags=["home", "todo"])
+    result = asyncio.run(service.update_note(NOTE_ID, note_in, "user-1"))
+
+    assert result["tags"] == ["home", "todo"]
+    ai.generate_embedding.assert_not_called()
+    vector_db.upsert_notes.assert_not_called()
+    vector_db.update_note_payload.assert_awaited_once_with(
+        NOTE_ID, {"tags": ["home", "todo"], "created_at": "2024-01-01T00:00:00+00:00"}
+    )
+
+
+def test_update_with_new_content_reindexes():
+    service, ai, vector_db = make_service(make_note(), make_note(content="Buy bread"))
+
+    asyncio.run(service.update_note(NOTE_ID, NoteUpdate(content="Buy bread"), "user-1"))
+
+    ai.generate_embedding.assert_awaited_once_with("Buy bread")
+    vector_db.upsert_notes.assert_awaited_once()
+
+
+def test_update_checks_ownership_in_the_update_statement():
+    service, ai, vector_db = make_service(make_note(), make_note())
+    notes = service.db.table.return_value
+    notes.update.return_value.eq.return_value.eq.return_value.execute.return_value.data = []
+
+    result = asyncio.run(service.update_note(NOTE_ID, NoteUpdate(content="Buy bread"), "user-2"))
+
+    assert result is None
+    notes.select.assert_not_called()
+    notes.update.return_value.eq.return_value.eq.assert_called_once_with("user_id", "user-2")
+    ai.generate_embedding.assert_not_called()
+    vector_db.upsert_notes.assert_not_called()
+
+
+def test_create_embeds_while_inserting_and_rolls_back_on_index_failure():
+    from app.models.note import NoteCreate
+
+    service, ai, vector_db = make_service(make_note(), make_note())
+    notes = service.db.table.return_value
+    notes.insert.return_value.execute.return_value.data = [make_note()]
+    vector_db.upsert_notes = AsyncMock(side_effect=RuntimeError("qdrant down"))
+
+    try:
+        asyncio.run(service.create_note(NoteCreate(content="Buy milk and eggs"), "user-1"))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("create_note should fail when the note can't be indexed")
+
+    row = notes.insert.call_args.args[0]
+    assert uuid.UUID(row["id"])
+    ai.generate_embedding.assert_awaited_once_with("Buy milk and eggs")
+    notes.delete.return_value.eq.assert_called_once_with("id", str(NOTE_ID))
+    notes.delete.return_value.eq.return_value.eq.assert_called_once_with("user_id", "user-1")
+
+
+def test_delete_removes_row_and_vector_concurrently():
+    service, _, vector_db = make_service(make_note(), make_note())
+    notes = service.db.table.return_value
+    notes.delete.return_value.eq.return_value.eq.return_value.execute.return_value.data = [make_note()]
+
+    assert asyncio.run(service.delete_note(NOTE_ID, "user-1")) is True
+    vector_db.delete_note.assert_awaited_once_with(note_id=NOTE_ID, user_id="user-1")
+
+    notes.delete.return_value.eq.return_value.eq.return_value.execute.return_value.data = []
+    assert asyncio.run(service.delete_note(NOTE_ID, "user-2")) is False
+
+
+def test_create_in_async_indexing_mode_returns_before_embedding():
+    from app.models.note import NoteCreate
+    from app.services.indexing import IndexingStatus
+
+    service, ai, vector_db = make_service(make_note(), make_note())
+    service.db.table.return_value.insert.return_value.execute.return_value.data = [make_note()]
+    service.indexer = MagicMock()
+    service.indexer.enqueue = AsyncMock(return_value=IndexingStatus.PENDING)
+
+    note = asyncio.run(service.create_note(NoteCreate(content="Buy milk and eggs"), "user-1"))
+
+    assert note["indexing_status"] == "pending"
+    service.indexer.enqueue.assert_awaited_once_with(
+        note_id=NOTE_ID, user_id="user-1", content="Buy milk and eggs",
+        payload={"tags": ["home"], "created_at": "2024-01-01T00:00:00+00:00"},
+    )
+    ai.generate_embedding.assert_not_called()
+    vector_db.upsert_notes.assert_not_called()
+
+
+def test_payload_search_skips_supabase_hydration(monkeypatch):
+    from tests.test_vector_db import make_vector_db
+    from app.services import note_service
+
+    monkeypatch.setattr(note_service.settings, "SEARCH_FROM_PAYLOAD", True)
+    monkeypatch.setattr(note_service.uuid, "uuid4", lambda: NOTE_ID)
+    vector_db = make_vector_db()
+    service, ai, _ = make_service(make_note(), make_note())
+    service.vector_db = vector_db
+    ai.generate_embedding = AsyncMock(return_value=[1.0, 0.0, 0.0, 0.0])
+    service.db.table.return_value.insert.return_value.execute.return_value.data = [make_note(content="x" * 1000)]
+
+    from app.models.note import NoteCreate
+    asyncio.run(service.create_note(NoteCreate(content="x" * 1000), "user-1"))
+    service.db.table.reset_mock()
+
+    results = asyncio.run(service.search_user_notes("milk", "user-1", fields=note_service.SUMMARY_FIELDS))
+
+    assert len(results) == 1
+    assert str(results[0].id) == str(NOTE_ID)
+    assert results[0].title == "Groceries"
+    assert len(results[0].snippet) == note_service.settings.NOTE_SNIPPET_LENGTH
+    assert results[0].content is None  # a snippet is never passed off as the note body
+    assert results[0].score > 0.99
+    service.db.table.assert_not_called()
+
+    # The full view needs the whole content, which only Supabase has
+    service.db.table.return_value.select.return_value.in_.return_value.execute.return_value.data = [
+        make_note(content="x" * 1000)
+    ]
+    results = asyncio.run(service.search_user_notes("milk", "user-1"))
+    assert results[0]["content"] == "x" * 1000
+    service.db.table.return_value.select.assert_called_once_with("*")
+
+
+def make_batch_service(search_cache=None):
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    db = MagicMock()
+    db.table.return_value.select.return_value.in_.return_value.execute.return_value.data = [
+        make_note(id=first, title="First"), make_note(id=second, title="Second")
+    ]
+    ai = MagicMock()
+    ai.generate_embeddings = AsyncMock(side_effect=lambda texts: [[float(i)] for i, _ in enumerate(texts)])
+    vector_db = MagicMock()
+    vector_db.search_note_hits_batch = AsyncMock(side_effect=lambda user_id, query_vectors, **kwargs: [
+        [SimpleNamespace(id=first, score=0.9, payload={}), SimpleNamespace(id=second, score=0.5, payload={})]
+        if vector == [0.0] else [SimpleNamespace(id=second, score=0.8, payload={})]
+        for vector in query_vectors
+    ])
+    return NoteService(db, ai, vector_db, search_cache=search_cache), db, ai, vector_db
+
+
+def test_batch_search_embeds_searches_and_hydrates_once():
+    service, db, ai, vector_db = make_batch_service()
+
+    results = asyncio.run(service.search_user_notes_batch(["milk and eggs", "bread", "milk  and eggs"], "user-1"))
+
+    assert [[note["title"] for note in notes] for notes in results] == [["First", "Second"], ["Second"], ["First", "Second"]]
+    ai.generate_embeddings.assert_awaited_once_with(["milk and eggs", "bread"])
+    vector_db.search_note_hits_batch.assert_awaited_once()
+    db.table.return_value.select.return_value.in_.assert_called_once()
+
+
+def test_batch_search_only_searches_cache_misses():
+    from app.services.search_cache import LocalGenerationStore, SearchCache
+
+    cache = SearchCache(LocalGenerationStore(), max_entries=100, ttl_seconds=60)
+    service, _, ai, _ = make_batch_service(cache)
+
+    async def run():
+        await service.search_user_notes_batch(["milk and eggs"], "user-1")
+        return await service.search_user_notes_batch(["milk and eggs", "bread"], "user-1")
+
+    results = asyncio.run(run())
+    assert [[note["title"] for note in notes] for notes in results] == [["First", "Second"], ["First", "Second"]]
+    assert [call.args[0] for call in ai.generate_embeddings.await_args_list] == [["milk and eggs"], ["bread"]]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_search_cache_keeps_filtered_and_unfiltered_results_apart():
+    from app.services.search_cache import LocalGenerationStore, SearchCache
+    from app.services.vector_db import SearchFilters
+
+    cache = SearchCache(LocalGenerationStore(), max_entries=100, ttl_seconds=60)
+    service, _, _, vector_db = make_batch_service(cache)
+    work = SearchFilters(tags=("work",))
+
+    async def run():
+        await service.search_user_notes_batch(["milk and eggs"], "user-1")
+        await service.search_user_notes_batch(["milk and eggs"], "user-1", filters=work)
+        await service.search_user_notes_batch(["milk and eggs"], "user-1", limit=10, filters=work)
+        await service.search_user_notes_batch(["milk and eggs"], "user-1", filters=SearchFilters(tags=("work",)))
+
+    asyncio.run(run())
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert [(call.kwargs["limit"], call.kwargs["filters"]) for call in vector_db.search_note_hits_batch.await_args_list] == [
+        (5, None), (5, work), (10, work)
+    ]
+
+
+def test_related_notes_reuse_stored_vectors():
+    service, db, ai, vector_db = make_batch_service()
+    other = uuid.uuid4()
+    hits = [SimpleNamespace(id=str(NOTE_ID), score=0.9, payload={})]
+    vector_db.recommend_notes = AsyncMock(side_effect=[hits, None])
+    db.table.return_value.select.return_value.in_.return_value.execute.return_value.data = [make_note()]
+
+    async def run():
+        return (
+            await service.related_notes(other, "user-1", positive=[other, NOTE_ID], negative=[NOTE_ID], limit=3),
+            await service.related_notes(other, "user-2"),
+        )
+
+    related, not_found = asyncio.run(run())
+    assert [note["id"] for note in related] == [str(NOTE_ID)]
+    assert not_found is None
+    ai.generate_embeddings.assert_not_called()
+    ai.generate_embedding.assert_not_called()
+    first_call = vector_db.recommend_notes.await_args_list[0].kwargs
+    assert (first_call["positive"], first_call["negative"], first_call["limit"]) == ([other, NOTE_ID], [NOTE_ID], 3)
+
+
+def test_update_only_re_embeds_changed_chunks(monkeypatch):
+    from app.services import note_service
+    from app.services.chunking import NoteChunks, chunk_point_id
+
+    monkeypatch.setattr(note_service.settings, "CHUNK_MAX_CHARS", 20)
+    old_content = "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
+    new_content = "First paragraph.\n\nSecond, edited.\n\nThird paragraph."
+    service, ai, vector_db = make_service(make_note(content=old_content), make_note(content=new_content))
+    vector_db.get_chunk_hashes = AsyncMock(return_value=NoteChunks.split(NOTE_ID, old_content).hashes)
+
+    asyncio.run(service.update_note(NOTE_ID, NoteUpdate(content=new_content), "user-1"))
+
+    ai.generate_embedding.assert_awaited_once_with("Second, edited.")
+    (points,) = vector_db.upsert_notes.await_args.args
+    assert [(point_id, payload["chunk"]) for point_id, _, _, payload in points] == [(chunk_point_id(NOTE_ID, 1), 1)]
+    vector_db.delete_stale_chunks.assert_not_called()
+
+    shorter = "First paragraph."
+    service, ai, vector_db = make_service(make_note(content=old_content), make_note(content=shorter))
+    vector_db.get_chunk_hashes = AsyncMock(return_value=NoteChunks.split(NOTE_ID, old_content).hashes)
+
+    asyncio.run(service.update_note(NOTE_ID, NoteUpdate(content=shorter), "user-1"))
+
+    ai.generate_embedding.assert_not_called()
+    vector_db.upsert_notes.assert_not_called()
+    vector_db.delete_stale_chunks.assert_awaited_once_with({NOTE_ID: 1})
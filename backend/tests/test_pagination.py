@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+from fastapi.testclient import TestClient
+from app.api.deps import get_current_user
+from app.api.routers.notes import get_note_service
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.main import create_app
+from app.services.note_service import NoteService
+
+NOTE_ID = "6f1c2b9e-2f4a-4c1e-9a57-0c3f1f0b7d11"
+CREATED_AT = "2024-05-01T12:30:00.123456+00:00"
+
+
+def test_cursor_round_trip_is_opaque():
+    cursor = encode_cursor(CREATED_AT, NOTE_ID)
+    assert NOTE_ID not in cursor
+    assert decode_cursor(cursor) == (CREATED_AT, NOTE_ID)
+
+
+@pytest.mark.parametrize("cursor", ["garbage", encode_cursor("not-a-date", NOTE_ID), encode_cursor(CREATED_AT, "1),id.gt.0")])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def make_service(rows):
+    db = MagicMock()
+    query = db.table.return_value.select.return_value.eq.return_value
+    query.or_.return_value = query
+    query.lte.return_value = query
+    query.order.return_value = query
+    query.limit.return_value.execute.return_value.data = rows
+    return NoteService(db, MagicMock(), MagicMock()), query
+
+
+def test_keyset_page_filters_after_cursor_and_returns_next_cursor():
+    rows = [{"id": NOTE_ID, "created_at": CREATED_AT}, {"id": NOTE_ID, "created_at": CREATED_AT}]
+    service, query = make_service(rows)
+
+    notes, next_cursor = asyncio.run(service.get_notes_page("user-1", page_size=2, cursor=encode_cursor(CREATED_AT, NOTE_ID)))
+
+    assert notes == rows
+    assert decode_cursor(next_cursor) == (CREATED_AT, NOTE_ID)
+    query.lte.assert_called_once_with("created_at", CREATED_AT)
+    query.or_.assert_called_once_with(
+        f'created_at.lt."{CREATED_AT}",and(created_at.eq."{CREATED_AT}",id.lt.{NOTE_ID})'
+    )
+    query.limit.assert_called_once_with(2)
+
+
+def test_last_page_has_no_next_cursor():
+    service, query = make_service([{"id": NOTE_ID, "created_at": CREATED_AT}])
+    notes, next_cursor = asyncio.run(service.get_notes_page("user-1", page_size=20))
+    assert next_cursor is None
+    query.or_.assert_not_called()
+
+
+def make_client(service):
+    app = create_app()
+    app.dependency_overrides[get_note_service] = lambda: service
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+    return TestClient(app)
+
+
+def test_list_endpoint_sets_next_cursor_header_and_caps_page_size():
+    note = {"id": NOTE_ID, "title": "t", "content": "c", "tags": [], "created_at": CREATED_AT, "updated_at": CREATED_AT}
+    service = MagicMock()
+    service.get_notes_page = AsyncMock(return_value=([note], "next-token"))
+    client = make_client(service)
+
+    response = client.get("/notes/", params={"page_size": 1})
+    assert response.status_code == 200
+    assert response.headers["X-Next-Cursor"] == "next-token"
+    assert response.json()[0]["id"] == NOTE_ID
+
+    assert client.get("/notes/", params={"page_size": 10_000}).status_code == 400
+
+    service.get_notes_page = AsyncMock(side_effect=InvalidCursorError("Invalid pagination cursor"))
+    assert client.get("/notes/", params={"cursor": "bad"}).status_code == 400
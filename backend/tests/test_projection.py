@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import pytest
+from fastapi.testclient import TestClient
+from app.api.deps import get_current_user
+from app.api.routers.notes import get_note_service
+from app.core.config import settings
+from app.main import create_app
+from app.models.note import SUMMARY_FIELDS
+from app.services.db_executor import DBExecutor
+from app.services.note_service import NoteService, project_note, resolve_fields, select_columns
+
+NOTE = {
+    "id": "6f1c2b9e-2f4a-4c1e-9a57-0c3f1f0b7d11",
+    "title": "Long note",
+    "content": "word " * 2000,
+    "tags": ["a"],
+    "created_at": "2024-05-01T12:30:00+00:00",
+    "updated_at": "2024-05-01T12:30:00+00:00",
+}
+
+
+def test_resolve_fields():
+    assert resolve_fields() is None
+    assert resolve_fields("summary") == SUMMARY_FIELDS
+    assert resolve_fields(fields="title, tags,title") == ("id", "title", "tags")
+    with pytest.raises(ValueError):
+        resolve_fields(fields="title,password")
+    with pytest.raises(ValueError):
+        resolve_fields("compact")
+
+
+def test_select_columns_pushes_projection_down():
+    assert select_columns(None) == "*"
+    assert select_columns(("id", "title")) == "id,title"
+    assert select_columns(SUMMARY_FIELDS, required=("id", "created_at")) == "id,created_at,title,tags,updated_at,content"
+
+
+def test_project_note_truncates_snippet():
+    summary = project_note(NOTE, SUMMARY_FIELDS)
+    assert len(summary.snippet) == settings.NOTE_SNIPPET_LENGTH
+    assert summary.content is None
+    assert project_note(NOTE, None) is NOTE
+
+
+def make_client(rows):
+    db = MagicMock()
+    query = db.table.return_value.select.return_value.eq.return_value
+    query.order.return_value = query
+    query.limit.return_value.execute.return_value.data = rows
+    service = NoteService(db, MagicMock(), MagicMock(), executor=DBExecutor(max_workers=1))
+    app = create_app()
+    app.dependency_overrides[get_note_service] = lambda: service
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+    return TestClient(app), db
+
+
+def test_summary_view_shrinks_list_payload():
+    client, db = make_client([NOTE] * 20)
+
+    full = client.get("/notes/")
+    summary = client.get("/notes/", params={"view": "summary"})
+
+    assert full.status_code == summary.status_code == 200
+    assert set(summary.json()[0]) == set(SUMMARY_FIELDS)
+    assert len(full.content) > 10 * len(summary.content)
+    db.table.return_value.select.assert_called_with("id,created_at,title,tags,updated_at,content")
+
+
+def test_sparse_fields_and_unknown_fields():
+    client, _ = make_client([NOTE])
+    response = client.get("/notes/", params={"fields": "title"})
+    assert response.json() == [{"id": NOTE["id"], "title": "Long note"}]
+    assert client.get("/notes/", params={"fields": "secret"}).status_code == 400
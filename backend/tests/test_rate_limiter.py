@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from app.api.deps import get_current_user, rate_limit
+from app.services.rate_limiter import Budget, LocalBucketStore, RateLimiter, get_rate_limiter, parse_rate
+
+
+def make_limiter(store=None, lease_size=5, lease_ttl=60.0, **budgets):
+    budgets = {"default": Budget(10, 10 / 60), **budgets}
+    return RateLimiter(store or LocalBucketStore(), budgets, lease_size=lease_size, lease_ttl_seconds=lease_ttl)
+
+
+def test_parse_rate():
+    assert parse_rate("30/minute") == Budget(30, 0.5)
+    assert parse_rate("2/seconds") == Budget(2, 2.0)
+    with pytest.raises(ValueError):
+        parse_rate("30 per fortnight")
+
+
+def test_enforces_budget_with_leased_tokens():
+    store = LocalBucketStore()
+    store.take = AsyncMock(wraps=store.take)
+    limiter = make_limiter(store)
+
+    async def run():
+        return [await limiter.acquire("default", "user-1") for _ in range(11)]
+
+    results = asyncio.run(run())
+    assert results[:10] == [0.0] * 10
+    assert results[10] == pytest.approx(6.0)
+    # Two leases of five tokens, then one refused lease: not one store call per request
+    assert store.take.await_count == 3
+    assert limiter.stats()["local_grants"] == 8
+
+
+def test_local_store_forgets_refilled_buckets_and_stays_bounded():
+    fast = Budget(capacity=2, refill_per_second=1000.0)
+    slow = Budget(capacity=2, refill_per_second=0.001)
+    store = LocalBucketStore(max_buckets=3)
+
+    async def run():
+        await store.take("fast-user", 1, fast)
+        await asyncio.sleep(0.01)  # refilled by now, so it reads the same as no bucket at all
+        await store.take("slow-user", 1, slow)
+        assert list(store._buckets) == ["slow-user"]
+
+        for i in range(5):
+            await store.take(f"user-{i}", 1, slow)
+        assert list(store._buckets) == ["user-2", "user-3", "user-4"]
+        # An evicted bucket starts over full, just like an expired Redis key
+        return await store.take("user-4", 5, slow)
+
+    assert asyncio.run(run()) == 1
+
+
+def test_workers_share_one_bucket():
+    store = LocalBucketStore()
+    workers = [make_limiter(store, lease_size=3) for _ in range(3)]
+
+    async def run():
+        allowed = 0
+        for _ in range(6):
+            for worker in workers:
+                allowed += await worker.acquire("default", "user-1") == 0
+        return allowed
+
+    # Leases never hand out more than the shared bucket holds
+    assert asyncio.run(run()) == 10
+
+
+def test_expired_lease_refunds_unused_tokens():
+    store = LocalBucketStore()
+    limiter = make_limiter(store, lease_size=5, lease_ttl=0.0)
+
+    async def run():
+        await limiter.acquire("default", "user-1")
+        await limiter.acquire("default", "user-1")
+        tokens, _, _ = store._buckets["ratelimit:default:user-1"]
+        return tokens
+
+    # 10 - 5 leased, + 4 handed back unused, - 5 leased again; without the refund it'd be 0
+    assert asyncio.run(run()) == pytest.approx(4, abs=0.01)
+
+
+def test_scopes_and_users_have_separate_budgets():
+    limiter = make_limiter(search=Budget(1, 1 / 60))
+
+    async def run():
+        return (
+            await limiter.acquire("search", "user-1"),
+            await limiter.acquire("search", "user-1"),
+            await limiter.acquire("search", "user-2"),
+            await limiter.acquire("default", "user-1"),
+        )
+
+    first, second, other_user, other_scope = asyncio.run(run())
+    assert first == other_user == other_scope == 0.0
+    assert second == pytest.approx(60.0)
+
+
+def test_store_outage_fails_open():
+    store = LocalBucketStore()
+    store.take = AsyncMock(side_effect=ConnectionError("down"))
+    limiter = make_limiter(store)
+    assert asyncio.run(limiter.acquire("default", "user-1")) == 0.0
+    assert limiter.stats()["store_errors"] == 1
+
+
+def test_dependency_returns_429_with_retry_after():
+    app = FastAPI()
+
+    @app.get("/search", dependencies=[Depends(rate_limit("search"))])
+    def search():
+        return {"ok": True}
+
+    limiter = make_limiter(search=Budget(2, 2 / 60))
+    app.dependency_overrides[get_rate_limiter] = lambda: limiter
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+    client = TestClient(app)
+
+    assert [client.get("/search").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/search")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
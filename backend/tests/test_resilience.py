@@ -0,0 +1,253 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.deps import get_current_user
+from app.api.routers.notes import get_note_service
+from app.core.deadline import DeadlineMiddleware, deadline, time_remaining
+from app.main import create_app
+from app.services.ai_services import AIService, build_resilience
+from app.services.resilience import (
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    OverloadedError,
+    ResilientCaller,
+)
+
+
+def fake_jina(delays=None, statuses=None):
+    """A MockTransport Jina whose n-th request sleeps delays[n] seconds and answers statuses[n]."""
+    calls = []
+
+    async def handler(request):
+        n = len(calls)
+        calls.append(json.loads(request.content)["input"])
+        await asyncio.sleep((delays or {}).get(n, 0.0))
+        status = (statuses or {}).get(n, 200)
+        if status != 200:
+            return httpx.Response(status, json={"detail": "fault"})
+        return httpx.Response(200, json={"data": [{"index": 0, "embedding": [float(n)]}]})
+
+    return httpx.MockTransport(handler), calls
+
+
+def make_service(transport, batching=False, **caller_options) -> AIService:
+    resilience = build_resilience(timeout=5.0)
+    for name, value in caller_options.items():
+        setattr(resilience, name, value)
+    service = AIService(api_key="test-key", batching=batching, resilience=resilience)
+    service._client = httpx.AsyncClient(headers=service.headers, transport=transport)
+    return service
+
+
+def make_caller(**options) -> ResilientCaller:
+    defaults = {
+        "limiter": AIMDLimiter(initial=4, minimum=1, maximum=8, cooldown=0.0),
+        "breaker": CircuitBreaker(failure_threshold=3, reset_timeout=60.0),
+        "default_timeout": 5.0,
+        "hedge_min_delay": 0.01,
+    }
+    defaults.update(options)
+    return ResilientCaller("Fake service", **defaults)
+
+
+def test_slow_request_is_hedged_and_first_answer_wins():
+    # Request 20 (after 20 fast ones establish the p95) stalls; its hedge answers first
+    transport, calls = fake_jina(delays={20: 2.0})
+    service = make_service(transport, hedge_min_delay=0.02)
+
+    async def run():
+        for i in range(20):
+            await service.generate_embedding(f"warm {i}")
+        started = asyncio.get_running_loop().time()
+        vector = await service.generate_embedding("stalled")
+        return vector, asyncio.get_running_loop().time() - started
+
+    vector, elapsed = asyncio.run(run())
+    assert vector == [21.0]
+    assert elapsed < 1.0
+    stats = service.resilience.stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+    assert stats["concurrency"]["in_flight"] == 0
+
+
+def test_failed_request_is_retried_once():
+    transport, calls = fake_jina(statuses={0: 503})
+    service = make_service(transport)
+    assert asyncio.run(service.generate_embedding("flaky")) == [1.0]
+    assert len(calls) == 2
+    assert service.resilience.retries == 1
+
+
+def test_client_errors_are_not_retried_and_keep_the_breaker_closed():
+    transport, calls = fake_jina(statuses={0: 400})
+    service = make_service(transport)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(service.generate_embedding("bad input"))
+    assert len(calls) == 1
+    assert service.resilience.breaker.state == "closed"
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    transport, calls = fake_jina(statuses={n: 503 for n in range(100)})
+    service = make_service(transport, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60.0))
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await service.generate_embedding("down")
+        sent = len(calls)
+        with pytest.raises(CircuitOpenError) as error:
+            await service.generate_embedding("down")
+        assert len(calls) == sent
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert error.retry_after > 0
+    assert service.resilience.breaker.stats()["state"] == "open"
+
+
+def test_half_open_breaker_closes_after_a_successful_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.on_failure()
+    assert breaker.state == "open"
+    breaker.before_call("Fake service")
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("Fake service")  # only one probe at a time
+    breaker.on_success()
+    assert breaker.state == "closed"
+
+
+def test_cancelled_half_open_probe_lets_the_next_call_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    caller = make_caller(breaker=breaker)
+    breaker.on_failure()
+
+    async def hang(timeout):
+        await asyncio.sleep(10)
+
+    async def ok(timeout):
+        return "ok"
+
+    async def run():
+        probe = asyncio.ensure_future(caller.call(hang))
+        await asyncio.sleep(0.01)
+        assert breaker.state == "half_open"
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await caller.call(ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == "closed"
+    assert caller.limiter.in_flight == 0
+
+
+def test_limiter_backs_off_on_overload_and_recovers_additively():
+    limiter = AIMDLimiter(initial=8, minimum=2, maximum=10, cooldown=0.0)
+    limiter.on_overload()
+    assert limiter.limit == 4
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.limit == 2
+    for _ in range(4):
+        limiter.on_success()
+    assert 3.5 < limiter.limit < 4.5
+
+
+def test_limiter_rejects_waiters_that_outlast_their_deadline():
+    limiter = AIMDLimiter(initial=1, minimum=1, maximum=1)
+    caller = make_caller(limiter=limiter)
+
+    async def slow(timeout):
+        await asyncio.sleep(0.3)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(caller.call(slow))
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError):
+            await caller.call(slow, timeout=0.05)
+        assert await first == "done"
+        assert await caller.call(slow) == "done"  # the slot is handed back
+
+    asyncio.run(run())
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.in_flight == 0
+
+
+def test_request_deadline_bounds_embedding_calls():
+    transport, calls = fake_jina(delays={0: 2.0, 1: 2.0})
+    service = make_service(transport)
+
+    async def run():
+        with deadline(0.1):
+            await service.generate_embedding("too slow")
+
+    with pytest.raises(DeadlineExceededError) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 504
+    assert service.resilience.stats()["deadline_exceeded"] == 1
+
+
+def test_expired_deadline_skips_the_call():
+    calls = []
+    caller = make_caller()
+
+    async def request(timeout):
+        calls.append(timeout)
+
+    async def run():
+        with deadline(-1):
+            await caller.call(request)
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(run())
+    assert calls == []
+
+
+def test_batched_embedding_waits_only_until_the_callers_deadline():
+    transport, _ = fake_jina(delays={0: 2.0})
+    service = make_service(transport, batching=True)
+
+    async def run():
+        with deadline(0.1):
+            await service.generate_embedding("batched")
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(run())
+
+
+def test_deadline_middleware_honors_shorter_client_timeout():
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware, seconds=10)
+
+    @app.get("/remaining")
+    async def remaining():
+        return {"remaining": time_remaining()}
+
+    client = TestClient(app)
+    assert 9 < client.get("/remaining").json()["remaining"] <= 10
+    assert client.get("/remaining", headers={"X-Request-Timeout": "2"}).json()["remaining"] <= 2
+    assert 9 < client.get("/remaining", headers={"X-Request-Timeout": "60"}).json()["remaining"] <= 10
+
+
+def test_open_breaker_surfaces_as_503_with_retry_after():
+    service = MagicMock()
+    service.search_user_notes = AsyncMock(side_effect=CircuitOpenError("Embedding service is unavailable.", retry_after=7.5))
+    app = create_app()
+    app.dependency_overrides[get_note_service] = lambda: service
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+
+    response = TestClient(app).get("/notes/search", params={"q": "anything"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "8"
+    assert response.json() == {"detail": "Embedding service is unavailable."}
@@ -0,0 +1,132 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from app.api.deps import get_current_user
+from app.api.routers.notes import get_note_service
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, note_response
+from app.main import create_app
+from app.models.note import NoteSummarySchema
+from app.services.db_executor import DBExecutor
+from app.services.note_service import NoteService
+
+NOTE = {
+    "id": "6f1c2b9e-2f4a-4c1e-9a57-0c3f1f0b7d11",
+    "user_id": "user-1",
+    "title": "A note",
+    "content": "some words " * 200,
+    "tags": ["a"],
+    "created_at": "2024-05-01T12:30:00+00:00",
+    "updated_at": "2024-05-01T12:30:00+00:00",
+}
+
+
+def parse_dates(note):
+    return {**note, **{key: datetime.fromisoformat(note[key].replace("Z", "+00:00")) for key in ("created_at", "updated_at")}}
+
+
+def make_client(rows):
+    db = MagicMock()
+    query = db.table.return_value.select.return_value.eq.return_value
+    query.order.return_value = query
+    query.limit.return_value.execute.return_value.data = rows
+    service = NoteService(db, MagicMock(), MagicMock(), executor=DBExecutor(max_workers=1))
+    app = create_app()
+    app.dependency_overrides[get_note_service] = lambda: service
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+    return TestClient(app)
+
+
+def test_note_response_trims_rows_and_encodes_models():
+    summary = NoteSummarySchema(id=uuid.UUID(NOTE["id"]), title="A note", created_at=datetime(2024, 5, 1, tzinfo=timezone.utc))
+    response = note_response([NOTE, summary], headers={"X-Next-Cursor": "abc"})
+
+    assert isinstance(response, FastJSONResponse)
+    assert response.headers["X-Next-Cursor"] == "abc"
+    body = json.loads(response.body)
+    assert "user_id" not in body[0]
+    assert body[0]["title"] == "A note"
+    assert body[1] == {"id": NOTE["id"], "title": "A note", "created_at": "2024-05-01T00:00:00Z"}
+
+
+def test_note_response_passthrough_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", False)
+    assert note_response([NOTE]) == [NOTE]
+
+
+def test_list_matches_validated_output(monkeypatch):
+    rows = [NOTE] * 30
+    fast = make_client(rows).get("/notes/", params={"page_size": 20})
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", False)
+    validated = make_client(rows).get("/notes/", params={"page_size": 20})
+
+    assert fast.status_code == validated.status_code == 200
+    # Trusted rows keep the database's timestamp strings; they parse to the same instants
+    assert [parse_dates(n) for n in fast.json()] == [parse_dates(n) for n in validated.json()]
+    assert fast.headers["X-Next-Cursor"] == validated.headers["X-Next-Cursor"]
+
+
+def test_large_responses_are_gzipped():
+    client = make_client([NOTE] * 5)
+    large = client.get("/notes/", headers={"Accept-Encoding": "gzip"})
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in small.headers
+    assert len(large.json()) == 5
+
+
+def test_batch_search_matches_validated_output(monkeypatch):
+    def batch_client():
+        client = make_client([])
+        service = client.app.dependency_overrides[get_note_service]()
+        service.search_user_notes_batch = AsyncMock(return_value=[[NOTE], []])
+        return client
+
+    body = {"queries": ["milk and eggs", "bread"]}
+    fast = batch_client().post("/notes/search/batch", json=body)
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", False)
+    validated = batch_client().post("/notes/search/batch", json=body)
+
+    assert fast.status_code == validated.status_code == 200
+    assert [entry["query"] for entry in fast.json()] == ["milk and eggs", "bread"]
+    assert [[parse_dates(n) for n in entry["results"]] for entry in fast.json()] == \
+        [[parse_dates(n) for n in entry["results"]] for entry in validated.json()]
+    assert "user_id" not in fast.json()[0]["results"][0]
+
+
+def test_batch_search_limits_queries(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_BATCH_MAX_QUERIES", 2)
+    client = make_client([])
+    assert client.post("/notes/search/batch", json={"queries": ["one query", "two query", "three query"]}).status_code == 400
+    assert client.post("/notes/search/batch", json={"queries": ["ok query", "x"]}).status_code == 400
+    assert client.post("/notes/search/batch", json={"queries": []}).status_code == 422
+
+
+def test_search_filters_are_parsed_and_passed_through():
+    from app.services.vector_db import SearchFilters
+
+    client = make_client([])
+    service = client.app.dependency_overrides[get_note_service]()
+    service.search_user_notes = AsyncMock(return_value=[NOTE])
+
+    response = client.get("/notes/search", params=[
+        ("q", "milk and eggs"), ("tags", "home"), ("tags", "todo"), ("tags", "home"),
+        ("since", "2024-01-01T00:00:00"), ("until", "2024-06-01T00:00:00+02:00"), ("score_threshold", "0.3"), ("limit", "10"),
+    ])
+    assert response.status_code == 200
+    assert service.search_user_notes.await_args.kwargs["limit"] == 10
+    assert service.search_user_notes.await_args.kwargs["filters"] == SearchFilters(
+        tags=("home", "todo"),
+        since=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        until=datetime(2024, 5, 31, 22, tzinfo=timezone.utc),
+        score_threshold=0.3,
+    )
+
+    client.get("/notes/search", params={"q": "milk and eggs"})
+    assert service.search_user_notes.await_args.kwargs["filters"] is None
+    assert client.get("/notes/search", params={"q": "milk", "since": "2024-02-01", "until": "2024-01-01"}).status_code == 400
+    assert client.get("/notes/search", params={"q": "milk", "limit": settings.SEARCH_MAX_LIMIT + 1}).status_code == 422
@@ -0,0 +1,205 @@
+import asyncio
+from unittest.mock import AsyncMock
+from app.services.search_cache import LocalGenerationStore, SearchCache
+
+
+def make_cache(**kwargs) -> SearchCache:
+    options = {"max_entries": 100, "ttl_seconds": 60}
+    options.update(kwargs)
+    return SearchCache(LocalGenerationStore(), **options)
+
+
+def test_repeated_queries_are_served_from_cache():
+    cache = make_cache()
+    search = AsyncMock(return_value=[{"id": "a"}])
+
+    async def run():
+        first = await cache.get_or_search("user-1", "milk  and eggs", (None,), search)
+        second = await cache.get_or_search("user-1", " milk and eggs ", (None,), search)
+        other_params = await cache.get_or_search("user-1", "milk and eggs", (("id",),), search)
+        other_user = await cache.get_or_search("user-2", "milk and eggs", (None,), search)
+        return first, second, other_params, other_user
+
+    first, second, _, _ = asyncio.run(run())
+    assert first == second == [{"id": "a"}]
+    assert search.await_count == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert stats["hit_rate"] == 0.25
+
+
+def test_writes_invalidate_only_that_users_entries():
+    cache = make_cache()
+    search = AsyncMock(return_value=[])
+
+    async def run():
+        await cache.get_or_search("user-1", "q", (None,), search)
+        await cache.get_or_search("user-2", "q", (None,), search)
+        await cache.invalidate("user-1")
+        await cache.get_or_search("user-1", "q", (None,), search)
+        await cache.get_or_search("user-2", "q", (None,), search)
+
+    asyncio.run(run())
+    assert search.await_count == 3
+
+
+def test_results_of_a_search_racing_a_write_are_not_served():
+    cache = make_cache()
+    calls = []
+
+    async def search():
+        calls.append(1)
+        # A write lands while this search is in flight
+        await cache.invalidate("user-1")
+        return [{"id": "stale"}]
+
+    async def fresh():
+        return [{"id": "fresh"}]
+
+    async def run():
+        await cache.get_or_search("user-1", "q", (None,), search)
+        return await cache.get_or_search("user-1", "q", (None,), fresh)
+
+    assert asyncio.run(run()) == [{"id": "fresh"}]
+
+
+def test_entries_are_bounded_by_lru_and_ttl():
+    cache = make_cache(max_entries=2)
+    search = AsyncMock(return_value=[])
+
+    async def run():
+        for query in ("a", "b", "a", "c", "a", "b"):
+            await cache.get_or_search("user-1", query, (None,), search)
+
+    asyncio.run(run())
+    # "b" was least recently used when "c" arrived
+    assert cache.stats()["evictions"] == 2
+    assert search.await_count == 4
+
+    expired = make_cache(ttl_seconds=0)
+    asyncio.run(expired.get_or_search("user-1", "a", (None,), search))
+    asyncio.run(expired.get_or_search("user-1", "a", (None,), search))
+    assert expired.stats()["hits"] == 0
+
+
+def test_unreachable_generation_store_bypasses_the_cache():
+    store = LocalGenerationStore()
+    store.get = AsyncMock(side_effect=ConnectionError("redis down"))
+    cache = SearchCache(store, max_entries=10, ttl_seconds=60)
+    search = AsyncMock(return_value=[])
+
+    asyncio.run(cache.get_or_search("user-1", "q", (None,), search))
+    asyncio.run(cache.get_or_search("user-1", "q", (None,), search))
+
+    assert search.await_count == 2
+    assert cache.stats()["bypassed"] == 2
+
+
+def test_note_writes_invalidate_cached_searches():
+    from app.models.note import NoteCreate
+    from tests.test_note_service import make_note, make_service
+
+    service, ai, vector_db = make_service(make_note(), make_note())
+    service.search_cache = make_cache()
+    vector_db.search_notes = AsyncMock(return_value=[])
+    service.db.table.return_value.insert.return_value.execute.return_value.data = [make_note()]
+
+    async def run():
+        await service.search_user_notes("milk", "user-1")
+        await service.search_user_notes("milk", "user-1")
+        await service.create_note(NoteCreate(content="Buy milk and eggs"), "user-1")
+        await service.search_user_notes("milk", "user-1")
+
+    asyncio.run(run())
+    assert vector_db.search_notes.await_count == 2
+
+
+def test_another_workers_write_drops_the_stale_local_tenant_before_searching():
+    import uuid
+    from app.services.local_index import LocalVectorIndex
+    from app.services.vector_db import VectorDBService
+    from tests.test_vector_db import DIM, make_vector_db
+
+    def local_index():
+        return LocalVectorIndex(dimension=DIM, memory_budget_bytes=1 << 20, max_tenant_points=100, ttl_seconds=3600)
+
+    shared_generations = LocalGenerationStore()  # stands in for Redis
+    worker_a = make_vector_db()
+    worker_a.local_index = local_index()
+    worker_b = VectorDBService(url="http://localhost:6333", api_key="", collection_name="test-notes", local_index=local_index())
+    worker_b.client = worker_a.client
+    cache_a = SearchCache(shared_generations, 100, 60, on_foreign_write=worker_a.invalidate_local_tenant)
+    cache_b = SearchCache(shared_generations, 100, 60, on_foreign_write=worker_b.invalidate_local_tenant)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    query = [1.0, 0.0, 0.0, 0.0]
+
+    def search(worker, cache):
+        return cache.get_or_search("user-1", "query", (), lambda: worker.search_notes("user-1", query))
+
+    async def run():
+        await worker_a.upsert_note(first, "user-1", [0.0, 1.0, 0.0, 0.0])
+        await cache_a.invalidate("user-1")
+        assert await search(worker_a, cache_a) == [first]  # worker A now holds the tenant locally
+        loads = worker_a.local_index.loads
+
+        await worker_b.upsert_note(second, "user-1", query)
+        await cache_b.invalidate("user-1")
+        assert await search(worker_a, cache_a) == [second, first]
+        assert worker_a.local_index.loads == loads + 1
+
+        # Worker A's own writes already reached its copy, so it keeps it
+        await worker_a.upsert_note(third, "user-1", [0.0, 0.0, 1.0, 0.0])
+        await cache_a.invalidate("user-1")
+        assert len(await search(worker_a, cache_a)) == 3
+        assert worker_a.local_index.loads == loads + 1
+
+    asyncio.run(run())
+
+
+def test_tenant_loads_started_before_an_invalidation_are_not_installed():
+    from app.services.local_index import LocalVectorIndex
+
+    index = LocalVectorIndex(dimension=4, memory_budget_bytes=1 << 20, max_tenant_points=100)
+    points = [("a", [1.0, 0.0, 0.0, 0.0], {})]
+    first, other = index.begin_load("user-1"), index.begin_load("user-2")
+    index.invalidate("user-1")
+    # Only the invalidated user's load is thrown away
+    assert index.load("user-1", points, first) is None
+    assert index.peek("user-1") is None
+    assert index.load("user-2", points, other) is not None
+    index.end_load("user-1")
+    index.end_load("user-2")
+
+    token = index.begin_load("user-1")
+    assert index.load("user-1", points, token) is not None
+    index.end_load("user-1")
+
+
+def test_first_searches_of_many_users_all_install_their_tenants():
+    import uuid
+    from app.services.local_index import LocalVectorIndex
+    from tests.test_vector_db import DIM, make_vector_db
+
+    vector_db = make_vector_db()
+    vector_db.local_index = LocalVectorIndex(dimension=DIM, memory_budget_bytes=1 << 20, max_tenant_points=100)
+    cache = SearchCache(LocalGenerationStore(), 100, 60, on_foreign_write=vector_db.invalidate_local_tenant)
+    users = [f"user-{i}" for i in range(20)]
+    scroll = vector_db._scroll_user_points
+
+    async def slow_scroll(user_id, max_points):
+        points = await scroll(user_id, max_points)
+        await asyncio.sleep(0.01)
+        return points
+
+    vector_db._scroll_user_points = slow_scroll
+
+    async def run():
+        await vector_db.upsert_notes([(uuid.uuid4(), user, [1.0, 0.0, 0.0, 0.0], None) for user in users])
+        await asyncio.gather(*(
+            cache.get_or_search(user, "query", (), lambda user=user: vector_db.search_notes(user, [1.0, 0.0, 0.0, 0.0]))
+            for user in users
+        ))
+
+    asyncio.run(run())
+    assert vector_db.local_index.loads == len(users)
+    assert all(vector_db.local_index.peek(user) is not None for user in users)
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+from fastapi.testclient import TestClient
+from app import main
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_heavy_sdks_are_not_imported_with_the_app():
+    code = "import sys, app.main; print(sorted(m for m in ('qdrant_client', 'supabase', 'numpy') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_readiness_waits_for_warmup_and_retries(monkeypatch):
+    attempts = []
+
+    async def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ConnectionError("qdrant still starting")
+
+    async def ok():
+        pass
+
+    monkeypatch.setattr(main, "STARTUP_COMPONENTS", {"vector_db": flaky, "supabase": ok})
+    monkeypatch.setattr(main, "_start_indexing", ok)
+    monkeypatch.setattr(main, "STARTUP_RETRY_BACKOFF_SECONDS", 0.2)
+
+    with TestClient(main.create_app()) as client:
+        assert client.get("/health/live").status_code == 200
+        not_ready = client.get("/health/ready")
+        assert not_ready.status_code == 503
+        assert not_ready.json()["components"]["vector_db"].startswith("error: qdrant still starting")
+
+        deadline = time.monotonic() + 5
+        while client.get("/health/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        ready = client.get("/health/ready")
+
+    assert ready.status_code == 200
+    assert ready.json()["components"] == {"vector_db": "ok", "supabase": "ok", "indexing": "ok"}
+    assert len(attempts) == 2
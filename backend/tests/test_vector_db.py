@@ -0,0 +1,243 @@
+import asyncio
+import uuid
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+from app.services.vector_db import VectorDBService
+
+DIM = 4
+
+
+def make_vector_db() -> VectorDBService:
+    """A VectorDBService backed by Qdrant's in-process local mode."""
+    service = VectorDBService(url="http://localhost:6333", api_key="", collection_name="test-notes")
+    service.client = AsyncQdrantClient(location=":memory:")
+    asyncio.run(service.client.create_collection(
+        collection_name="test-notes",
+        vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE),
+    ))
+    return service
+
+
+def test_search_is_scoped_to_the_user():
+    vector_db = make_vector_db()
+    mine, theirs = uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await vector_db.upsert_note(mine, "user-1", [1.0, 0.0, 0.0, 0.0])
+        await vector_db.upsert_note(theirs, "user-2", [1.0, 0.0, 0.0, 0.0])
+        return await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+    assert asyncio.run(run()) == [mine]
+
+
+def test_payload_fields_are_stored_and_updated():
+    vector_db = make_vector_db()
+    note_id = uuid.uuid4()
+
+    async def run():
+        await vector_db.upsert_notes([(note_id, "user-1", [0.0, 1.0, 0.0, 0.0], {"title": "Old", "tags": ["a"]})])
+        await vector_db.update_note_payload(note_id, {"tags": ["a", "b"]})
+        return await vector_db.search_note_hits("user-1", [0.0, 1.0, 0.0, 0.0])
+
+    hits = asyncio.run(run())
+    assert len(hits) == 1
+    assert hits[0].payload == {"user_id": "user-1", "title": "Old", "tags": ["a", "b"]}
+    assert hits[0].score > 0.99
+
+
+def test_delete_and_chunk_hashes_are_scoped_to_the_user():
+    vector_db = make_vector_db()
+    note_id = uuid.uuid4()
+
+    async def run():
+        # A point stored before chunking, with only the whole note's content hash
+        await vector_db.upsert_note(note_id, "user-1", [1.0, 0.0, 0.0, 0.0], {"content_hash": "abc"})
+        hashes = (await vector_db.get_chunk_hashes(note_id, "user-1"), await vector_db.get_chunk_hashes(note_id, "user-2"))
+        await vector_db.delete_note(note_id, user_id="user-2")
+        kept = await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+        await vector_db.delete_note(note_id, user_id="user-1")
+        return hashes, kept, await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+    hashes, kept, remaining = asyncio.run(run())
+    assert hashes == (["abc"], [])
+    assert kept == [note_id]
+    assert remaining == []
+
+
+def test_chunks_are_collapsed_into_notes():
+    from app.services.chunking import NoteChunks
+
+    vector_db = make_vector_db()
+    long_note, short_note = uuid.uuid4(), uuid.uuid4()
+    chunks = NoteChunks.split(long_note, "first part\n\nsecond part\n\nthird part", max_chars=12)
+    assert len(chunks) == 3
+
+    async def run():
+        await vector_db.upsert_notes(
+            chunks.points("user-1", {0: [0.0, 1.0, 0.0, 0.0], 1: [1.0, 0.1, 0.0, 0.0], 2: [0.9, 0.0, 0.1, 0.0]}, {"title": "Long"})
+            + [(short_note, "user-1", [0.5, 0.5, 0.0, 0.0], {"title": "Short"})]
+        )
+        hits = await vector_db.search_note_hits("user-1", [1.0, 0.0, 0.0, 0.0], limit=2)
+        hashes = await vector_db.get_chunk_hashes(long_note, "user-1")
+        await vector_db.delete_stale_chunks({long_note: 1})
+        after_trim = await vector_db.get_chunk_hashes(long_note, "user-1")
+        await vector_db.update_note_payload(long_note, {"title": "Renamed"})
+        renamed = await vector_db.search_note_hits("user-1", [0.0, 1.0, 0.0, 0.0], limit=1)
+        await vector_db.delete_note(long_note, user_id="user-1")
+        return hits, hashes, after_trim, renamed, await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+    hits, hashes, after_trim, renamed, remaining = asyncio.run(run())
+    assert [str(hit.id) for hit in hits] == [str(long_note), str(short_note)]
+    assert hits[0].payload["chunk"] == 1
+    assert hashes == chunks.hashes
+    assert after_trim == chunks.hashes[:1]
+    assert renamed[0].payload["title"] == "Renamed"
+    assert remaining == [short_note]
+
+
+def test_batch_search_answers_each_query_in_one_call():
+    vector_db = make_vector_db()
+    first, second, theirs = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await vector_db.upsert_notes([
+            (first, "user-1", [1.0, 0.0, 0.0, 0.0], {"title": "First"}),
+            (second, "user-1", [0.0, 1.0, 0.0, 0.0], {"title": "Second"}),
+            (theirs, "user-2", [1.0, 0.0, 0.0, 0.0], {"title": "Theirs"}),
+        ])
+        return await vector_db.search_note_hits_batch("user-1", [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]], limit=1)
+
+    hits = asyncio.run(run())
+    assert [[str(hit.id) for hit in group] for group in hits] == [[str(first)], [str(second)]]
+    assert hits[1][0].payload["title"] == "Second"
+
+
+def test_batch_search_applies_filters_to_every_query():
+    from app.services.vector_db import SearchFilters
+
+    vector_db = make_vector_db()
+    tagged, untagged = uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await vector_db.upsert_notes([
+            (tagged, "user-1", [0.0, 1.0, 0.0, 0.0], {"tags": ["work"]}),
+            (untagged, "user-1", [1.0, 0.0, 0.0, 0.0], {"tags": []}),
+        ])
+        return await vector_db.search_note_hits_batch(
+            "user-1", [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]], filters=SearchFilters(tags=("work",))
+        )
+
+    hits = asyncio.run(run())
+    assert [[str(hit.id) for hit in group] for group in hits] == [[str(tagged)], [str(tagged)]]
+
+
+def test_backfill_payloads_sets_filter_fields_on_every_chunk():
+    from unittest.mock import MagicMock
+    from app.services.chunking import NoteChunks
+    from app.services.vector_db import SearchFilters
+
+    vector_db = make_vector_db()
+    note_id = uuid.uuid4()
+    chunks = NoteChunks.split(note_id, "first part\n\nsecond part", max_chars=12)
+    vector_db.sync_client = MagicMock()
+    vector_db.backfill_payloads({str(note_id): {"tags": ["work"]}})
+    operations = vector_db.sync_client.batch_update_points.call_args.kwargs["update_operations"]
+
+    async def run():
+        await vector_db.upsert_notes(chunks.points("user-1", {0: [1.0, 0.0, 0.0, 0.0], 1: [0.9, 0.1, 0.0, 0.0]}))
+        before = await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0], filters=SearchFilters(tags=("work",)))
+        await vector_db.client.batch_update_points(collection_name="test-notes", update_operations=operations)
+        after = await vector_db.search_note_hits("user-1", [0.0, 1.0, 0.0, 0.0], filters=SearchFilters(tags=("work",)))
+        return before, after
+
+    before, after = asyncio.run(run())
+    assert before == []
+    assert [str(hit.id) for hit in after] == [str(note_id)]
+
+
+def test_recall_at_k():
+    from app.services.vector_db import recall_at_k
+
+    assert recall_at_k(["a", "b", "c", "d"], ["a", "c", "x", "y"]) == 0.5
+    assert recall_at_k([], ["a"]) == 1.0
+
+
+def test_quantization_modes_build_configs():
+    import pytest
+    from app.services.vector_db import build_quantization_config
+
+    assert build_quantization_config("none") is None
+    scalar = build_quantization_config("scalar")
+    assert scalar.scalar.type == models.ScalarType.INT8
+    assert isinstance(build_quantization_config("binary"), models.BinaryQuantization)
+    with pytest.raises(ValueError):
+        build_quantization_config("pq")
+
+
+def test_quantized_search_passes_rescoring_params():
+    vector_db = make_vector_db()
+    vector_db.quantization = "binary"
+    params = vector_db._search_params()
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling >= 1.0
+
+    async def run():
+        note_id = uuid.uuid4()
+        await vector_db.upsert_note(note_id, "user-1", [1.0, 0.0, 0.0, 0.0])
+        assert await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0]) == [note_id]
+        return await vector_db.measure_recall("user-1", [[1.0, 0.0, 0.0, 0.0]], limit=1)
+
+    report = asyncio.run(run())
+    assert report["recall"] == 1.0
+    assert report["memory_ratio"] == 1 / 32
+
+
+def test_tenant_mode_collection_layout():
+    from unittest.mock import AsyncMock, MagicMock
+    from app.services.vector_db import build_hnsw_config, user_id_index_schema
+
+    assert build_hnsw_config(True).m == 0
+    assert build_hnsw_config(True).payload_m > 0
+    assert build_hnsw_config(False).payload_m == 0
+    assert user_id_index_schema(True).is_tenant is True
+    assert user_id_index_schema(False) == models.PayloadSchemaType.KEYWORD
+
+    vector_db = VectorDBService(url="http://localhost:6333", api_key="", collection_name="test-notes", tenant_mode=True)
+    vector_db.client = AsyncMock()
+    vector_db.client.collection_exists.return_value = False
+    asyncio.run(vector_db.setup_collection())
+    assert vector_db.client.create_collection.call_args.kwargs["hnsw_config"].m == 0
+    indexes = {call.kwargs["field_name"]: call.kwargs["field_schema"] for call in vector_db.client.create_payload_index.call_args_list}
+    assert indexes["user_id"].is_tenant
+    assert indexes["note_id"] == models.PayloadSchemaType.KEYWORD
+    assert indexes["tags"] == models.PayloadSchemaType.KEYWORD
+    assert indexes["created_at"] == models.PayloadSchemaType.DATETIME
+
+    vector_db.sync_client = MagicMock()
+    vector_db.apply_tenant_settings()
+    assert vector_db.sync_client.create_payload_index.call_args.kwargs["field_schema"].is_tenant
+    assert vector_db.sync_client.update_collection.call_args.kwargs["hnsw_config"].payload_m > 0
+
+
+def test_setup_collection_skips_existing_collection():
+    from unittest.mock import AsyncMock
+
+    vector_db = make_vector_db()
+    vector_db.client.create_collection = AsyncMock()
+    asyncio.run(vector_db.setup_collection())
+    vector_db.client.create_collection.assert_not_awaited()
+
+
+def test_tenant_mode_search_in_local_mode():
+    from app.services.vector_db import user_id_index_schema
+
+    vector_db = make_vector_db()
+    note_id = uuid.uuid4()
+
+    async def run():
+        await vector_db.client.create_payload_index("test-notes", "user_id", field_schema=user_id_index_schema(True))
+        await vector_db.upsert_note(note_id, "user-1", [1.0, 0.0, 0.0, 0.0])
+        await vector_db.upsert_note(uuid.uuid4(), "user-2", [1.0, 0.0, 0.0, 0.0])
+        return await vector_db.search_notes("user-1", [1.0, 0.0, 0.0, 0.0])
+
+    assert asyncio.run(run()) == [note_id]